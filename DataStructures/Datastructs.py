@@ -64,7 +64,7 @@ class Person(Atomiseable):
         return self.__key() == other.__key()
 
     def toAtom(self):
-        return Atom(self.name + " " + self.lastname, False)
+        return Atom(self.name + " " + self.lastname, False, value=self)
 
 
 class Location(Atomiseable):
@@ -88,7 +88,7 @@ class Location(Atomiseable):
         return hash(self.__key())
 
     def toAtom(self):
-        return Atom(self.name, False)
+        return Atom(self.name, False, value=self)
 
     # TODO: Change this method
     def isFar(self, other):
@@ -149,8 +149,21 @@ class Date(Atomiseable):
 
         return Date(*tuple(vals))
 
+    @staticmethod
+    def fromString(s):
+        """
+        Parses a date written by __str__ ("y.m.d - h:min:s")
+
+        :param s: The string representation of a date
+        :return: The corresponding Date, or None if the string is malformed
+        """
+        match = re.fullmatch(r"(-?\d+)\.(-?\d+)\.(-?\d+) - (-?\d+):(-?\d+):(-?\d+)", s.strip())
+        if match is None:
+            return None
+        return Date(*match.groups())
+
     def toAtom(self):
-        return Atom(str(self), False)
+        return Atom(str(self), False, value=self)
 
     def isBefore(self, other):
         return (self.year, self.month, self.day) < (other.year, other.month, other.day)
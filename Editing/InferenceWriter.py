@@ -1,57 +1,29 @@
 import logging
 
 from Editing.PrettyPrinter import pretty, modifyURLToDiscussion
+from InferenceEngine.Provenance import provenance, registry
 from Editing.WikiWriter import write_on_page_after_title, delete_on_page_if_exists, write_picture_after_title, \
     write_picture_on_wiki, picture_title, picture_foot
+from Scraping.VectorisedInference import checkIfErrorsVectorised
 from Scraping.WikiGraph import WikiGenealogyTree
 from Scraping.WikiInference import *
 
 logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.INFO)
 
-def write_inferences(resData, allLinks):
-    birth_facts = BirthInferenceChecker()
-    multibirth_facts = MultiBirthInferenceChecker()
-    multideath_facts = MultiDeathInferenceChecker()
-    encounter_facts = EncounterInferenceChecker()
-    election_bef_birth_facts = ElectionBefBirthInferenceChecker()
-    election_aft_death_facts = ElectionAftDeathInferenceChecker()
-    mariage_bef_birth_facts = MariageBefBirthInferenceChecker()
-    mariage_aft_death_facts = MariageAftDeathInferenceChecker()
-    divorce_facts = DivorceInferenceChecker()
-
+def write_inferences(resData, allLinks, parallel=False, vectorised=False):
     logging.info("Building images")
     writeGraphs(resData, allLinks)
     logging.info("Building facts")
 
-    list_birth_facts = birth_facts.checkIfErrors(resData)
-    list_multibirth_facts = multibirth_facts.checkIfErrors(resData)
-    list_multideath_facts = multideath_facts.checkIfErrors(resData)
-    list_encounter_facts = encounter_facts.checkIfErrors(resData)
-    list_election_bef_birth_facts = election_bef_birth_facts.checkIfErrors(resData)
-    list_election_aft_death_facts = election_aft_death_facts.checkIfErrors(resData)
-    list_mariage_bef_birth_facts = mariage_bef_birth_facts.checkIfErrors(resData)
-    list_mariage_aft_death_facts = mariage_aft_death_facts.checkIfErrors(resData)
-    list_divorce_facts = divorce_facts.checkIfErrors(resData)
-
-    list_facts = []
-    if list_birth_facts is not None:
-        list_facts.extend(list_birth_facts)
-    if list_multibirth_facts is not None:
-        list_facts.extend(list_multibirth_facts)
-    if list_multideath_facts is not None:
-        list_facts.extend(list_multideath_facts)
-    if list_encounter_facts is not None:
-        list_facts.extend(list_encounter_facts)
-    if list_election_bef_birth_facts is not None:
-        list_facts.extend(list_election_bef_birth_facts)
-    if list_election_aft_death_facts is not None:
-        list_facts.extend(list_election_aft_death_facts)
-    if list_mariage_bef_birth_facts is not None:
-        list_facts.extend(list_mariage_bef_birth_facts)
-    if list_mariage_aft_death_facts is not None:
-        list_facts.extend(list_mariage_aft_death_facts)
-    if list_divorce_facts is not None:
-        list_facts.extend(list_divorce_facts)
+    if vectorised or parallel:
+        if vectorised:
+            results = checkIfErrorsVectorised(resData)
+        else:
+            results = checkIfErrorsInParallel(resData)
+        list_facts = [fact for facts in results.values() for fact in facts]
+    else:
+        # The conclusions are formatted as they are derived.
+        list_facts = (fact for checker, fact in InferenceSuite().stream(resData))
 
     (list_filtered, pagesWithNothing) = pretty(list_facts, allLinks)
     writeOnPages(list_filtered)
@@ -59,10 +31,38 @@ def write_inferences(resData, allLinks):
     for url in pagesWithNothing:
         delete_on_page_if_exists(url)
 
-def writeOnPages(factsWithPages):
+def write_incremental_inferences(suite, resData, allLinks):
+    """
+    Updates an incremental InferenceSuite with the scraped pages and only
+    rewrites the pages whose conclusions may have changed.
+    """
+    logging.info("Building images")
+    writeGraphs(resData, allLinks)
+    logging.info("Updating facts")
+
+    added, removed = suite.update(resData, allLinks)
+    pages = provenance(allLinks)
+    for fact in added + removed:
+        pages |= fact.urls
+
+    list_facts = []
+    for facts in suite.results().values():
+        list_facts.extend(fact for fact in facts if fact.urls & pages)
+
+    pages = registry.decode(pages)
+
+    (list_filtered, pagesWithNothing) = pretty(list_facts, pages)
+    writeOnPages(list_filtered, modifyURLToDiscussion(pages))
+
+    for url in pagesWithNothing:
+        delete_on_page_if_exists(url)
+
+def writeOnPages(factsWithPages, pages=None):
     dict = {}
     for fact in factsWithPages:
         for page in fact[1]:
+            if pages is not None and page not in pages:
+                continue
             value = dict.get(page)
             if value is None:
                 dict[page] = [fact[0]]
@@ -42,8 +42,10 @@ def pretty(list_facts, allLinks):
             + elem.propositions[0].name + " puis avec [[" + elem.propositions[6].name + "]] en " + elem.propositions[1].name)
 
         if string is not None:
-            list_pretty.append((string, modifyURLToDiscussion(elem.urls)))
-            pagesWithSomething = pagesWithSomething.union(elem.urls)
+            # The provenance is only decoded into urls here, for display.
+            urls = elem.getUrls()
+            list_pretty.append((string, modifyURLToDiscussion(urls)))
+            pagesWithSomething = pagesWithSomething.union(urls)
 
     pagesWithNothing = set([filteredUrl for url in allLinks if url not in pagesWithSomething
                                             for filteredUrl in modifyURLToDiscussion(set([url]))])
@@ -0,0 +1,203 @@
+from InferenceEngine.Chaining import Chaining
+from InferenceEngine.Predicate import Atom, Predicate, variables
+from InferenceEngine.Provenance import EMPTY
+from InferenceEngine.Unificator import Unificator
+
+
+class BackwardChainingWithVariables(Chaining):
+    """ Un moteur d'inférence à chaînage arrière avec variables et tabulation.
+
+        Un but est résolu de haut en bas : par les faits de la base de\
+        connaissances, puis par les règles dont la conclusion s'unifie avec\
+        lui, chaque condition devenant un sous-but. Les réponses de chaque\
+        sous-but sont conservées dans une table, indexée par le sous-but à un\
+        renommage des variables près : un sous-but déjà rencontré n'est pas\
+        résolu une seconde fois.
+
+        Lorsqu'un sous-but dépend de lui-même à travers des règles récursives,\
+        sa table, encore incomplète, fournit les réponses connues ; la\
+        résolution est alors répétée jusqu'à ce qu'aucune table ne grandisse.
+    """
+
+    def __init__(self, knowledge, method=None, goals=None):
+        """
+            :param method: ``Unificateur`` par défaut.
+            :param list goals: les buts résolus par ``chain``. Par défaut, les\
+            conclusions de toutes les règles.
+        """
+
+        Chaining.__init__(self, knowledge)
+
+        if method is None:
+            self.method = Unificator()
+        else:
+            self.method = method
+
+        self.goals = goals
+        self.tables = {}
+        self.complete = set()
+        self.visited = set()
+        self.stack = set()
+        self.changed = False
+        self.recursive = False
+
+    def reset(self):
+        """ Réinitialise le moteur et vide les tables. """
+
+        Chaining.reset(self)
+        self.tables = {}
+        self.complete = set()
+
+    def chain(self):
+        """ Résout les buts du moteur.
+
+            :return: les faits de la base de connaissances suivis des réponses\
+            à chacun des buts.
+        """
+        self.reset()
+        goals = self.goals
+        if goals is None:
+            goals = [rule.conclusion for rule in self.knowledge.rules]
+
+        terms = self.knowledge.terms
+        known = set()
+        for fact in self.knowledge.facts:
+            known.add(terms.intern(fact))
+            self.solutions.append(fact)
+
+        for goal in goals:
+            for answer in self.query(goal):
+                term = terms.intern(answer)
+                if term not in known:
+                    known.add(term)
+                    self.solutions.append(answer)
+
+        return self.solutions
+
+    @staticmethod
+    def canonical(goal):
+        """ Renomme les variables d'un but dans l'ordre de leur apparition.
+
+            Deux buts égaux à un renommage près ont la même forme canonique.\
+            Les noms choisis ne peuvent pas apparaître dans les règles.
+        """
+
+        renaming = {}
+        for variable in variables(goal):
+            renaming[variable] = Atom('?{}'.format(len(renaming)), True)
+        if len(renaming) == 0:
+            return goal
+        return BackwardChainingWithVariables.rename(goal, renaming)
+
+    @staticmethod
+    def rename(proposition, renaming):
+        # Contrairement à ``substitute``, le renommage n'est appliqué qu'une
+        # fois : ``?0`` peut devenir ``?1`` pendant que ``?1`` devient ``?0``.
+        if isinstance(proposition, Atom):
+            return renaming.get(proposition, proposition)
+        return Predicate([BackwardChainingWithVariables.rename(argument, renaming)
+                          for argument in proposition.propositions], proposition.name)
+
+    def query(self, goal):
+        """ Retourne les faits qui satisfont un but.
+
+            :param goal: une proposition pouvant contenir des variables.
+            :return: la liste des faits, connus ou déduits, qui s'unifient\
+            avec le but.
+        """
+
+        goal = BackwardChainingWithVariables.canonical(goal)
+        key = self.knowledge.terms.intern(goal)
+
+        if key not in self.complete:
+            while True:
+                self.visited = set()
+                self.changed = False
+                self.recursive = False
+                self.solve(goal, key)
+                # Sans récursion, un seul passage suffit.
+                if not (self.changed and self.recursive):
+                    break
+            self.complete |= self.visited
+
+        return list(self.tables[key].values())
+
+    def solve(self, goal, key):
+        """ Résout un but canonique et retourne ses réponses connues. """
+
+        if key in self.complete or key in self.visited:
+            if key in self.stack:
+                self.recursive = True
+            return list(self.tables[key].values())
+
+        self.visited.add(key)
+        self.stack.add(key)
+        table = self.tables.setdefault(key, {})
+        builtins = self.knowledge.builtins
+
+        if builtins.isBuiltin(goal):
+            if builtins.evaluate(goal, {}):
+                self.record(table, goal, EMPTY)
+        else:
+            for fact in self.knowledge.candidates(goal):
+                if self.method.pattern_match(fact, goal, {}) != self.method.failure:
+                    self.record(table, fact, fact.urls)
+
+            for rule in self.knowledge.rules:
+                env = self.method.unify(rule.conclusion, goal)
+                if env == self.method.failure:
+                    continue
+
+                for env1, urls in self.resolve(rule, env):
+                    conclusion = self.method.substitute(rule.conclusion, env1)
+                    self.record(table, conclusion, urls, rule)
+
+        self.stack.discard(key)
+        return list(table.values())
+
+    def resolve(self, rule, env):
+        """ Résout les conditions d'une règle sous un environnement.
+
+            :return: une liste de couples ``(environnement, urls)``.
+        """
+
+        terms = self.knowledge.terms
+        builtins = self.knowledge.builtins
+        partials = [(env, EMPTY)]
+
+        for i in rule.schedule(range(len(rule.conditions)), builtins):
+            condition = rule.conditions[i]
+
+            if builtins.isBuiltin(condition):
+                partials = [(env1, urls) for env1, urls in partials
+                            if builtins.evaluate(self.method.substitute(condition, env1), {})]
+                continue
+
+            nouveaux = []
+            for env1, urls in partials:
+                subgoal = BackwardChainingWithVariables.canonical(self.method.substitute(condition, env1))
+                for answer in self.solve(subgoal, terms.intern(subgoal)):
+                    env2 = self.method.pattern_match(answer, condition, env1)
+                    if env2 != self.method.failure:
+                        nouveaux.append((env2, urls | answer.urls))
+            partials = nouveaux
+
+            if len(partials) == 0:
+                break
+
+        return partials
+
+    def record(self, table, fact, urls, rule=None):
+        """ Ajoute une réponse à la table d'un but. """
+
+        term = self.knowledge.terms.intern(fact)
+        if rule is not None:
+            self.addOrigin(term, rule)
+        if term in table:
+            return
+
+        if rule is not None:
+            fact.addUrls(urls)
+        table[term] = fact
+        self.trace.append(fact)
+        self.changed = True
@@ -0,0 +1,59 @@
+from InferenceEngine.Predicate import Predicate
+
+
+class Builtins:
+    """ Registre des prédicats évaluables (built-ins).
+
+        Une condition dont le nom est enregistré ici n'est pas confrontée aux\
+        faits : elle est évaluée comme une garde, par une fonction Python,\
+        dès que toutes ses variables sont liées. Les arguments sont passés à\
+        la fonction sous forme d'atomes.
+    """
+
+    def __init__(self, functions=None):
+        """
+            :param dict functions: un dictionnaire ``{nom : fonction}``.
+        """
+
+        self.functions = {}
+        if functions is not None:
+            self.functions.update(functions)
+
+    def add(self, name, function):
+        """ Enregistre un prédicat évaluable.
+
+            :param str name: le nom du prédicat.
+            :param function: une fonction qui reçoit les arguments du prédicat\
+            et retourne ``True`` si le prédicat est vrai.
+        """
+
+        self.functions[name] = function
+
+    def isBuiltin(self, condition):
+        return isinstance(condition, Predicate) and condition.name in self.functions
+
+    def evaluate(self, condition, env):
+        """ Évalue une garde sous un environnement.
+
+            :param condition: une condition dont le nom est enregistré.
+            :param dict env: un environnement qui lie les variables de la\
+            condition.
+            :return: ``True`` si la garde est satisfaite, ``False`` sinon ou si\
+            une de ses variables n'est pas liée.
+        """
+
+        arguments = []
+        for argument in condition.propositions:
+            if argument.getIsVariable():
+                argument = env.get(argument)
+                if argument is None:
+                    return False
+            arguments.append(argument)
+
+        return bool(self.functions[condition.name](*arguments))
+
+    def __len__(self):
+        return len(self.functions)
+
+    def __contains__(self, name):
+        return name in self.functions
@@ -1,3 +1,8 @@
+from collections import deque
+
+from InferenceEngine.Trace import StreamTrace
+
+
 class Chaining:
     """ Le squelette d'un moteur d'inférence.
 
@@ -7,12 +12,23 @@ class Chaining:
 
         :cvar self.trace: représente l'ordre dans lequel les propositions ont\
         été déduites et dans lequel les règles ont été appliquées (à utiliser\
-        pour débugger votre code).
+        pour débugger votre code). Son contenu dépend du mode choisi par\
+        ``setTraceMode``.
         :cvar self.solutions: doit contenir les solutions du chaînage.
+        :cvar self.origins: associe à chaque fait déduit (sous sa forme\
+        internée) l'ensemble des règles qui l'ont conclu.
+
+        Un moteur est aussi un gestionnaire de contexte, qui ferme sa trace\
+        (voir ``closeTrace``) en sortie de bloc.
     """
 
     __indentation = 4 * ' '
 
+    TRACE_FULL = 'full'
+    TRACE_OFF = 'off'
+    TRACE_RING = 'ring'
+    TRACE_STREAM = 'stream'
+
     def __init__(self, knowledge):
         """ Initialise le moteur d'inférence sans variables.
         
@@ -21,6 +37,7 @@ class Chaining:
 
         self.trace = []
         self.solutions = []
+        self.origins = {}
         self.knowledge = knowledge
 
     def reset(self):
@@ -30,8 +47,65 @@ class Chaining:
             cette méthode.
         """
 
-        self.trace = []
+        self.trace.clear()
         self.solutions = []
+        self.origins = {}
+
+    def setTraceMode(self, mode, size=1000, path=None):
+        """ Choisit ce que le moteur conserve de sa trace.
+
+            :param str mode: ``TRACE_FULL`` conserve tous les événements en\
+            mémoire (le mode par défaut), ``TRACE_OFF`` n'en conserve aucun,\
+            ``TRACE_RING`` conserve les ``size`` derniers et ``TRACE_STREAM``\
+            les écrit dans le fichier JSONL ``path`` par un thread d'écriture.
+            :param int size: la taille du tampon circulaire de ``TRACE_RING``,\
+            ou le nombre d'événements en attente d'écriture de\
+            ``TRACE_STREAM``.
+            :param str path: le fichier de ``TRACE_STREAM``.
+        """
+
+        self.closeTrace()
+
+        if mode == Chaining.TRACE_FULL:
+            self.trace = []
+        elif mode == Chaining.TRACE_OFF:
+            # Une file de taille nulle oublie chaque événement sans appel
+            # Python supplémentaire.
+            self.trace = deque(maxlen=0)
+        elif mode == Chaining.TRACE_RING:
+            self.trace = deque(maxlen=size)
+        elif mode == Chaining.TRACE_STREAM:
+            self.trace = StreamTrace(path, size)
+        else:
+            raise Exception("Mode de trace inconnu: '{}'.".format(mode))
+
+    def closeTrace(self):
+        """ Écrit les événements en attente d'une trace ``TRACE_STREAM`` et\
+            ferme son fichier. La trace reste lisible, mais un nouveau\
+            chaînage demande de choisir à nouveau un mode de trace.
+        """
+
+        if isinstance(self.trace, StreamTrace):
+            self.trace.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.closeTrace()
+
+    def addOrigin(self, term, rule):
+        """ Enregistre qu'une règle a conclu un fait.
+
+            :param term: le fait déduit, sous sa forme internée.
+            :param rule: la règle qui l'a conclu.
+        """
+
+        rules = self.origins.get(term)
+        if rules is None:
+            rules = set()
+            self.origins[term] = rules
+        rules.add(rule)
 
     def chain(self):
         """ Effectue le chaînage. 
@@ -56,6 +130,8 @@ class Chaining:
             indent = Chaining.__indentation
 
         print('Trace:')
+        if isinstance(self.trace, deque) and self.trace.maxlen == 0:
+            print('{}(désactivée)'.format(indent))
         for event in self.trace:
             print('{}{}'.format(indent, event))
 
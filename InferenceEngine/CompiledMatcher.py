@@ -0,0 +1,152 @@
+from InferenceEngine.Predicate import Atom, Predicate
+from InferenceEngine.Unificator import Unificator
+
+
+class CompiledMatcher:
+    """ Pattern match par fonctions spécialisées, compilées une fois pour\
+        chaque motif des règles.
+
+        Un motif plat (un prédicat dont les arguments sont des atomes) est\
+        compilé en une fonction qui teste le nom et l'arité du fait, compare\
+        directement les constantes à leur position et écrit les liaisons des\
+        variables dans l'environnement. Les cas qui sortent de ce cadre\
+        (motifs imbriqués, faits contenant des variables) sont délégués à\
+        l'``Unificator``.
+
+        La classe expose la même interface que ``Unificator`` et peut donc\
+        être passée comme ``method`` aux moteurs d'inférence.
+    """
+
+    failure = Unificator.failure
+
+    def __init__(self):
+        self.unificator = Unificator()
+        self.matchers = {}
+        self.builders = {}
+
+    @staticmethod
+    def isFlat(pattern):
+        return isinstance(pattern, Predicate) and \
+            all(isinstance(argument, Atom) for argument in pattern.propositions)
+
+    def compileMatcher(self, pattern):
+        """ Compile un motif en une fonction ``(fait, env) -> env``.
+
+            :param pattern: une condition de règle.
+            :return: la fonction de pattern match, ou ``None`` si le motif\
+            n'est pas plat.
+        """
+
+        if not CompiledMatcher.isFlat(pattern):
+            return None
+
+        name = pattern.name
+        arity = len(pattern.propositions)
+        constants = tuple((i, argument) for i, argument in enumerate(pattern.propositions)
+                          if not argument.isVariable)
+        variables = tuple((i, argument) for i, argument in enumerate(pattern.propositions)
+                          if argument.isVariable)
+        failure = CompiledMatcher.failure
+        unificator = self.unificator
+
+        def match(fact, env):
+            if not isinstance(fact, Predicate) or fact.name != name:
+                return failure
+
+            arguments = fact.propositions
+            if len(arguments) != arity:
+                return failure
+
+            for argument in arguments:
+                if not isinstance(argument, Atom) or argument.isVariable:
+                    return unificator.pattern_match(fact, pattern, env)
+
+            for i, constant in constants:
+                if arguments[i] != constant:
+                    return failure
+
+            env = {} if env is None else env.copy()
+            for i, variable in variables:
+                value = env.get(variable)
+                if value is None:
+                    env[variable] = arguments[i]
+                elif value != arguments[i]:
+                    return failure
+
+            return env
+
+        return match
+
+    def compileBuilder(self, pattern):
+        """ Compile un motif en une fonction ``env -> proposition`` qui\
+            l'instancie.
+
+            :param pattern: une conclusion de règle.
+            :return: la fonction d'instanciation, ou ``None`` si le motif\
+            n'est pas plat.
+        """
+
+        if not CompiledMatcher.isFlat(pattern):
+            return None
+
+        name = pattern.name
+        arguments = tuple((argument, argument.isVariable) for argument in pattern.propositions)
+
+        def build(env):
+            return Predicate([env.get(argument, argument) if isVariable else argument
+                              for argument, isVariable in arguments], name)
+
+        return build
+
+    def compileRule(self, rule):
+        """ Compile à l'avance les conditions et la conclusion d'une règle. """
+
+        for condition in rule.conditions:
+            self.matcher(condition)
+        self.builder(rule.conclusion)
+
+    def matcher(self, pattern):
+        entry = self.matchers.get(id(pattern))
+        if entry is None:
+            # Le motif est conservé pour que son identifiant reste réservé.
+            entry = (pattern, self.compileMatcher(pattern))
+            self.matchers[id(pattern)] = entry
+        return entry[1]
+
+    def builder(self, pattern):
+        entry = self.builders.get(id(pattern))
+        if entry is None:
+            entry = (pattern, self.compileBuilder(pattern))
+            self.builders[id(pattern)] = entry
+        return entry[1]
+
+    def substitute(self, pattern, env):
+        """ Effectue des substitutions de variables dans un pattern.
+
+            :param pattern: une proposition dont les variables doivent être\
+            remplacées par d'autres propositions.
+            :param dict env: un environnment.
+            :return: le pattern instancié.
+        """
+
+        build = self.builder(pattern)
+        if build is None:
+            return self.unificator.substitute(pattern, env)
+        return build(env)
+
+    def unify(self, prop1, prop2):
+        return self.unificator.unify(prop1, prop2)
+
+    def pattern_match(self, prop1, prop2, env=None):
+        """ Effectue le pattern match d'un fait sur un motif de règle.
+
+            :param prop1: un fait.
+            :param prop2: un motif pouvant contenir des variables.
+            :param dict env: l'environnement initial à prendre en compte.
+            :return: un nouvel environnment ou ``'failure'``.
+        """
+
+        match = self.matcher(prop2)
+        if match is None:
+            return self.unificator.pattern_match(prop1, prop2, env)
+        return match(prop1, env)
@@ -0,0 +1,107 @@
+from InferenceEngine.Predicate import Atom, Predicate
+from InferenceEngine.Unificator import Unificator
+
+
+class Filter:
+    """ Classe implémentant le filtrage (pattern match à sens unique) d'un\
+        fait clos par un motif.
+
+        Contrairement à l'unification, seules les variables du motif sont\
+        liées : le fait n'est jamais substitué et aucun test d'occurrence\
+        n'est nécessaire. Un fait qui contient une variable est délégué à\
+        l'``Unificator``, de sorte que le résultat est toujours celui de\
+        l'unification.
+
+        La classe expose la même interface que ``Unificator``.
+    """
+
+    failure = Unificator.failure
+
+    def __init__(self):
+        self.unificator = Unificator()
+
+    def substitute(self, pattern, env):
+        """ Effectue des substitutions de variables dans un pattern.
+
+            :param pattern: une proposition dont les variables doivent être\
+            remplacées par d'autres propositions.
+            :param dict env: un environnment, c'est-à-dire un dictionnaire de\
+            substitutions ``{variable : proposition}``.
+            :return: le pattern dont les variables ont été remplacées les\
+            propositions qui leur sont associées dans l'environnement.
+        """
+
+        if isinstance(pattern, Atom):
+            if not pattern.isVariable:
+                return pattern
+            value = env.get(pattern)
+            if value is None:
+                return pattern
+            # Les environnements du filtrage ne lient que des faits clos ;
+            # ceux de l'unification peuvent lier une variable à une autre.
+            if isinstance(value, Atom) and not value.isVariable:
+                return value
+            return self.unificator.substitute(value, env)
+
+        return Predicate([self.substitute(sub_pattern, env) for sub_pattern in pattern.propositions],
+                         pattern.name)
+
+    def unify(self, prop1, prop2):
+        """ Filtre ``prop1`` par le motif ``prop2``.
+
+            :return: un environnement ou ``failure``.
+        """
+
+        return self.pattern_match(prop1, prop2)
+
+    def pattern_match(self, prop1, prop2, env=None):
+        """ Filtre un fait par un motif en tenant compte d'un environnement\
+            initial.
+
+            :param prop1: un fait, en principe clos.
+            :param prop2: un motif pouvant contenir des variables.
+            :param dict env: l'environnement initial à prendre en compte.
+            :return: un nouvel environnment ou ``failure``.
+        """
+
+        result = {} if env is None else env.copy()
+        try:
+            if self.match(prop1, prop2, result):
+                return result
+            return Filter.failure
+        except ValueError:
+            return self.unificator.pattern_match(prop1, prop2, env)
+
+    def match(self, fact, pattern, env):
+        """ Filtre récursivement un fait par un motif, en complétant ``env``.
+
+            :return: ``True`` si le filtrage réussit.
+            :raise ValueError: si le fait, ou l'environnement, contient une\
+            variable.
+        """
+
+        if isinstance(fact, Atom) and fact.isVariable:
+            raise ValueError(fact)
+
+        if isinstance(pattern, Atom):
+            if not pattern.isVariable:
+                return isinstance(fact, Atom) and fact.name == pattern.name
+
+            value = env.get(pattern)
+            if value is None:
+                env[pattern] = fact
+                return True
+            if isinstance(value, Atom) and value.isVariable:
+                raise ValueError(value)
+            return type(value) is type(fact) and value == fact
+
+        if not isinstance(fact, Predicate) or fact.name != pattern.name:
+            return False
+        arguments = fact.propositions
+        if len(arguments) != len(pattern.propositions):
+            return False
+
+        for argument, sub_pattern in zip(arguments, pattern.propositions):
+            if not self.match(argument, sub_pattern, env):
+                return False
+        return True
@@ -1,23 +1,73 @@
+import time
+from collections import deque
+
 from InferenceEngine.Chaining import Chaining
-from InferenceEngine.Unificator import Unificator
+from InferenceEngine.Filter import Filter
+from InferenceEngine.TermIndex import TermIndex
 
 
 class ForwardChainingWithVariables(Chaining):
-    """ Un moteur d'inférence à chaînage avant avec variables. """
+    """ Un moteur d'inférence à chaînage avant avec variables.
+
+        :cvar NAIVE: chaque nouveau fait est joint à l'ensemble des solutions.
+        :cvar SEMI_NAIVE: le chaînage procède par tours, et chaque tour ne\
+        joint que les faits déduits au tour précédent (le delta) aux faits\
+        accumulés.
+    """
 
-    def __init__(self, knowledge, method=None):
+    NAIVE = 'naive'
+    SEMI_NAIVE = 'semi-naive'
+
+    def __init__(self, knowledge, method=None, mode=None, planner=None, stats=None):
         """
-            :param method: ``Filtre`` ou ``Unificateur``, détermine le type de\
-            pattern match à appliquer. ``Filtre`` par défaut.
+            :param method: ``Filter`` ou ``Unificator``, détermine le type de\
+            pattern match à appliquer. ``Filter`` par défaut : les faits\
+            sont en principe clos, et ceux qui ne le sont pas sont unifiés.
+            :param str mode: ``NAIVE`` ou ``SEMI_NAIVE``, détermine la\
+            stratégie d'évaluation. ``NAIVE`` par défaut.
+            :param planner: un ``JoinPlanner`` qui choisit l'ordre d'évaluation\
+            des conditions de chaque règle. Sans planificateur, les conditions\
+            sont évaluées dans l'ordre de leur déclaration.
+            :param stats: un objet ``Statistics`` à remplir pendant le\
+            chaînage. Sans lui, aucun compteur n'est tenu.
         """
 
         Chaining.__init__(self, knowledge)
 
         if method is None:
-            self.method = Unificator()
+            self.method = Filter()
         else:
             self.method = method
 
+        if mode is None:
+            self.mode = ForwardChainingWithVariables.NAIVE
+        else:
+            self.mode = mode
+
+        self.planner = planner
+        self.stats = stats
+
+    def reset(self):
+        """ Réinitialise le moteur, le cache de son planificateur et ses\
+            statistiques.
+        """
+
+        Chaining.reset(self)
+        if self.planner is not None:
+            self.planner.reset()
+        if self.stats is not None:
+            self.stats.reset()
+
+    def plan(self, rule, trigger):
+        """ Retourne l'ordre d'évaluation des conditions d'une règle\
+            déclenchée par sa condition d'indice ``trigger``, ou ``None`` pour\
+            l'ordre de déclaration.
+        """
+
+        if self.planner is None:
+            return None
+        return self.planner.plan(rule, trigger, self.knowledge)
+
     def instanciateConclusion(self, regle, envs):
         """ Instancie la conclusion d'une règle pour tous les environnements.
 
@@ -33,37 +83,233 @@ class ForwardChainingWithVariables(Chaining):
         """ Effectue le chaînage avant sur les faits et les règles contenus\
             dans la base de connaissances.
         """
+        if self.mode == ForwardChainingWithVariables.SEMI_NAIVE:
+            return self.chainSemiNaive()
+
         queue = self.knowledge.facts[:]
         self.reset()
+        index = TermIndex()
+        terms = self.knowledge.terms
+        builtins = self.knowledge.builtins
+        known = set()
 
         while len(queue) > 0:
             fact = queue.pop(0)
+            term = terms.intern(fact)
 
-            if fact not in self.solutions:
+            if term not in known:
+                known.add(term)
                 self.trace.append(fact)
                 self.solutions.append(fact)
+                index.add(fact)
 
                 # Vérifie si des règles sont déclenchées par le nouveau fait.
                 for rule in self.knowledge.rules:
-                    cond_envs = rule.dependsOf(fact, self.method)
+                    stats = None
+                    if self.stats is not None:
+                        stats = self.stats.of(rule)
+                        start = time.perf_counter()
+
+                    cond_envs = rule.dependsOf(fact, self.method, builtins)
+                    if stats is not None:
+                        self.countTrigger(rule, stats, cond_envs)
+
                     for cond, env in cond_envs.items():
                         # Remplace l'environnement par ceux qui satisfont
                         # toutes les conditions de la règle et pas seulement la 
                         # première condition.
-                        envs = rule.satisfiedBy(self.solutions, cond, env, self.method)
+                        order = self.plan(rule, rule.conditions.index(cond))
+                        envs = rule.satisfiedBy(index, cond, env, self.method, order, builtins, stats)
 
                         # Ajoute la conclusion de la règle instanciée pour tous 
                         # les environnements possibles.
-                        if len(envs) > 0:
-                            env1, urlDict = envs
-                            for env in env1:
-                                urls = urlDict[frozenset(env.items())]
-                                pr = self.instanciateConclusion(rule, [env]).copy()
-                                for p in pr:
-                                    p.addUrls(set(urls))
-                                queue.extend(pr)
-
-                                queue.extend(pr)
-                                self.trace.append(rule)
+                        for env1, urls in envs:
+                            pr = self.instanciateConclusion(rule, [env1])
+                            for p in pr:
+                                p.addUrls(urls)
+                                term = terms.intern(p)
+                                if stats is not None:
+                                    self.countConclusion(stats, term, known)
+                                self.addOrigin(term, rule)
+                            queue.extend(pr)
+                            self.trace.append(rule)
+
+                    if stats is not None:
+                        stats.time += time.perf_counter() - start
+
+        return self.solutions
+
+    def chainSemiNaive(self):
+        """ Effectue le chaînage avant par évaluation semi-naïve (voir\
+            ``stream``).
+        """
 
+        for _ in self.stream(solutions=True):
+            pass
         return self.solutions
+
+    def stream(self, ruleLimit=None, nameLimits=None, solutions=False):
+        """ Effectue le chaînage avant par évaluation semi-naïve, quel que\
+            soit le mode du moteur, en produisant les conclusions au fur et à\
+            mesure de leur déduction.
+
+            À chaque tour, une condition est satisfaite par un fait du delta,\
+            les conditions qui la précèdent par les faits des tours\
+            précédents, et celles qui la suivent par tous les faits connus au\
+            début du tour. Une même jointure n'est ainsi jamais refaite.
+
+            Une conclusion est produite une fois pour chaque règle qui la\
+            conclut, comme elle est enregistrée dans ``self.origins``. Les\
+            conclusions qui dépassent une limite ne sont ni produites ni\
+            utilisées par les autres règles, et une règle qui a atteint sa\
+            limite n'est plus évaluée : le chaînage s'arrête dès que toutes\
+            les règles sont épuisées. Un fait de départ conclu par une règle\
+            n'est pas produit et ne compte dans aucune limite ; seule son\
+            origine est enregistrée.
+
+            :param int ruleLimit: le nombre maximal de conclusions produites\
+            par chaque règle.
+            :param dict nameLimits: le nombre maximal de conclusions\
+            distinctes de chaque nom de prédicat, ``{nom : limite}``.
+            :param bool solutions: remplit aussi ``self.solutions`` et la\
+            trace, faits de départ compris, comme ``chain``.
+            :return: un générateur de couples ``(conclusion, règle)``.
+        """
+        self.reset()
+        terms = self.knowledge.terms
+        builtins = self.knowledge.builtins
+        if nameLimits is None:
+            nameLimits = {}
+        known = {}
+        delta = deque()
+        index = TermIndex()
+
+        for fact in self.knowledge.facts:
+            term = terms.intern(fact)
+            if term not in known:
+                known[term] = fact
+                if solutions:
+                    self.trace.append(fact)
+                    self.solutions.append(fact)
+                delta.append(fact)
+        inputs = set(known)
+
+        # Les règles épuisées, et le nombre de conclusions produites par règle
+        # et par nom.
+        exhausted = set(rule for rule in self.knowledge.rules
+                        if ruleLimit == 0 or nameLimits.get(rule.conclusion.name) == 0)
+        ruleCounts = {}
+        nameCounts = {}
+
+        while len(delta) > 0:
+            if len(exhausted) == len(self.knowledge.rules):
+                return
+
+            # L'index ne contient que les faits connus au début du tour.
+            for fact in delta:
+                index.add(fact)
+            recent = set(delta)
+            delta_suivant = deque()
+
+            while len(delta) > 0:
+                fact = delta.popleft()
+
+                for rule in self.knowledge.rules:
+                    if rule in exhausted:
+                        continue
+
+                    stats = None
+                    if self.stats is not None:
+                        stats = self.stats.of(rule)
+                        stats.dependsOfCalls += 1
+                        start = time.perf_counter()
+
+                    for i, cond in enumerate(rule.conditions):
+                        if rule in exhausted:
+                            break
+                        if builtins.isBuiltin(cond):
+                            continue
+
+                        env = self.method.pattern_match(fact, cond, {})
+                        if stats is not None:
+                            stats.conditions[i].attempts += 1
+                        if env == self.method.failure:
+                            continue
+                        if stats is not None:
+                            stats.conditions[i].successes += 1
+                            stats.joins += 1
+
+                        def sources(j, condition, env1, i=i):
+                            candidates = index.candidates(condition, env1)
+                            if j < i:
+                                return [fact1 for fact1 in candidates if fact1 not in recent]
+                            return candidates
+
+                        order = self.plan(rule, i)
+                        partials = rule.join(sources, env, fact.urls, self.method, skip=i, order=order,
+                                             builtins=builtins, stats=stats)
+                        for env1, urls in partials:
+                            if rule in exhausted:
+                                break
+
+                            conclusion = self.method.substitute(rule.conclusion, env1)
+                            self.trace.append(rule)
+
+                            term = terms.intern(conclusion)
+                            if stats is not None:
+                                self.countConclusion(stats, term, known)
+                            if rule in self.origins.get(term, ()):
+                                continue
+                            if term in inputs:
+                                self.addOrigin(term, rule)
+                                continue
+
+                            name = conclusion.name
+                            if term not in known:
+                                if name in nameLimits:
+                                    if nameCounts.get(name, 0) == nameLimits[name]:
+                                        continue
+                                    nameCounts[name] = nameCounts.get(name, 0) + 1
+                                conclusion.addUrls(urls)
+                                known[term] = conclusion
+                                self.trace.append(conclusion)
+                                if solutions:
+                                    self.solutions.append(conclusion)
+                                delta_suivant.append(conclusion)
+
+                            self.addOrigin(term, rule)
+                            ruleCounts[rule] = ruleCounts.get(rule, 0) + 1
+                            if ruleCounts[rule] == ruleLimit:
+                                exhausted.add(rule)
+                            if name in nameLimits and nameCounts.get(name, 0) == nameLimits[name]:
+                                exhausted.update(other for other in self.knowledge.rules
+                                                 if other.conclusion.name == name)
+                            yield known[term], rule
+
+                    if stats is not None:
+                        stats.time += time.perf_counter() - start
+
+            delta = delta_suivant
+
+    def countTrigger(self, rule, stats, cond_envs):
+        """ Compte un appel à ``dependsOf`` et les pattern match qu'il a\
+            tentés.
+        """
+
+        builtins = self.knowledge.builtins
+        stats.dependsOfCalls += 1
+        stats.joins += len(cond_envs)
+        for i, condition in enumerate(rule.conditions):
+            if not builtins.isBuiltin(condition):
+                stats.conditions[i].attempts += 1
+                if condition in cond_envs:
+                    stats.conditions[i].successes += 1
+
+    def countConclusion(self, stats, term, known):
+        """ Compte une conclusion, et un doublon si elle était déjà connue ou\
+            déjà déduite.
+        """
+
+        stats.conclusions += 1
+        if term in known or term in self.origins:
+            stats.duplicates += 1
@@ -0,0 +1,255 @@
+from collections import deque
+
+from InferenceEngine.ForwardChainingWithVariables import ForwardChainingWithVariables
+from InferenceEngine.Provenance import EMPTY
+from InferenceEngine.TermIndex import TermIndex
+
+
+class IncrementalChaining(ForwardChainingWithVariables):
+    """ Un moteur d'inférence à chaînage avant incrémental, avec maintien de\
+        la vérité.
+
+        Les faits déduits sont conservés d'un appel à l'autre avec leurs\
+        justifications, c'est-à-dire la règle et les faits qui ont permis de\
+        les conclure. L'ajout de faits ne déclenche que les jointures\
+        auxquelles ils participent ; le retrait de faits ne retire que les\
+        conclusions qui n'ont plus aucune justification.
+
+        Les urls d'un fait affirmé sont celles de ses affirmations ; celles\
+        d'un fait déduit sont l'union des urls des faits de toutes ses\
+        justifications.
+
+        Un fait qui ne se justifie que par lui-même, à travers des règles\
+        récursives, n'est pas retiré : les règles doivent être stratifiées.
+    """
+
+    def __init__(self, knowledge, method=None, planner=None):
+        """
+            :param method: ``Filter`` ou ``Unificator``, détermine le type de\
+            pattern match à appliquer. ``Filter`` par défaut.
+            :param planner: un ``JoinPlanner`` qui choisit l'ordre d'évaluation\
+            des conditions de chaque règle.
+        """
+
+        ForwardChainingWithVariables.__init__(self, knowledge, method=method, planner=planner)
+        self.clear()
+
+    def clear(self):
+        """ Oublie tous les faits, affirmés et déduits. """
+
+        self.reset()
+        self.facts = {}
+        self.asserted = {}
+        self.justifications = {}
+        self.dependents = {}
+        self.index = TermIndex()
+
+    def plan(self, rule, trigger):
+        if self.planner is None:
+            return None
+        return self.planner.plan(rule, trigger, self.knowledge, self.index)
+
+    def chain(self):
+        """ Recalcule toutes les conclusions à partir des faits de la base de\
+            connaissances.
+        """
+
+        self.clear()
+        self.add(self.knowledge.facts)
+        self.solutions = list(self.facts.values())
+        return self.solutions
+
+    def store(self, term, fact):
+        self.facts[term] = fact
+        self.index.add(fact)
+        self.trace.append(fact)
+
+    def add(self, facts):
+        """ Affirme des faits et en déduit les nouvelles conclusions.
+
+            :param list facts: les faits à affirmer.
+            :return: la liste des faits nouvellement déduits.
+        """
+
+        terms = self.knowledge.terms
+        delta = deque()
+        refresh = []
+
+        for fact in facts:
+            term = terms.intern(fact)
+            self.asserted[term] = self.asserted.get(term, EMPTY) | fact.urls
+
+            if term in self.facts:
+                refresh.append(term)
+            else:
+                self.store(term, fact)
+                delta.append(fact)
+
+        added = self.propagate(delta, refresh)
+        self.refresh(refresh)
+        return added
+
+    def propagate(self, delta, refresh):
+        """ Déduit les conséquences de nouveaux faits, déjà indexés.
+
+            :param delta: les nouveaux faits.
+            :param list refresh: reçoit les faits existants qui ont gagné une\
+            justification.
+            :return: la liste des faits nouvellement déduits.
+        """
+
+        builtins = self.knowledge.builtins
+        added = []
+
+        def sources(j, condition, env):
+            return self.index.candidates(condition, env)
+
+        while len(delta) > 0:
+            delta_suivant = deque()
+
+            for fact in delta:
+                for rule in self.knowledge.rules:
+                    for i, cond in enumerate(rule.conditions):
+                        if builtins.isBuiltin(cond):
+                            continue
+
+                        env = self.method.pattern_match(fact, cond, {})
+                        if env == self.method.failure:
+                            continue
+
+                        order = self.plan(rule, i)
+                        partials = rule.join(sources, env, fact.urls, self.method, skip=i, order=order,
+                                             builtins=builtins)
+                        for env1, urls in partials:
+                            conclusion = self.justify(rule, env1, urls, refresh)
+                            if conclusion is not None:
+                                added.append(conclusion)
+                                delta_suivant.append(conclusion)
+
+            delta = delta_suivant
+
+        return added
+
+    def justify(self, rule, env, urls, refresh):
+        """ Enregistre une justification de la conclusion d'une règle.
+
+            :return: la conclusion si elle est nouvelle, ``None`` sinon.
+        """
+
+        terms = self.knowledge.terms
+        builtins = self.knowledge.builtins
+        antecedents = tuple(terms.intern(self.method.substitute(condition, env))
+                            for condition in rule.conditions if not builtins.isBuiltin(condition))
+        conclusion = self.method.substitute(rule.conclusion, env)
+        term = terms.intern(conclusion)
+
+        justification = (rule, antecedents)
+        justifications = self.justifications.setdefault(term, set())
+        if justification in justifications:
+            return None
+
+        justifications.add(justification)
+        for antecedent in antecedents:
+            self.dependents.setdefault(antecedent, set()).add((term, rule, antecedents))
+        self.addOrigin(term, rule)
+        self.trace.append(rule)
+
+        if term in self.facts:
+            refresh.append(term)
+            return None
+
+        conclusion.urls = urls
+        self.store(term, conclusion)
+        return conclusion
+
+    def remove(self, facts):
+        """ Retire des affirmations et les conclusions qui en dépendent.
+
+            Un fait affirmé avec des urls n'est retiré que lorsque toutes ses\
+            urls l'ont été.
+
+            :param list facts: les faits à retirer.
+            :return: la liste des faits déduits qui ont été retirés.
+        """
+
+        terms = self.knowledge.terms
+        queue = deque()
+        retracted = set()
+        refresh = []
+
+        for fact in facts:
+            term = terms.intern(fact)
+            urls = self.asserted.get(term)
+            if urls is None:
+                continue
+
+            urls = urls - fact.urls
+            if not urls or not fact.urls:
+                del self.asserted[term]
+                retracted.add(term)
+                queue.append(term)
+            else:
+                self.asserted[term] = urls
+                refresh.append(term)
+
+        removed = []
+        while len(queue) > 0:
+            term = queue.popleft()
+            if term not in self.facts:
+                continue
+            if term in self.asserted or len(self.justifications.get(term, ())) > 0:
+                refresh.append(term)
+                continue
+
+            fact = self.facts.pop(term)
+            self.index.remove(fact)
+            self.justifications.pop(term, None)
+            self.origins.pop(term, None)
+            if term not in retracted:
+                removed.append(fact)
+
+            for conclusion, rule, antecedents in self.dependents.pop(term, ()):
+                justifications = self.justifications.get(conclusion)
+                if justifications is not None:
+                    justifications.discard((rule, antecedents))
+                    self.origins[conclusion] = set(other for other, _ in justifications)
+                for antecedent in antecedents:
+                    if antecedent is not term and antecedent in self.dependents:
+                        self.dependents[antecedent].discard((conclusion, rule, antecedents))
+                queue.append(conclusion)
+
+        self.refresh(refresh)
+        return removed
+
+    def support(self, term):
+        """ Calcule les urls d'un fait à partir de ses affirmations ou de ses\
+            justifications.
+        """
+
+        urls = self.asserted.get(term)
+        if urls is not None:
+            return urls
+
+        urls = EMPTY
+        for rule, antecedents in self.justifications.get(term, ()):
+            for antecedent in antecedents:
+                urls |= self.facts[antecedent].urls
+        return urls
+
+    def refresh(self, terms):
+        """ Met à jour les urls de faits dont le support a changé, puis celles\
+            des faits qui en dépendent.
+        """
+
+        queue = deque(terms)
+        while len(queue) > 0:
+            term = queue.popleft()
+            fact = self.facts.get(term)
+            if fact is None:
+                continue
+
+            urls = self.support(term)
+            if urls != fact.urls:
+                fact.urls = urls
+                for conclusion, rule, antecedents in self.dependents.get(term, ()):
+                    queue.append(conclusion)
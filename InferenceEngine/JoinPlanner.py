@@ -0,0 +1,100 @@
+from InferenceEngine.Predicate import Predicate, variables
+from InferenceEngine.TermIndex import TermIndex
+
+
+class JoinPlanner:
+    """ Choisit l'ordre d'évaluation des conditions d'une règle.
+
+        Pour chaque règle et chaque condition déclenchante, le planificateur\
+        évalue d'abord la condition déclenchante, puis, de manière gloutonne,\
+        la condition restante dont le nombre estimé de faits candidats est le\
+        plus faible compte tenu des variables déjà liées. Les estimations\
+        reposent sur les statistiques de l'index de la base de connaissances :\
+        nombre de faits par prédicat et nombre de valeurs distinctes par\
+        position.
+
+        Les plans sont mis en cache : une règle n'est planifiée qu'une fois\
+        par condition déclenchante.
+    """
+
+    def __init__(self):
+        self.plans = {}
+
+    def reset(self):
+        """ Vide le cache des plans. """
+
+        self.plans = {}
+
+    def plan(self, rule, trigger, knowledge, index=None):
+        """ Retourne l'ordre d'évaluation des conditions d'une règle.
+
+            :param rule: la règle à planifier.
+            :param int trigger: l'indice de la condition déclenchante, ou\
+            ``None`` si aucune condition n'est encore satisfaite.
+            :param knowledge: la base de connaissances qui fournit les\
+            statistiques.
+            :param index: le ``TermIndex`` qui fournit les statistiques, à la\
+            place de celui de la base de connaissances.
+            :return: la liste des indices des conditions, la condition\
+            déclenchante en tête.
+        """
+
+        key = (id(rule), trigger)
+        entry = self.plans.get(key)
+        if entry is None:
+            # La règle est conservée pour que son identifiant reste réservé.
+            entry = (rule, self.computePlan(rule, trigger, knowledge, index))
+            self.plans[key] = entry
+        return entry[1]
+
+    def computePlan(self, rule, trigger, knowledge, index=None):
+        if index is None:
+            index = knowledge.index
+        derived = set(TermIndex.shape(other.conclusion) for other in knowledge.rules)
+        remaining = list(range(len(rule.conditions)))
+        bound = set()
+        order = []
+
+        # Les gardes ne lient aucune variable : elles sont placées en fin de
+        # plan, puis avancées au plus tôt par ``RuleWithVariable.schedule``.
+        guards = [i for i in remaining if knowledge.builtins.isBuiltin(rule.conditions[i])]
+        remaining = [i for i in remaining if i not in guards]
+
+        if trigger is not None:
+            remaining.remove(trigger)
+            order.append(trigger)
+            bound.update(variables(rule.conditions[trigger]))
+
+        while len(remaining) > 0:
+            best = min(remaining,
+                       key=lambda i: self.estimate(rule.conditions[i], bound, index, derived))
+            remaining.remove(best)
+            order.append(best)
+            bound.update(variables(rule.conditions[best]))
+
+        return order + [guard for guard in guards if guard != trigger]
+
+    @staticmethod
+    def estimate(condition, bound, index, derived):
+        """ Estime le nombre de faits qui satisfont une condition.
+
+            Les positions liées sont supposées indépendantes. Les prédicats\
+            déduits par des règles n'ont pas de statistiques fiables : leur\
+            estimation est le nombre total de faits.
+
+            :param condition: une condition de règle.
+            :param set bound: les variables déjà liées.
+            :param index: le ``TermIndex`` des faits de la base.
+            :param set derived: les formes ``(nom, arité)`` des conclusions.
+            :return: le nombre estimé de faits candidats.
+        """
+
+        shape = TermIndex.shape(condition)
+        if shape in derived or not isinstance(condition, Predicate):
+            return float(len(index))
+
+        estimate = float(index.count(shape))
+        for position, argument in enumerate(condition.propositions):
+            if not argument.getIsVariable() or argument in bound:
+                estimate /= max(index.distinct(shape, position), 1)
+        return estimate
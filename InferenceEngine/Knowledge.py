@@ -1,3 +1,9 @@
+from InferenceEngine.Builtins import Builtins
+from InferenceEngine.RuleParser import parseRules
+from InferenceEngine.TermIndex import TermIndex
+from InferenceEngine.TermTable import table
+
+
 class KnowledgeBase:
     """ Une base de connaissances destinée à contenir les faits et les\ 
         règles d'un système de chaînage avant.
@@ -14,36 +20,74 @@ class KnowledgeBase:
         """
 
         self.facts = []
+        self.terms = table
+        self.entries = {}
+        self.index = TermIndex()
         self.rules = []
+        self.builtins = Builtins()
         self.builderOfRule = builderOfRule
 
     def addFact(self, fait):
         """ Ajoute un fait dans la base de connaissances. 
 
+            Si un fait égal est déjà présent, les urls du nouveau fait sont\
+            fusionnées dans celles du fait existant. Les faits sont identifiés\
+            par leur terme dans ``self.terms``.
+
             :param fait: un fait.
         """
 
-        self.facts.append(fait)
+        term = self.terms.intern(fait)
+        entry = self.entries.get(term)
+        if entry is None:
+            self.entries[term] = fait
+            self.facts.append(fait)
+            self.index.add(fait)
+        else:
+            entry.addUrls(fait.urls)
 
     def addFacts(self, faits):
         """ Ajoute une liste de faits dans la base de connaissances.
 
             :param list faits: une liste de faits.
         """
-        self.facts.extend(faits)
 
-        for i in range(len(self.facts)):
-            for j in range(i + 1, len(self.facts)):
-                if i < len(self.facts) and j < len(self.facts):
-                    fact1 = self.facts.__getitem__(i)
-                    fact2 = self.facts.__getitem__(j)
-                    if fact1.__eq__(fact2):
-                        self.facts.remove(fact1)
-                        self.facts.remove(fact2)
-                        fact1.addUrls(fact2.urls)
-                        self.facts.append(fact1)
+        for fait in faits:
+            self.addFact(fait)
+
+    def candidates(self, condition, env=None):
+        """ Retourne les faits de la base susceptibles de satisfaire une\
+            condition sous un environnement donné.
+
+            :param condition: une proposition pouvant contenir des variables.
+            :param dict env: les substitutions déjà établies.
+            :return: une liste de faits candidats.
+        """
+
+        return self.index.candidates(condition, env)
 
+    def addBuiltin(self, name, function):
+        """ Ajoute un prédicat évaluable dans la base de connaissances.
 
+            Les conditions de ce nom ne sont plus satisfaites par des faits\
+            mais par l'évaluation de la fonction, une fois leurs variables\
+            liées.
+
+            :param str name: le nom du prédicat.
+            :param function: une fonction qui reçoit les arguments (atomes)\
+            du prédicat et retourne un booléen.
+        """
+
+        self.builtins.add(name, function)
+
+    def addBuiltins(self, functions):
+        """ Ajoute des prédicats évaluables dans la base de connaissances.
+
+            :param dict functions: un dictionnaire ``{nom : fonction}``.
+        """
+
+        for name, function in functions.items():
+            self.addBuiltin(name, function)
 
     def addRule(self, description):
         """ Ajoute une règle dans la base de connaissances étant donné sa\
@@ -64,10 +108,16 @@ class KnowledgeBase:
         """ Ajoute des règles dans la base de connaissances.
 
             L'argument est une liste de descriptions, chacune composée d'une\
-            liste de conditions et d'une conséquence.
+            liste de conditions et d'une conséquence, ou le texte des règles\
+            (voir ``RuleParser``). Un texte est lu avec les prédicats\
+            évaluables déjà enregistrés.
 
-            :param list descriptions: une liste de descriptions de règles.
+            :param descriptions: une liste de descriptions de règles ou un\
+            texte.
         """
 
+        if isinstance(descriptions, str):
+            descriptions = parseRules(descriptions, self.builtins)
+
         for description in descriptions:
             self.addRule(description)
@@ -3,8 +3,19 @@
 """
 from abc import ABCMeta, abstractmethod
 
+from InferenceEngine.Provenance import provenance, registry
+
 
 class Proposition(metaclass=ABCMeta):
+    __slots__ = ()
+
+    def getUrls(self):
+        """ Retourne l'ensemble des urls des pages dont provient la\
+            proposition.
+        """
+
+        return registry.decode(self.urls)
+
     @abstractmethod
     def atom(self):
         pass
@@ -39,13 +50,33 @@ class Proposition(metaclass=ABCMeta):
 
 
 class Atom(Proposition):
+    __slots__ = ('name', 'isVariable', 'urls', 'value', 'term')
+
     def addUrls(self, urls):
-        self.urls |= urls
+        self.urls |= provenance(urls)
+
+    def __init__(self, name, isVariable, urls=(), value=None):
+        """
+            :param urls: la provenance de l'atome, sous la forme d'une\
+            ``PageSet`` (voir ``Provenance``) ou d'un ensemble d'urls.
+            :param value: l'objet représenté par l'atome (une date, un lieu...),\
+            mis à disposition des prédicats évaluables. Il n'intervient pas\
+            dans l'égalité des atomes.
+        """
 
-    def __init__(self, name, isVariable, urls=set()):
         self.name = name
         self.isVariable = isVariable
-        self.urls = urls
+        self.urls = provenance(urls)
+        self.value = value
+        self.term = None
+
+    def __getstate__(self):
+        # Le terme n'a de sens que dans la table du processus qui l'a créé.
+        return self.name, self.isVariable, self.urls, self.value
+
+    def __setstate__(self, state):
+        self.name, self.isVariable, self.urls, self.value = state
+        self.term = None
 
     def atom(self):
         return self
@@ -76,13 +107,33 @@ class Atom(Proposition):
 
 
 class Predicate(Proposition):
-    def __init__(self, propositions, name='', urls=set()):
-        self.propositions = propositions
+    """ Un prédicat nommé. Ses arguments sont stockés dans un tuple de taille\
+        fixe et parcourus par indice ; ``head`` et ``tail`` restent\
+        disponibles mais allouent une nouvelle proposition à chaque appel.
+
+        La provenance ``urls`` est une ``PageSet``, l'ensemble des\
+        identifiants de ses pages (voir ``Provenance``). Un ensemble d'urls\
+        passé au constructeur est converti.
+    """
+
+    __slots__ = ('propositions', 'name', 'urls', 'term')
+
+    def __init__(self, propositions, name='', urls=()):
+        self.propositions = () if propositions is None else tuple(propositions)
         self.name = name
-        self.urls = urls
+        self.urls = provenance(urls)
+        # Le terme attribué par une ``TermTable`` (voir ``TermTable.intern``).
+        self.term = None
+
+    def __getstate__(self):
+        return self.propositions, self.name, self.urls
+
+    def __setstate__(self, state):
+        self.propositions, self.name, self.urls = state
+        self.term = None
 
     def addUrls(self, urls):
-        self.urls |= urls
+        self.urls |= provenance(urls)
 
     def atom(self):
         if self.getIsAtomic():
@@ -131,10 +182,8 @@ class Predicate(Proposition):
         return variables
 
     def add(self, proposition):
-        if self.propositions is None:
-            self.propositions = [proposition]
-        else:
-            self.propositions.append(proposition)
+        self.propositions = self.propositions + (proposition,)
+        self.term = None
 
     def __len__(self):
         return len(self.propositions)
@@ -146,7 +195,7 @@ class Predicate(Proposition):
         return self.propositions == other.propositions and self.name == other.name
 
     def __hash__(self):
-        return hash(frozenset(self.propositions))
+        return hash((self.name, self.propositions))
 
     def __str__(self):
         res = self.name + '('
@@ -159,3 +208,22 @@ class Predicate(Proposition):
 
     def __contains__(self, item):
         return set(item.propositions) < set(self.propositions)
+
+
+def variables(proposition):
+    """ Retourne la liste des variables d'une proposition, dans l'ordre de\
+        leur première apparition.
+
+        :param proposition: une proposition pouvant contenir des variables.
+        :return: une liste de variables sans doublons.
+    """
+
+    if not isinstance(proposition, Predicate):
+        return [proposition] if proposition.getIsVariable() else []
+
+    result = []
+    for sub_proposition in proposition.propositions:
+        for variable in variables(sub_proposition):
+            if variable not in result:
+                result.append(variable)
+    return result
@@ -0,0 +1,133 @@
+class PageSet:
+    """ Une provenance : l'ensemble des identifiants des pages d'un fait.
+
+        Les identifiants sont conservés dans un tuple trié ; une provenance\
+        ne coûte donc que ses propres pages, quel que soit le nombre de pages\
+        enregistrées. Les provenances sont immuables : ``|`` retourne l'une\
+        de ses opérandes lorsqu'elle contient déjà l'autre, et les\
+        provenances d'une seule page sont partagées par le registre.
+    """
+
+    __slots__ = ('ids',)
+
+    def __init__(self, ids=()):
+        """
+            :param tuple ids: des identifiants triés et sans doublons.
+        """
+
+        self.ids = ids
+
+    def __or__(self, other):
+        if other is self or not other.ids:
+            return self
+        if not self.ids:
+            return other
+        ids = set(self.ids)
+        ids.update(other.ids)
+        if len(ids) == len(self.ids):
+            return self
+        if len(ids) == len(other.ids):
+            return other
+        return PageSet(tuple(sorted(ids)))
+
+    def __and__(self, other):
+        return PageSet(tuple(sorted(set(self.ids).intersection(other.ids))))
+
+    def __sub__(self, other):
+        return PageSet(tuple(sorted(set(self.ids).difference(other.ids))))
+
+    def __bool__(self):
+        return len(self.ids) > 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __eq__(self, other):
+        return isinstance(other, PageSet) and self.ids == other.ids
+
+    def __hash__(self):
+        return hash(self.ids)
+
+    def __repr__(self):
+        return 'PageSet({})'.format(self.ids)
+
+
+# La provenance vide, partagée par tous les faits sans url.
+EMPTY = PageSet()
+
+
+class Provenance:
+    """ Un registre qui attribue un identifiant entier à chaque page.
+
+        La provenance d'un fait est une ``PageSet``, l'ensemble des\
+        identifiants de ses pages. L'union de deux provenances est un simple\
+        ``|`` ; les urls ne sont retrouvées qu'à l'affichage, par ``decode``.
+    """
+
+    def __init__(self):
+        self.urls = []
+        self.ids = {}
+        self.singles = []
+
+    def id(self, url):
+        """ Retourne l'identifiant d'une page, en l'enregistrant au besoin. """
+
+        identifier = self.ids.get(url)
+        if identifier is None:
+            identifier = len(self.urls)
+            self.ids[url] = identifier
+            self.urls.append(url)
+            self.singles.append(PageSet((identifier,)))
+        return identifier
+
+    def pages(self, ids):
+        """ Retourne la provenance d'identifiants de pages déjà enregistrées.
+
+            :param ids: des identifiants, dans un ordre quelconque.
+            :return: une ``PageSet``.
+        """
+
+        ids = set(ids)
+        if len(ids) == 0:
+            return EMPTY
+        if len(ids) == 1:
+            return self.singles[ids.pop()]
+        return PageSet(tuple(sorted(ids)))
+
+    def encode(self, urls):
+        """ Retourne la provenance d'un ensemble d'urls.
+
+            :param urls: des urls.
+            :return: une ``PageSet``, l'ensemble des identifiants de ces pages.
+        """
+
+        return self.pages(self.id(url) for url in urls)
+
+    def decode(self, pages):
+        """ Retourne l'ensemble des urls d'une provenance.
+
+            :param PageSet pages: une provenance.
+            :return: un ``set`` d'urls.
+        """
+
+        return set(self.urls[identifier] for identifier in pages.ids)
+
+    def __len__(self):
+        return len(self.urls)
+
+
+# Le registre partagé par tous les faits d'un processus.
+registry = Provenance()
+
+
+def provenance(urls):
+    """ Convertit des urls en provenance ; une provenance est retournée telle\
+        quelle.
+    """
+
+    if isinstance(urls, PageSet):
+        return urls
+    return registry.encode(urls)
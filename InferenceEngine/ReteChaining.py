@@ -0,0 +1,272 @@
+from collections import deque
+
+from InferenceEngine.Chaining import Chaining
+from InferenceEngine.Filter import Filter
+from InferenceEngine.Predicate import variables
+from InferenceEngine.Provenance import EMPTY
+
+
+class AlphaMemory:
+    """ Mémoire alpha : contient les faits qui satisfont un motif de\
+        condition, accompagnés de l'environnement obtenu par le pattern match.
+
+        Une même mémoire alpha est partagée par toutes les règles qui\
+        contiennent le même motif.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.items = []
+        self.successors = []
+
+    def activate(self, fact, env, activations):
+        """ Ajoute un fait à la mémoire et le propage aux noeuds de jointure.
+
+            :param fact: le fait qui satisfait le motif.
+            :param dict env: l'environnement obtenu par le pattern match.
+            :param list activations: la liste qui reçoit les règles\
+            déclenchées.
+        """
+
+        self.items.append((fact, env))
+        for join in self.successors:
+            join.rightActivate(fact, env, activations)
+
+
+class BetaMemory:
+    """ Mémoire beta : contient les jointures partielles (jetons) d'un\
+        préfixe de conditions.
+
+        Un jeton est un couple ``(environnement, urls)``. Les règles dont les\
+        conditions se terminent sur cette mémoire y sont attachées.
+    """
+
+    def __init__(self):
+        self.tokens = []
+        self.children = {}
+        self.productions = []
+
+    def addToken(self, token, activations):
+        """ Ajoute un jeton et le propage aux noeuds de jointure fils.
+
+            :param tuple token: un couple ``(environnement, urls)``.
+            :param list activations: la liste qui reçoit les règles\
+            déclenchées.
+        """
+
+        self.tokens.append(token)
+        for join in self.children.values():
+            join.leftActivate(token, activations)
+
+        env, urls = token
+        for rule in self.productions:
+            activations.append((rule, env, urls))
+
+
+class JoinNode:
+    """ Noeud de jointure entre une mémoire beta (à gauche) et une mémoire\
+        alpha (à droite).
+
+        Les jetons et les faits sont indexés par les valeurs des variables\
+        communes, de sorte qu'une activation ne parcourt que les éléments\
+        compatibles.
+    """
+
+    def __init__(self, parent, alpha, bound):
+        """
+            :param parent: la mémoire beta du préfixe de conditions.
+            :param alpha: la mémoire alpha de la condition jointe.
+            :param set bound: les variables liées par le préfixe.
+        """
+
+        self.parent = parent
+        self.alpha = alpha
+        self.memory = BetaMemory()
+        self.keys = [variable for variable in variables(alpha.pattern) if variable in bound]
+        self.leftIndex = {}
+        self.rightIndex = {}
+
+    def leftActivate(self, token, activations):
+        env, urls = token
+        key = tuple(env[variable] for variable in self.keys)
+        self.leftIndex.setdefault(key, []).append(token)
+
+        for fact, fact_env in self.rightIndex.get(key, ()):
+            self.emit(env, urls, fact, fact_env, activations)
+
+    def rightActivate(self, fact, fact_env, activations):
+        key = tuple(fact_env[variable] for variable in self.keys)
+        self.rightIndex.setdefault(key, []).append((fact, fact_env))
+
+        for env, urls in self.leftIndex.get(key, ()):
+            self.emit(env, urls, fact, fact_env, activations)
+
+    def emit(self, env, urls, fact, fact_env, activations):
+        # Les variables communes sont égales par construction de la clé, la
+        # jointure se résume donc à l'union des deux environnements.
+        new_env = env.copy()
+        new_env.update(fact_env)
+        self.memory.addToken((new_env, urls | fact.urls), activations)
+
+
+class FilterNode:
+    """ Noeud de filtrage : ne laisse passer que les jetons qui satisfont\
+        une garde (un prédicat évaluable).
+
+        La garde est placée dès que toutes ses variables sont liées par le\
+        préfixe de conditions.
+    """
+
+    def __init__(self, parent, condition, builtins):
+        """
+            :param parent: la mémoire beta du préfixe de conditions.
+            :param condition: la garde à évaluer.
+            :param builtins: le registre des prédicats évaluables.
+        """
+
+        self.parent = parent
+        self.condition = condition
+        self.builtins = builtins
+        self.memory = BetaMemory()
+
+    def leftActivate(self, token, activations):
+        if self.builtins.evaluate(self.condition, token[0]):
+            self.memory.addToken(token, activations)
+
+
+class ReteNetwork:
+    """ Réseau de Rete compilé à partir des règles d'une base de\
+        connaissances.
+
+        Les conditions de chaque règle sont compilées dans l'ordre de leur\
+        déclaration : deux règles qui partagent un préfixe de conditions\
+        partagent aussi les noeuds de jointure et les mémoires beta de ce\
+        préfixe.
+    """
+
+    def __init__(self, rules, method, builtins=None):
+        """
+            :param list rules: les règles à compiler.
+            :param method: ``Filter`` ou ``Unificator``, détermine le type de\
+            pattern match appliqué par les mémoires alpha.
+            :param builtins: le registre des prédicats évaluables, compilés\
+            en noeuds de filtrage.
+        """
+
+        self.method = method
+        self.builtins = builtins
+        self.root = BetaMemory()
+        self.root.tokens.append(({}, EMPTY))
+        self.alphas = {}
+        self.alphasByShape = {}
+
+        for rule in rules:
+            self.addRule(rule)
+
+    @staticmethod
+    def shape(proposition):
+        return getattr(proposition, 'name', None), len(proposition)
+
+    def alphaMemory(self, pattern):
+        """ Retourne la mémoire alpha d'un motif, en la créant au besoin. """
+
+        alpha = self.alphas.get(pattern)
+        if alpha is None:
+            alpha = AlphaMemory(pattern)
+            self.alphas[pattern] = alpha
+            self.alphasByShape.setdefault(ReteNetwork.shape(pattern), []).append(alpha)
+        return alpha
+
+    def addRule(self, rule):
+        """ Compile une règle dans le réseau.
+
+            Le réseau doit être construit avant l'ajout des premiers faits.
+        """
+
+        memory = self.root
+        bound = set()
+        for i in rule.schedule(range(len(rule.conditions)), self.builtins):
+            condition = rule.conditions[i]
+            join = memory.children.get(condition)
+            if join is None:
+                if self.builtins is not None and self.builtins.isBuiltin(condition):
+                    join = FilterNode(memory, condition, self.builtins)
+                else:
+                    alpha = self.alphaMemory(condition)
+                    join = JoinNode(memory, alpha, bound)
+                    alpha.successors.append(join)
+                memory.children[condition] = join
+                for token in memory.tokens:
+                    join.leftActivate(token, [])
+
+            bound = bound.union(variables(condition))
+            memory = join.memory
+
+        memory.productions.append(rule)
+
+    def addFact(self, fact):
+        """ Propage un nouveau fait dans le réseau.
+
+            :param fact: un fait clos (sans variables).
+            :return: la liste des déclenchements ``(règle, environnement,\
+            urls)`` causés par le fait.
+        """
+
+        activations = []
+        for alpha in self.alphasByShape.get(ReteNetwork.shape(fact), ()):
+            env = self.method.pattern_match(fact, alpha.pattern, {})
+            if env != self.method.failure:
+                alpha.activate(fact, env, activations)
+
+        return activations
+
+
+class ReteChaining(Chaining):
+    """ Un moteur d'inférence à chaînage avant avec variables, basé sur un\
+        réseau de Rete.
+
+        Contrairement à ``ForwardChainingWithVariables``, les jointures\
+        partielles sont conservées entre deux faits : l'ajout d'un fait ne\
+        coûte que les jointures auxquelles il participe.
+    """
+
+    def __init__(self, knowledge, method=None):
+        """
+            :param method: ``Filter`` ou ``Unificator``, détermine le type de\
+            pattern match à appliquer. ``Filter`` par défaut.
+        """
+
+        Chaining.__init__(self, knowledge)
+
+        if method is None:
+            self.method = Filter()
+        else:
+            self.method = method
+
+    def chain(self):
+        """ Effectue le chaînage avant sur les faits et les règles contenus\
+            dans la base de connaissances.
+        """
+        self.reset()
+        network = ReteNetwork(self.knowledge.rules, self.method, self.knowledge.builtins)
+        queue = deque(self.knowledge.facts)
+        terms = self.knowledge.terms
+        known = set()
+
+        while len(queue) > 0:
+            fact = queue.popleft()
+            term = terms.intern(fact)
+
+            if term not in known:
+                known.add(term)
+                self.trace.append(fact)
+                self.solutions.append(fact)
+
+                for rule, env, urls in network.addFact(fact):
+                    conclusion = self.method.substitute(rule.conclusion, env)
+                    conclusion.addUrls(urls)
+                    self.addOrigin(terms.intern(conclusion), rule)
+                    queue.append(conclusion)
+                    self.trace.append(rule)
+
+        return self.solutions
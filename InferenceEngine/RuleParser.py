@@ -0,0 +1,155 @@
+""" Un format textuel pour les règles d'inférence.
+
+    Une règle s'écrit ``conditions => conclusion``, par exemple::
+
+        Naissance(d1,l1,p1), Mort(d2,l2,p1), avant(d2,d1) => "Erreur de date"(p1,d1,d2)
+
+    Les noms de prédicats contenant des espaces ou des caractères spéciaux\
+    s'écrivent entre guillemets. Parmi les arguments, les noms sont des\
+    variables ; les chaînes entre guillemets et les mots commençant par un\
+    chiffre sont des constantes. Les règles sont séparées par des blancs ou\
+    par ``;`` et ``#`` commence un commentaire jusqu'à la fin de la ligne.
+
+    Les règles sont vérifiées à la lecture : une règle est sûre si chaque\
+    variable de sa conclusion et de ses prédicats évaluables apparaît dans\
+    une condition ordinaire, de sorte que le chaînage ne produise que des\
+    faits clos.
+"""
+import re
+
+from InferenceEngine.Predicate import Atom, Predicate, variables
+
+TOKENS = re.compile(r'(?P<blank>[ \t\r]+|#[^\n]*)|(?P<newline>\n)|(?P<string>"(?:[^"\\\n]|\\.)*")|(?P<arrow>=>)'
+                    r'|(?P<punctuation>[(),;])|(?P<word>[^\s(),;"#=]+)')
+
+
+def tokenize(text):
+    """ Découpe un texte en lexèmes.
+
+        :return: la liste des triplets ``(type, texte, ligne)``.
+    """
+
+    tokens = []
+    line = 1
+    position = 0
+    while position < len(text):
+        match = TOKENS.match(text, position)
+        if match is None:
+            raise Exception("Caractère inattendu ligne {}: '{}'.".format(line, text[position]))
+        kind = match.lastgroup
+        if kind == 'newline':
+            line += 1
+        elif kind == 'string':
+            tokens.append((kind, re.sub(r'\\(.)', r'\1', match.group()[1:-1]), line))
+        elif kind != 'blank':
+            tokens.append((kind, match.group(), line))
+        position = match.end()
+    return tokens
+
+
+class RuleParser:
+    """ Un analyseur descendant du format des règles. """
+
+    def __init__(self, text, builtins=None):
+        """
+            :param str text: le texte des règles.
+            :param builtins: les prédicats évaluables, pour vérifier que les\
+            règles sont sûres.
+        """
+
+        self.tokens = tokenize(text)
+        self.position = 0
+        self.builtins = builtins
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, None, self.tokens[-1][2] if len(self.tokens) > 0 else 1
+
+    def fail(self, expected):
+        kind, text, line = self.peek()
+        found = 'la fin du texte' if kind is None else "'{}'".format(text)
+        raise Exception("{} attendu ligne {}, {} trouvé.".format(expected, line, found))
+
+    def expect(self, text):
+        if self.peek()[1] != text:
+            self.fail("'{}'".format(text))
+        self.position += 1
+
+    def parse(self):
+        """ Lit toutes les règles du texte.
+
+            :return: la liste des descriptions ``[conditions, conclusion]``.
+        """
+
+        descriptions = []
+        while self.peek()[0] is not None:
+            if self.peek()[1] == ';':
+                self.position += 1
+                continue
+            descriptions.append(self.rule())
+        return descriptions
+
+    def rule(self):
+        line = self.peek()[2]
+        conditions = [self.predicate()]
+        while self.peek()[1] == ',':
+            self.position += 1
+            conditions.append(self.predicate())
+        self.expect('=>')
+        conclusion = self.predicate()
+        self.check(conditions, conclusion, line)
+        return [conditions, conclusion]
+
+    def predicate(self):
+        token = self.peek()
+        if token[0] not in ('word', 'string'):
+            self.fail('Un prédicat')
+        self.position += 1
+        self.expect('(')
+        arguments = [self.argument()]
+        while self.peek()[1] == ',':
+            self.position += 1
+            arguments.append(self.argument())
+        self.expect(')')
+        return Predicate(arguments, token[1])
+
+    def argument(self):
+        kind, text = self.peek()[:2]
+        if kind not in ('word', 'string'):
+            self.fail('Un argument')
+        self.position += 1
+        if kind == 'string':
+            return Atom(text, False)
+        return Atom(text, not text[0].isdigit())
+
+    def check(self, conditions, conclusion, line):
+        """ Vérifie qu'une règle est sûre. """
+
+        builtins = self.builtins
+        guards = [condition for condition in conditions if builtins is not None and builtins.isBuiltin(condition)]
+        if len(guards) == len(conditions):
+            raise Exception("Règle ligne {}: au moins une condition doit porter sur des faits.".format(line))
+
+        bound = set()
+        for condition in conditions:
+            if condition not in guards:
+                bound.update(variables(condition))
+        for proposition in [conclusion] + guards:
+            for variable in variables(proposition):
+                if variable not in bound:
+                    raise Exception("Règle non sûre ligne {}: la variable '{}' de '{}' n'apparaît dans aucune "
+                                    "condition.".format(line, variable, proposition))
+
+
+def parseRules(text, builtins=None):
+    """ Lit des règles écrites dans le format textuel.
+
+        :param str text: le texte des règles.
+        :param builtins: les prédicats évaluables, qui ne lient aucune\
+        variable.
+        :return: la liste des descriptions ``[conditions, conclusion]``.
+    """
+
+    return RuleParser(text, builtins).parse()
+
@@ -1,3 +1,6 @@
+from InferenceEngine.Predicate import variables
+from InferenceEngine.Provenance import EMPTY
+from InferenceEngine.TermIndex import TermIndex
 from InferenceEngine.Unificator import Unificator
 
 
@@ -18,15 +21,18 @@ class RuleWithVariable:
 
         self.conditions = conditions
         self.conclusion = conclusion
+        self.schedules = {}
 
-    def dependsOf(self, fact, method=Unificator()):
+    def dependsOf(self, fact, method=Unificator(), builtins=None):
         """ Vérifie qu'un fait fait partie, sous réserve de substitution,\
             des conditions de la règle.
             
             :param fact: un fait qui doit faire partie des conditions de\
             déclenchement.
-            :param method: ``Filtre`` ou ``Unificateur``, détermine le type\
+            :param method: ``Filter`` ou ``Unificator``, détermine le type\
              de pattern match à appliquer.
+            :param builtins: les prédicats évaluables, qui ne sont jamais\
+            satisfaits par un fait.
             :return: un dictionnaire qui attribue un environnement à chaque\
             condition qui peut être satisfaite par le fait pasée en paramètre.\
             ``False`` si aucune condition n'est satisfaite par le fait.
@@ -34,6 +40,9 @@ class RuleWithVariable:
         envs = {}
 
         for condition in self.conditions:
+            if builtins is not None and builtins.isBuiltin(condition):
+                continue
+
             # Si au moins une des conditions retourne un environnement,
             # nous savons que la proposition satisfait une des conditions.
             env = method.pattern_match(fact, condition, {})
@@ -42,59 +51,154 @@ class RuleWithVariable:
 
         return envs
 
-    def satisfiedBy(self, facts, cond, env, method):
+    def satisfiedBy(self, facts, cond, env, method, order=None, builtins=None, stats=None):
         """ Vérifie que des faits suffisent, sous réserve de substitution,\
             à déclencher la règle.
 
-            :param list facts: une liste de faits.
+            :param facts: une liste de faits, ou un ``TermIndex`` qui fournit\
+            les faits candidats de chaque condition.
             :param cond: la condition qui a donné lieu à ``env`` par le\
             pattern match.
             :param dict env: un environnement de départ déjà établi par\
             ``depend_de``.
-            :param method: ``Filtre`` ou ``Unificateur``, détermine le type\
+            :param method: ``Filter`` ou ``Unificator``, détermine le type\
              de pattern match à appliquer.
-            :return: une liste d'environnements qui correspondent à toutes les\
-            substitutions possibles entre les conditions de la règle et les\
-            propositions. On retourne une liste vide si au moins une condition\
-            ne peut être satisfaite.
+            :param list order: l'ordre d'évaluation des conditions, sous la\
+            forme d'une liste d'indices. L'ordre de déclaration par défaut.
+            :param builtins: les prédicats évaluables, testés comme des gardes.
+            :param stats: les ``RuleStatistics`` de la règle, à remplir.
+            :return: une liste de couples ``(environnement, urls)`` qui\
+            correspondent à toutes les substitutions possibles entre les\
+            conditions de la règle et les propositions, avec la provenance des\
+            faits utilisés. On retourne une liste vide si au moins une\
+            condition ne peut être satisfaite.
         """
-        envs = [env]
-
-        # On n'a pas besoin de tester ``cond`` car cela a été fait dans l'appel
-        # à ``depend_de`` qui précède l'appel à cette méthode.
-        conditions_a_tester = [cond1 for cond1 in self.conditions if cond1 != cond]
-
-        # Pour chaque condition dans la liste des conditions, si la liste
-        # des environnements n'est pas vide, on y ajoute les environnements
-        # qui permettent de satisfaire une des conditions.
-
-        factsSati = {}
-        for cond1 in self.conditions:
-            envs_nouveaux = []
-            for fact in facts:
-                for env1 in envs:
-                    env2 = method.pattern_match(fact, cond1, env1)
-                    if env2 != method.failure:
-                        envs_nouveaux.append(env2)
-                        if len(fact.urls) > 0:
-                            key1 = frozenset(env1.items())
-                            key2 = frozenset(env2.items())
 
-                            if key1 in factsSati.keys():
-                                factsSati[key2] = factsSati[key1]
+        # Toutes les conditions sont testées, y compris ``cond`` : les urls de
+        # tous les faits qui la satisfont sous ``env`` sont ainsi retenues.
+        def sources(i, condition, env1):
+            return RuleWithVariable.candidates(facts, condition, env1)
+
+        return self.join(sources, env, EMPTY, method, order=order, builtins=builtins, stats=stats)
+
+    def schedule(self, order, builtins, bound=()):
+        """ Place les gardes dans un ordre d'évaluation.
+
+            Les conditions ordinaires gardent leur ordre ; chaque prédicat\
+            évaluable est placé juste après la condition qui lie sa dernière\
+            variable, afin d'élaguer les environnements au plus tôt.
+
+            :param order: l'ordre d'évaluation des conditions, sous la forme\
+            d'une liste d'indices.
+            :param builtins: les prédicats évaluables.
+            :param bound: les variables déjà liées.
+            :return: la liste d'indices réordonnée.
+        """
+
+        if builtins is None or len(builtins) == 0:
+            return order
+
+        key = (id(builtins), len(builtins), tuple(order), frozenset(bound))
+        entry = self.schedules.get(key)
+        if entry is not None:
+            return entry[1]
+
+        guards = [i for i in order if builtins.isBuiltin(self.conditions[i])]
+        bound = set(bound)
+        scheduled = []
+
+        def placeGuards():
+            for guard in guards[:]:
+                if bound.issuperset(variables(self.conditions[guard])):
+                    scheduled.append(guard)
+                    guards.remove(guard)
+
+        placeGuards()
+        for i in order:
+            if builtins.isBuiltin(self.conditions[i]):
+                continue
+            scheduled.append(i)
+            bound.update(variables(self.conditions[i]))
+            placeGuards()
+
+        scheduled.extend(guards)
+        # Le registre est conservé pour que son identifiant reste réservé.
+        self.schedules[key] = (builtins, scheduled)
+        return scheduled
+
+    @staticmethod
+    def candidates(facts, cond, env):
+        """ Retourne les faits à confronter à une condition. """
+
+        if isinstance(facts, TermIndex):
+            return facts.candidates(cond, env)
+        return facts
+
+    def join(self, sources, env, urls, method, skip=None, order=None, builtins=None, stats=None):
+        """ Étend un environnement de départ à toutes les conditions de la\
+            règle.
+
+            :param sources: une fonction qui, pour l'indice d'une condition,\
+            la condition et un environnement partiel, retourne les faits à\
+            confronter à cette condition.
+            :param dict env: l'environnement de départ.
+            :param int urls: la provenance des faits qui ont établi ``env``.
+            :param method: ``Filter`` ou ``Unificator``, détermine le type\
+             de pattern match à appliquer.
+            :param int skip: l'indice d'une condition déjà satisfaite par\
+            ``env``, qui n'est alors pas testée à nouveau.
+            :param list order: l'ordre d'évaluation des conditions, sous la\
+            forme d'une liste d'indices. L'ordre de déclaration par défaut.
+            :param builtins: les prédicats évaluables, testés comme des gardes.
+            :param stats: les ``RuleStatistics`` de la règle, à remplir.
+            :return: une liste de couples ``(environnement, urls)``, vide si\
+            au moins une condition ne peut être satisfaite.
+        """
+        partials = [(env, urls)]
+
+        if order is None:
+            order = range(len(self.conditions))
+
+        for i in self.schedule(order, builtins, env):
+            if i == skip:
+                continue
+
+            condition = self.conditions[i]
+            if builtins is not None and builtins.isBuiltin(condition):
+                attempts = len(partials)
+                partials = [(env1, urls1) for env1, urls1 in partials if builtins.evaluate(condition, env1)]
+                if stats is not None:
+                    counters = stats.conditions[i]
+                    counters.attempts += attempts
+                    counters.successes += len(partials)
+                    counters.addEnvironments(len(partials))
+                if len(partials) == 0:
+                    return []
+                continue
+
+            attempts = 0
+            partials_nouveaux = []
+            for env1, urls1 in partials:
+                facts = sources(i, condition, env1)
+                if stats is not None:
+                    attempts += len(facts)
+                for fact in facts:
+                    env2 = method.pattern_match(fact, condition, env1)
+                    if env2 != method.failure:
+                        partials_nouveaux.append((env2, urls1 | fact.urls))
 
-                            if key2 in factsSati.keys():
-                                factsSati[key2].extend(list(fact.urls))
-                            else:
-                                factsSati[key2] = list(fact.urls)
+            if stats is not None:
+                counters = stats.conditions[i]
+                counters.attempts += attempts
+                counters.successes += len(partials_nouveaux)
+                counters.addEnvironments(len(partials_nouveaux))
 
-            # Si au moins une condition n'est pas satisfaite, la règle ne l'est pas non plus.
-            if len(envs_nouveaux) == 0:
+            if len(partials_nouveaux) == 0:
                 return []
 
-            envs = envs_nouveaux
+            partials = partials_nouveaux
 
-        return envs, factsSati
+        return partials
 
     def __repr__(self):
         """ Représentation d'une règle sous forme de string. """
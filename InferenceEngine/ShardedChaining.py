@@ -0,0 +1,219 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from InferenceEngine.Chaining import Chaining
+from InferenceEngine.CompiledMatcher import CompiledMatcher
+from InferenceEngine.ForwardChainingWithVariables import ForwardChainingWithVariables
+from InferenceEngine.JoinPlanner import JoinPlanner
+from InferenceEngine.Knowledge import KnowledgeBase
+from InferenceEngine.Predicate import Predicate, variables
+from InferenceEngine.Provenance import provenance
+from InferenceEngine.RuleWithVariable import RuleWithVariable
+from InferenceEngine.TermIndex import TermIndex
+
+
+def chainShard(rules, functions, facts):
+    """ Chaîne une partition dans un processus de travail.
+
+        Les identifiants de pages n'ont de sens que dans le processus qui les\
+        a attribués : les urls sont échangées en clair.
+
+        :param list rules: les couples ``(conditions, conclusion)`` des règles.
+        :param dict functions: les prédicats évaluables.
+        :param list facts: des couples ``(fait, urls)``.
+        :return: la liste des triplets ``(fait déduit, urls, indices des\
+        règles qui l'ont conclu)``.
+    """
+
+    bc = KnowledgeBase(lambda descr: RuleWithVariable(descr[0], descr[1]))
+    bc.addBuiltins(functions)
+    bc.addRules(rules)
+    for fact, urls in facts:
+        fact.urls = provenance(urls)
+        bc.addFact(fact)
+
+    matcher = CompiledMatcher()
+    for rule in bc.rules:
+        matcher.compileRule(rule)
+    engine = ForwardChainingWithVariables(bc, method=matcher, mode=ForwardChainingWithVariables.SEMI_NAIVE,
+                                          planner=JoinPlanner())
+    engine.setTraceMode(Chaining.TRACE_OFF)
+    engine.chain()
+
+    numbers = {rule: i for i, rule in enumerate(bc.rules)}
+    results = []
+    for fact in engine.solutions[len(bc.facts):]:
+        rules = engine.origins[bc.terms.intern(fact)]
+        results.append((fact, tuple(fact.getUrls()), tuple(numbers[rule] for rule in rules)))
+    return results
+
+
+class ShardedChaining(Chaining):
+    """ Un moteur d'inférence qui partitionne les faits par personne et\
+        chaîne les partitions en parallèle.
+
+        Une règle est partitionnable lorsque toutes ses conditions portent\
+        sur des faits de base et que celles qui mentionnent une personne\
+        partagent une même variable de personne : chacune de ses\
+        instanciations ne met en jeu que les faits d'une personne. Chaque\
+        fait est envoyé dans la partition de la personne qu'il porte à la\
+        position de cette variable, pour chacune des règles partitionnables\
+        qui l'utilisent ; un fait peut donc être copié dans plusieurs\
+        partitions, et les faits sans personne le sont dans toutes. Les\
+        partitions sont chaînées indépendamment, dans un pool de processus.
+
+        Les autres règles, qui joignent plusieurs personnes ou portent sur\
+        des faits déduits, sont appliquées lors d'une phase de fusion, sur\
+        l'ensemble des faits et des conclusions des partitions.
+    """
+
+    def __init__(self, knowledge, people, shards=None, workers=None):
+        """
+            :param people: les variables de personne des règles.
+            :param int shards: le nombre de partitions, un par processeur par\
+            défaut.
+            :param int workers: le nombre de processus. Avec un seul\
+            processus, les partitions sont chaînées dans le processus courant.
+        """
+
+        Chaining.__init__(self, knowledge)
+
+        if shards is None:
+            shards = os.cpu_count() or 1
+        self.people = set(people)
+        self.shards = shards
+        self.workers = workers
+
+    def key(self, rule):
+        """ Retourne la variable de personne partagée par toutes les\
+            conditions d'une règle, ou ``None`` si la règle n'est pas\
+            partitionnable.
+        """
+
+        builtins = self.knowledge.builtins
+        derived = set(TermIndex.shape(other.conclusion) for other in self.knowledge.rules)
+        shared = None
+        for condition in rule.conditions:
+            if builtins.isBuiltin(condition):
+                continue
+            if TermIndex.shape(condition) in derived:
+                return None
+            people = set(variable for variable in variables(condition) if variable in self.people)
+            if len(people) == 0:
+                # Les faits de la condition sont copiés dans toutes les
+                # partitions.
+                continue
+            shared = people if shared is None else shared & people
+        if not shared:
+            return None
+        return min(shared, key=lambda variable: variable.name)
+
+    def partition(self, local):
+        """ Répartit les faits de la base de connaissances.
+
+            :param list local: les règles partitionnables.
+            :return: la liste des faits de chaque partition.
+        """
+
+        builtins = self.knowledge.builtins
+        positions = {}
+        everywhere = set()
+        for rule in local:
+            key = self.key(rule)
+            for condition in rule.conditions:
+                if builtins.isBuiltin(condition):
+                    continue
+                shape = TermIndex.shape(condition)
+                if key in variables(condition):
+                    positions.setdefault(shape, set()).update(
+                        position for position, argument in enumerate(condition.propositions) if argument == key)
+                else:
+                    everywhere.add(shape)
+
+        shards = [[] for _ in range(self.shards)]
+        for fact in self.knowledge.facts:
+            if not isinstance(fact, Predicate):
+                continue
+            shape = TermIndex.shape(fact)
+            if shape in everywhere:
+                targets = range(self.shards)
+            else:
+                targets = set(hash(fact.propositions[position].name) % self.shards
+                              for position in positions.get(shape, ()))
+            for shard in targets:
+                shards[shard].append(fact)
+        return shards
+
+    def chain(self):
+        """ Chaîne les partitions, puis applique les règles restantes aux\
+            faits et aux conclusions des partitions.
+
+            :return: les faits de la base de connaissances suivis des faits\
+            déduits.
+        """
+
+        self.reset()
+        terms = self.knowledge.terms
+        local = [rule for rule in self.knowledge.rules if self.key(rule) is not None]
+        remaining = [rule for rule in self.knowledge.rules if self.key(rule) is None]
+
+        descriptions = [(rule.conditions, rule.conclusion) for rule in local]
+        functions = self.knowledge.builtins.functions
+        tasks = [[(fact, tuple(fact.getUrls())) for fact in shard] for shard in self.partition(local)]
+        tasks = [task for task in tasks if len(task) > 0]
+
+        if self.workers == 1:
+            parts = [chainShard(descriptions, functions, task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(chainShard, descriptions, functions, task) for task in tasks]
+                parts = [future.result() for future in futures]
+
+        # Fusion : une conclusion trouvée dans plusieurs partitions n'est
+        # conservée qu'une fois, avec l'union de ses urls.
+        self.solutions = list(self.knowledge.facts)
+        known = {terms.intern(fact): fact for fact in self.knowledge.facts}
+        for part in parts:
+            for fact, urls, rules in part:
+                term = terms.intern(fact)
+                existing = known.get(term)
+                if existing is None:
+                    fact.urls = provenance(urls)
+                    known[term] = fact
+                    self.solutions.append(fact)
+                    self.trace.append(fact)
+                else:
+                    existing.addUrls(urls)
+                for i in rules:
+                    self.addOrigin(term, local[i])
+
+        if len(remaining) > 0:
+            self.merge(remaining, known)
+
+        return self.solutions
+
+    def merge(self, remaining, known):
+        """ Applique les règles non partitionnables à tous les faits. """
+
+        terms = self.knowledge.terms
+        bc = KnowledgeBase(lambda descr: RuleWithVariable(descr[0], descr[1]))
+        bc.addBuiltins(self.knowledge.builtins.functions)
+        bc.addRules([(rule.conditions, rule.conclusion) for rule in remaining])
+        bc.addFacts(self.solutions)
+
+        engine = ForwardChainingWithVariables(bc, mode=ForwardChainingWithVariables.SEMI_NAIVE, planner=JoinPlanner())
+        engine.setTraceMode(Chaining.TRACE_OFF)
+        engine.chain()
+
+        rules = dict(zip(bc.rules, remaining))
+        for fact in engine.solutions[len(bc.facts):]:
+            term = terms.intern(fact)
+            if term not in known:
+                known[term] = fact
+                self.solutions.append(fact)
+                self.trace.append(fact)
+            else:
+                known[term].addUrls(fact.urls)
+        for term, origins in engine.origins.items():
+            for rule in origins:
+                self.addOrigin(terms.intern(term.toProposition()), rules[rule])
@@ -0,0 +1,251 @@
+""" Instantanés des faits d'une base de connaissances sur disque.
+
+    Un instantané est un fichier unique : une table des symboles (les noms\
+    des prédicats et des atomes, les valeurs des atomes et les urls) suivie\
+    de tableaux d'entiers qui décrivent les faits. Le fichier est projeté en mémoire à la lecture :\
+    un fait n'est reconstruit que lorsqu'il est lu, et plusieurs processus\
+    peuvent ouvrir le même instantané et en lire chacun une tranche, sans\
+    qu'aucun fait ne soit sérialisé par ``pickle``.
+
+    Le fichier contient, après l'en-tête ``MAGIC``, la longueur de la table\
+    des symboles (8 octets), la table au format JSON, puis quatre tableaux\
+    alignés sur 8 octets :
+
+    - ``offsets`` (entiers de 8 octets) : le début des arguments de chaque\
+      fait dans ``records``, suivi de la fin du dernier ;
+    - ``records`` (entiers de 4 octets) : pour chaque fait, l'indice de son\
+      nom puis ceux de ses arguments ;
+    - ``linkOffsets`` (entiers de 8 octets) : le début des urls de chaque\
+      fait dans ``links``, suivi de la fin du dernier ;
+    - ``links`` (entiers de 4 octets) : les indices des urls de chaque fait.
+"""
+import gc
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from InferenceEngine.Predicate import Atom, Predicate
+from InferenceEngine.Provenance import registry
+
+MAGIC = b'KBSNAP01'
+
+
+def align(size):
+    return (size + 7) & ~7
+
+
+def save(knowledge, path, encode=None, facts=None):
+    """ Enregistre les faits d'une base de connaissances.
+
+        Seuls les faits sont enregistrés : les règles et les prédicats\
+        évaluables sont définis par le code et doivent être ajoutés à la base\
+        rechargée. Les valeurs des atomes (dates, lieux...) sont conservées\
+        si elles peuvent être converties en JSON par ``encode``.
+
+        :param knowledge: la base de connaissances.
+        :param str path: le fichier à écrire. Il est remplacé d'un seul coup :\
+        un instantané précédent reste lisible jusqu'à la fin de l'écriture.
+        :param encode: une fonction qui convertit la valeur d'un atome en une\
+        donnée JSON, ou retourne ``None`` si la valeur n'est pas conservée.
+        :param facts: les faits à enregistrer, ceux de la base par défaut.
+    """
+
+    if facts is None:
+        facts = knowledge.facts
+    symbols = []
+    symbolIds = {}
+    values = []
+    urls = []
+    urlIds = {}
+
+    def symbol(name):
+        identifier = symbolIds.get(name)
+        if identifier is None:
+            identifier = len(symbols)
+            symbolIds[name] = identifier
+            symbols.append(name)
+            values.append(None)
+        return identifier
+
+    def atom(argument):
+        identifier = symbol(argument.name)
+        if values[identifier] is None and argument.value is not None and encode is not None:
+            values[identifier] = encode(argument.value)
+        return identifier
+
+    offsets, records = array('q', [0]), array('i')
+    linkOffsets, links = array('q', [0]), array('i')
+    count = 0
+    for fact in facts:
+        count += 1
+        if not isinstance(fact, Predicate) or \
+                any(not argument.getIsAtomic() or argument.getIsVariable() for argument in fact.propositions):
+            raise Exception("Seuls les prédicats d'atomes constants peuvent être enregistrés: '{}'.".format(fact))
+
+        records.append(symbol(fact.name))
+        records.extend(atom(argument) for argument in fact.propositions)
+        offsets.append(len(records))
+
+        for url in sorted(fact.getUrls()):
+            identifier = urlIds.get(url)
+            if identifier is None:
+                identifier = len(urls)
+                urlIds[url] = identifier
+                urls.append(url)
+            links.append(identifier)
+        linkOffsets.append(len(links))
+
+    header = json.dumps({'byteorder': sys.byteorder, 'facts': count, 'symbols': symbols, 'values': values,
+                         'urls': urls, 'sizes': [len(offsets), len(records), len(linkOffsets), len(links)]},
+                        ensure_ascii=False).encode('utf-8')
+
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as output:
+        output.write(MAGIC)
+        output.write(struct.pack('<Q', len(header)))
+        output.write(header)
+        for integers in [offsets, records, linkOffsets, links]:
+            output.write(bytes(align(output.tell()) - output.tell()))
+            integers.tofile(output)
+    os.replace(temporary, path)
+
+
+class Snapshot:
+    """ Un instantané ouvert en lecture.
+
+        Les faits sont reconstruits à la demande, par ``fact``, ``facts`` ou\
+        en parcourant l'instantané. Les atomes d'un même symbole sont\
+        partagés par tous les faits lus.
+    """
+
+    def __init__(self, path, decode=None):
+        """
+            :param str path: le fichier écrit par ``save``.
+            :param decode: la fonction qui reconstruit la valeur d'un atome à\
+            partir de la donnée produite par ``encode``.
+        """
+
+        self.path = path
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.map.close()
+            raise Exception("Le fichier '{}' n'est pas un instantané.".format(path))
+        length, = struct.unpack_from('<Q', self.map, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(self.map[start:start + length].decode('utf-8'))
+        if header['byteorder'] != sys.byteorder:
+            self.map.close()
+            raise Exception("L'instantané '{}' a été écrit sur une autre architecture.".format(path))
+
+        self.symbols = header['symbols']
+        self.values = header.get('values', [None] * len(self.symbols))
+        self.decode = decode
+        self.urls = header['urls']
+        self.count = header['facts']
+
+        self.view = memoryview(self.map)
+        position = start + length
+        arrays = []
+        for code, size in zip(['q', 'i', 'q', 'i'], header['sizes']):
+            position = align(position)
+            end = position + size * array(code).itemsize
+            arrays.append(self.view[position:end].cast(code))
+            position = end
+        self.offsets, self.records, self.linkOffsets, self.links = arrays
+
+        self.atoms = [None] * len(self.symbols)
+        # Les identifiants des urls dans le registre de ce processus.
+        self.pages = [registry.id(url) for url in self.urls]
+
+    def atom(self, identifier):
+        atom = self.atoms[identifier]
+        if atom is None:
+            value = self.values[identifier]
+            if value is not None and self.decode is not None:
+                value = self.decode(value)
+            else:
+                value = None
+            atom = Atom(self.symbols[identifier], False, value=value)
+            self.atoms[identifier] = atom
+        return atom
+
+    def fact(self, i):
+        """ Reconstruit le fait d'indice ``i``. """
+
+        records, start, end = self.records, self.offsets[i], self.offsets[i + 1]
+        urls = registry.pages(self.pages[link] for link in self.links[self.linkOffsets[i]:self.linkOffsets[i + 1]])
+        return Predicate([self.atom(identifier) for identifier in records[start + 1:end]],
+                         self.symbols[records[start]], urls)
+
+    def facts(self, start=0, stop=None):
+        """ Reconstruit une tranche des faits, par exemple la part d'un\
+            processus de travail.
+        """
+
+        if stop is None or stop > self.count:
+            stop = self.count
+        for i in range(start, stop):
+            yield self.fact(i)
+
+    def load(self, knowledge):
+        """ Ajoute les faits de l'instantané à une base de connaissances.
+
+            :param knowledge: la base de connaissances, dont les règles et les\
+            prédicats évaluables sont déjà définis.
+            :return: la base de connaissances.
+        """
+
+        if len(knowledge.facts) > 0:
+            knowledge.addFacts(self.facts())
+            return knowledge
+
+        # Le chargement ne crée que des objets qui vivent aussi longtemps que
+        # la base : le ramasse-miettes n'a rien à y collecter.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            # Les faits d'un instantané sont distincts : dans une base vide,
+            # ils sont internés à partir de leurs symboles, sans passer par
+            # ``addFact``.
+            terms = [None] * len(self.symbols)
+            for i, fact in enumerate(self.facts()):
+                arguments = []
+                for identifier in self.records[self.offsets[i] + 1:self.offsets[i + 1]]:
+                    term = terms[identifier]
+                    if term is None:
+                        term = knowledge.terms.atom(self.symbols[identifier])
+                        terms[identifier] = term
+                    arguments.append(term)
+                fact.term = knowledge.terms.predicate(fact.name, tuple(arguments))
+                knowledge.entries[fact.term] = fact
+                knowledge.facts.append(fact)
+                knowledge.index.add(fact)
+        finally:
+            if collecting:
+                gc.enable()
+        return knowledge
+
+    def close(self):
+        self.offsets.release()
+        self.records.release()
+        self.linkOffsets.release()
+        self.links.release()
+        self.view.release()
+        self.map.close()
+
+    def __iter__(self):
+        return self.facts()
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,334 @@
+import sqlite3
+
+from InferenceEngine.Chaining import Chaining
+from InferenceEngine.Predicate import Atom, Predicate
+from InferenceEngine.Provenance import EMPTY, registry
+from InferenceEngine.TermIndex import TermIndex
+
+
+class SqliteChaining(Chaining):
+    """ Un moteur d'inférence à chaînage avant qui délègue les jointures à\
+        SQLite.
+
+        Les faits sont chargés dans une base SQLite, à raison d'une table par\
+        forme ``(nom, arité)``, dont chaque colonne est indexée. Chaque règle\
+        est compilée en requêtes ``SELECT`` : ses conditions deviennent des\
+        tables jointes sur leurs variables communes et ses gardes des\
+        fonctions SQL.
+
+        Le chaînage est semi-naïf. Les faits d'une table reçoivent des\
+        identifiants croissants, de sorte que les faits apparus lors d'un tour\
+        forment un intervalle d'identifiants, le delta de la table. À chaque\
+        tour, une règle n'est jointe qu'autour des deltas de ses conditions ;\
+        le chaînage s'arrête au premier tour dont tous les deltas sont vides.
+
+        La provenance d'un fait est conservée dans une table de pages\
+        ``(fait, page)`` associée à la table du fait. Les pages d'une\
+        conclusion, comme les règles qui l'ont conclue, sont enregistrées par\
+        SQLite au moment où elle est insérée.
+    """
+
+    def __init__(self, knowledge, path=None):
+        """
+            :param str path: le fichier de la base SQLite. Une base en mémoire\
+            par défaut.
+        """
+
+        Chaining.__init__(self, knowledge)
+
+        if path is None:
+            self.path = ':memory:'
+        else:
+            self.path = path
+
+        self.connection = None
+        self.tables = {}
+        self.functions = {}
+        self.atoms = {}
+        self.rows = {}
+
+    @staticmethod
+    def quote(identifier):
+        return '"{}"'.format(identifier.replace('"', '""'))
+
+    def connect(self):
+        """ Ouvre une base vide et y enregistre les fonctions SQL. """
+
+        self.close()
+        self.connection = sqlite3.connect(self.path)
+
+        self.functions = {}
+        for name, function in self.knowledge.builtins.functions.items():
+            self.functions[name] = 'builtin{}'.format(len(self.functions))
+            self.connection.create_function(self.functions[name], -1, self.guard(function))
+
+        self.connection.execute('DROP TABLE IF EXISTS origins')
+        self.connection.execute('CREATE TABLE origins (rule INTEGER, id INTEGER, PRIMARY KEY (rule, id)) '
+                                'WITHOUT ROWID')
+
+    def guard(self, function):
+        # Les gardes reçoivent les atomes des faits chargés, avec leur valeur,
+        # comme dans les autres moteurs.
+        return lambda *arguments: int(bool(function(*[self.atom(argument) for argument in arguments])))
+
+    def atom(self, name):
+        atom = self.atoms.get(name)
+        if atom is None:
+            atom = Atom(name, False)
+            self.atoms[name] = atom
+        return atom
+
+    def close(self):
+        """ Ferme la base du dernier chaînage. """
+
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def table(self, shape):
+        """ Retourne le nom de la table d'une forme, en la créant au besoin\
+            avec sa table de pages.
+        """
+
+        table = self.tables.get(shape)
+        if table is None:
+            name, arity = shape
+            table = SqliteChaining.quote('{}/{}'.format(name, arity))
+            columns = ['a{}'.format(position) for position in range(arity)]
+
+            self.connection.execute('DROP TABLE IF EXISTS {}'.format(table))
+            self.connection.execute('CREATE TABLE {} ({})'.format(table, ', '.join(['id INTEGER PRIMARY KEY']
+                                                                                      + columns)))
+            self.connection.execute('CREATE UNIQUE INDEX {} ON {} ({})'.format(
+                SqliteChaining.quote('{}/{}/key'.format(name, arity)), table, ', '.join(columns)))
+            # La première colonne est couverte par l'index unique.
+            for column in columns[1:]:
+                self.connection.execute('CREATE INDEX {} ON {} ({})'.format(
+                    SqliteChaining.quote('{}/{}/{}'.format(name, arity, column)), table, column))
+
+            pages = SqliteChaining.pages(shape)
+            self.connection.execute('DROP TABLE IF EXISTS {}'.format(pages))
+            self.connection.execute('CREATE TABLE {} (id INTEGER, page INTEGER, PRIMARY KEY (id, page)) '
+                                    'WITHOUT ROWID'.format(pages))
+            self.tables[shape] = table
+        return table
+
+    @staticmethod
+    def pages(shape):
+        """ Retourne le nom de la table des pages d'une forme. """
+
+        return SqliteChaining.quote('{}/{}/pages'.format(*shape))
+
+    @staticmethod
+    def value(argument):
+        if isinstance(argument, Predicate):
+            raise Exception("Argument composé: impossible de le stocker dans une colonne.")
+        return argument.name
+
+    def load(self):
+        """ Charge les faits de la base de connaissances.
+
+            Le fait d'identifiant ``i`` d'une table est l'élément ``i - 1`` de\
+            ``self.rows[table]``.
+        """
+
+        self.atoms = {}
+        self.rows = {}
+        for fact in self.knowledge.facts:
+            self.rows.setdefault(self.table(TermIndex.shape(fact)), []).append(fact)
+            for argument in fact.propositions:
+                self.atoms.setdefault(SqliteChaining.value(argument), argument)
+
+        for shape, table in self.tables.items():
+            facts = self.rows.get(table, [])
+            self.connection.executemany(
+                'INSERT INTO {} VALUES ({})'.format(table, ', '.join('?' * (shape[1] + 1))),
+                ([i] + [SqliteChaining.value(argument) for argument in fact.propositions]
+                 for i, fact in enumerate(facts, 1)))
+            self.connection.executemany('INSERT INTO {} VALUES (?, ?)'.format(SqliteChaining.pages(shape)),
+                                        ((i, page) for i, fact in enumerate(facts, 1) for page in fact.urls))
+
+    def compile(self, rule, trigger):
+        """ Compile une règle en une requête ``SELECT`` pour un tour du\
+            chaînage.
+
+            La condition d'indice ``trigger`` ne lit que le delta de sa table,\
+            les conditions qui la précèdent que les faits des tours précédents\
+            et celles qui la suivent tous les faits connus au début du tour :\
+            chaque instanciation de la règle n'est produite qu'une fois.
+
+            :return: la requête et ses paramètres nommés. La requête retourne\
+            les identifiants des faits des conditions, suivis des arguments de\
+            la conclusion. Les paramètres ``old{i}`` et ``new{i}``, les bornes\
+            du delta de la table de la condition ``i``, restent à fournir.
+        """
+
+        builtins = self.knowledge.builtins
+        tables = []
+        where = []
+        parameters = {}
+        columns = {}
+
+        def constant(argument):
+            name = 'k{}'.format(len(parameters))
+            parameters[name] = SqliteChaining.value(argument)
+            return ':' + name
+
+        for i, condition in enumerate(rule.conditions):
+            if builtins.isBuiltin(condition):
+                continue
+            alias = 't{}'.format(i)
+            tables.append('{} AS {}'.format(self.table(TermIndex.shape(condition)), alias))
+            if i < trigger:
+                where.append('{0}.id <= :old{1}'.format(alias, i))
+            elif i == trigger:
+                where.append('{0}.id > :old{1} AND {0}.id <= :new{1}'.format(alias, i))
+            else:
+                where.append('{0}.id <= :new{1}'.format(alias, i))
+            for position, argument in enumerate(condition.propositions):
+                column = '{}.a{}'.format(alias, position)
+                if not argument.getIsVariable():
+                    where.append('{} = {}'.format(column, constant(argument)))
+                elif argument in columns:
+                    where.append('{} = {}'.format(column, columns[argument]))
+                else:
+                    columns[argument] = column
+
+        def expression(argument):
+            if not argument.getIsVariable():
+                return constant(argument)
+            if argument not in columns:
+                raise Exception("Variable '{}' non liée par une condition de la règle.".format(argument))
+            return columns[argument]
+
+        for condition in rule.conditions:
+            if builtins.isBuiltin(condition):
+                where.append('{}({})'.format(self.functions[condition.name],
+                                             ', '.join(expression(argument) for argument in condition.propositions)))
+
+        select = ['t{}.id'.format(i) for i, condition in enumerate(rule.conditions)
+                  if not builtins.isBuiltin(condition)]
+        select.extend(expression(argument) for argument in rule.conclusion.propositions)
+        query = 'SELECT {} FROM {} WHERE {}'.format(', '.join(select), ', '.join(tables), ' AND '.join(where))
+        return query, parameters
+
+    def compileRule(self, number, rule):
+        """ Compile les requêtes d'une règle.
+
+            Les instanciations d'un tour sont rassemblées dans une table\
+            temporaire, d'où sont insérés ensemble les conclusions, leurs pages\
+            et leurs origines.
+
+            :return: la table temporaire, les requêtes de chaque condition qui\
+            peut déclencher la règle, et les trois insertions.
+        """
+
+        builtins = self.knowledge.builtins
+        facts = [i for i, condition in enumerate(rule.conditions) if not builtins.isBuiltin(condition)]
+        shape = TermIndex.shape(rule.conclusion)
+        table = self.table(shape)
+        arguments = ['c{}'.format(position) for position in range(shape[1])]
+
+        matches = SqliteChaining.quote('rule{}/matches'.format(number))
+        self.connection.execute('DROP TABLE IF EXISTS temp.{}'.format(matches))
+        self.connection.execute('CREATE TEMP TABLE {} ({})'.format(
+            matches, ', '.join(['f{}'.format(i) for i in facts] + arguments)))
+
+        selects = [(i, self.compile(rule, i)) for i in facts]
+
+        conclude = 'INSERT INTO {} ({}) SELECT DISTINCT {} FROM {} WHERE 1 ON CONFLICT DO NOTHING'.format(
+            table, ', '.join('a{}'.format(position) for position in range(shape[1])), ', '.join(arguments), matches)
+        # Chaque instanciation retrouve sa conclusion par l'index unique.
+        conclusion = 'JOIN {} AS c ON {}'.format(table, ' AND '.join(
+            ['c.a{0} = m.c{0}'.format(position) for position in range(shape[1])] + ['1']))
+        pages = 'INSERT OR IGNORE INTO {} {}'.format(SqliteChaining.pages(shape), ' UNION '.join(
+            'SELECT c.id, p.page FROM {} AS m {} JOIN {} AS p ON p.id = m.f{}'.format(
+                matches, conclusion, SqliteChaining.pages(TermIndex.shape(rule.conditions[i])), i)
+            for i in facts))
+        origins = 'INSERT OR IGNORE INTO origins SELECT DISTINCT {}, c.id FROM {} AS m {}'.format(
+            number, matches, conclusion)
+        return matches, selects, (conclude, pages, origins)
+
+    def bounds(self):
+        """ Retourne le plus grand identifiant de chaque table. """
+
+        return {table: self.connection.execute('SELECT coalesce(max(id), 0) FROM {}'.format(table)).fetchone()[0]
+                for table in self.tables.values()}
+
+    def chain(self):
+        """ Effectue le chaînage dans SQLite.
+
+            :return: les faits de la base de connaissances suivis des faits\
+            déduits.
+        """
+
+        self.reset()
+        self.tables = {}
+        self.connect()
+        self.load()
+
+        builtins = self.knowledge.builtins
+        compiled = [self.compileRule(number, rule) for number, rule in enumerate(self.knowledge.rules)]
+
+        loaded = self.bounds()
+        old = {table: 0 for table in loaded}
+        new = loaded
+        while any(new[table] > old[table] for table in new):
+            for rule, (matches, selects, inserts) in zip(self.knowledge.rules, compiled):
+                tables = {i: self.tables[TermIndex.shape(condition)] for i, condition in enumerate(rule.conditions)
+                          if not builtins.isBuiltin(condition)}
+                bounds = {}
+                for i, table in tables.items():
+                    bounds['old{}'.format(i)] = old[table]
+                    bounds['new{}'.format(i)] = new[table]
+
+                self.connection.execute('DELETE FROM {}'.format(matches))
+                for i, (query, parameters) in selects:
+                    if new[tables[i]] > old[tables[i]]:
+                        self.connection.execute('INSERT INTO {} {}'.format(matches, query), {**parameters, **bounds})
+
+                before = self.connection.total_changes
+                self.connection.execute(inserts[0])
+                if self.connection.total_changes != before:
+                    self.trace.append(rule)
+                self.connection.execute(inserts[1])
+                self.connection.execute(inserts[2])
+
+            old, new = new, self.bounds()
+
+        self.solutions = list(self.knowledge.facts)
+        self.collect(loaded)
+        self.connection.commit()
+        return self.solutions
+
+    def collect(self, loaded):
+        """ Construit les faits déduits et enregistre leurs origines.
+
+            Seules les lignes ajoutées par le chaînage sont lues : les faits\
+            chargés sont retrouvés par leur identifiant.
+
+            :param dict loaded: le plus grand identifiant de chaque table après\
+            le chargement.
+        """
+
+        terms = self.knowledge.terms
+        facts = {}
+        for shape in set(TermIndex.shape(rule.conclusion) for rule in self.knowledge.rules):
+            table = self.tables[shape]
+            query = 'SELECT t.*, (SELECT group_concat(p.page) FROM {} AS p WHERE p.id = t.id) FROM {} AS t ' \
+                    'WHERE t.id > ?'.format(SqliteChaining.pages(shape), table)
+            for row in self.connection.execute(query, (loaded[table],)):
+                urls = EMPTY if row[-1] is None else registry.pages(map(int, row[-1].split(',')))
+                fact = Predicate([self.atom(argument) for argument in row[1:-1]], shape[0], urls)
+                facts[(table, row[0])] = fact
+                self.solutions.append(fact)
+
+        for number, identifier in self.connection.execute('SELECT rule, id FROM origins'):
+            rule = self.knowledge.rules[number]
+            shape = TermIndex.shape(rule.conclusion)
+            fact = facts.get((self.tables[shape], identifier))
+            if fact is None:
+                # Un fait chargé, conclu aussi par une règle : seule l'origine
+                # est enregistrée, le fait de la base n'est pas modifié.
+                fact = self.rows[self.tables[shape]][identifier - 1]
+            self.addOrigin(terms.intern(fact), rule)
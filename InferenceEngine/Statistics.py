@@ -0,0 +1,98 @@
+class ConditionStatistics:
+    """ Les compteurs d'une condition de règle.
+
+        :cvar self.attempts: le nombre de pattern match tentés sur la\
+        condition, ou d'environnements présentés à une garde.
+        :cvar self.successes: le nombre de ces tentatives qui ont réussi.
+        :cvar self.environments: le nombre total d'environnements partiels\
+        produits après la condition.
+        :cvar self.largest: la plus grande liste d'environnements partiels\
+        produite après la condition.
+    """
+
+    def __init__(self):
+        self.attempts = 0
+        self.successes = 0
+        self.environments = 0
+        self.largest = 0
+
+    def addEnvironments(self, count):
+        self.environments += count
+        if count > self.largest:
+            self.largest = count
+
+
+class RuleStatistics:
+    """ Les compteurs et le temps d'exécution d'une règle.
+
+        :cvar self.dependsOfCalls: le nombre de faits confrontés aux\
+        conditions de la règle : les appels à ``dependsOf`` en chaînage naïf,\
+        les parcours de ses conditions par un fait en semi-naïf.
+        :cvar self.joins: le nombre de jointures, c'est-à-dire de faits qui\
+        ont satisfait une condition de la règle.
+        :cvar self.conclusions: le nombre de conclusions instanciées.
+        :cvar self.duplicates: le nombre de ces conclusions qui étaient déjà\
+        connues.
+        :cvar self.time: le temps passé dans la règle, en secondes.
+        :cvar self.conditions: les ``ConditionStatistics`` de chaque condition,\
+        dans l'ordre de leur déclaration.
+    """
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.dependsOfCalls = 0
+        self.joins = 0
+        self.conclusions = 0
+        self.duplicates = 0
+        self.time = 0.0
+        self.conditions = [ConditionStatistics() for _ in rule.conditions]
+
+
+class Statistics:
+    """ Les statistiques d'exécution d'un moteur d'inférence, par règle et\
+        par condition.
+
+        Un moteur qui reçoit un objet ``Statistics`` le remplit pendant le\
+        chaînage ; sans lui, aucun compteur n'est tenu.
+    """
+
+    def __init__(self):
+        self.rules = {}
+
+    def reset(self):
+        """ Remet tous les compteurs à zéro. """
+
+        self.rules = {}
+
+    def of(self, rule):
+        """ Retourne les statistiques d'une règle, en les créant au besoin. """
+
+        statistics = self.rules.get(rule)
+        if statistics is None:
+            statistics = RuleStatistics(rule)
+            self.rules[rule] = statistics
+        return statistics
+
+    def time(self):
+        """ Retourne le temps total passé dans les règles, en secondes. """
+
+        return sum(statistics.time for statistics in self.rules.values())
+
+    def report(self):
+        """ Retourne un résumé des statistiques, les règles les plus lentes\
+            en premier.
+        """
+
+        lines = []
+        for statistics in sorted(self.rules.values(), key=lambda statistics: -statistics.time):
+            lines.append('{:.3f}s  {}'.format(statistics.time, statistics.rule))
+            lines.append('    dependsOf: {}, jointures: {}, conclusions: {}, doublons: {}'.format(
+                statistics.dependsOfCalls, statistics.joins, statistics.conclusions, statistics.duplicates))
+            for condition, counters in zip(statistics.rule.conditions, statistics.conditions):
+                lines.append('    {}: {}/{} pattern match réussis, {} environnements (au plus {})'.format(
+                    condition, counters.successes, counters.attempts, counters.environments, counters.largest))
+        lines.append('Total: {:.3f}s'.format(self.time()))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.report()
@@ -0,0 +1,147 @@
+from InferenceEngine.Predicate import Predicate
+
+
+class TermIndex:
+    """ Un index de faits par nom de prédicat, arité et arguments clos.
+
+        Pour une condition et un environnement donnés, l'index retourne les\
+        faits candidats, c'est-à-dire ceux qui ont le même nom, la même arité\
+        et les mêmes arguments aux positions déjà connues. Seuls ces faits\
+        peuvent satisfaire la condition.
+    """
+
+    def __init__(self, facts=None):
+        """ Construit un index.
+
+            :param list facts: les faits à indexer.
+        """
+
+        self.facts = []
+        self.byShape = {}
+        self.byArgument = {}
+        self.distinctValues = {}
+
+        if facts is not None:
+            for fact in facts:
+                self.add(fact)
+
+    @staticmethod
+    def shape(proposition):
+        """ Retourne le couple ``(nom, arité)`` d'une proposition. """
+
+        return getattr(proposition, 'name', None), len(proposition)
+
+    @staticmethod
+    def key(argument, env):
+        """ Retourne l'argument clos correspondant à ``argument`` sous\
+            l'environnement ``env``, ou ``None`` s'il n'est pas connu.
+        """
+
+        if argument.getIsVariable():
+            if env is None or argument not in env:
+                return None
+            argument = env[argument]
+
+        if isinstance(argument, Predicate) or argument.getIsVariable():
+            return None
+        return argument
+
+    def add(self, fact):
+        """ Ajoute un fait à l'index.
+
+            :param fact: un fait.
+        """
+
+        self.facts.append(fact)
+
+        shape = TermIndex.shape(fact)
+        self.byShape.setdefault(shape, []).append(fact)
+
+        if isinstance(fact, Predicate):
+            for position, argument in enumerate(fact.propositions):
+                # Un argument variable peut s'unifier avec n'importe quelle
+                # valeur : il est rangé sous la clé ``None``.
+                key = TermIndex.key(argument, None)
+                bucket = self.byArgument.get(shape + (position, key))
+                if bucket is None:
+                    bucket = []
+                    self.byArgument[shape + (position, key)] = bucket
+                    if key is not None:
+                        counter = shape + (position,)
+                        self.distinctValues[counter] = self.distinctValues.get(counter, 0) + 1
+                bucket.append(fact)
+
+    def remove(self, fact):
+        """ Retire un fait de l'index.
+
+            :param fact: un fait indexé (l'objet lui-même, et non un fait égal).
+        """
+
+        TermIndex.discard(self.facts, fact)
+
+        shape = TermIndex.shape(fact)
+        TermIndex.discard(self.byShape.get(shape, []), fact)
+
+        if isinstance(fact, Predicate):
+            for position, argument in enumerate(fact.propositions):
+                key = TermIndex.key(argument, None)
+                bucket = self.byArgument.get(shape + (position, key))
+                if bucket is None:
+                    continue
+                TermIndex.discard(bucket, fact)
+                if len(bucket) == 0:
+                    del self.byArgument[shape + (position, key)]
+                    if key is not None:
+                        self.distinctValues[shape + (position,)] -= 1
+
+    @staticmethod
+    def discard(bucket, fact):
+        for i in range(len(bucket) - 1, -1, -1):
+            if bucket[i] is fact:
+                del bucket[i]
+                return
+
+    def candidates(self, pattern, env=None):
+        """ Retourne les faits susceptibles de satisfaire un motif.
+
+            :param pattern: une proposition pouvant contenir des variables.
+            :param dict env: les substitutions déjà établies.
+            :return: la plus petite liste de faits connue qui contient tous\
+            les faits pouvant satisfaire le motif.
+        """
+
+        if not isinstance(pattern, Predicate):
+            return self.facts
+
+        shape = TermIndex.shape(pattern)
+        candidates = self.byShape.get(shape, [])
+
+        for position, argument in enumerate(pattern.propositions):
+            key = TermIndex.key(argument, env)
+            if key is None:
+                continue
+
+            bucket = self.byArgument.get(shape + (position, key), [])
+            wildcards = self.byArgument.get(shape + (position, None), [])
+            if len(bucket) + len(wildcards) < len(candidates):
+                candidates = bucket + wildcards if len(wildcards) > 0 else bucket
+
+        return candidates
+
+    def count(self, shape):
+        """ Retourne le nombre de faits indexés d'une forme ``(nom, arité)``. """
+
+        return len(self.byShape.get(shape, ()))
+
+    def distinct(self, shape, position):
+        """ Retourne le nombre de valeurs distinctes indexées à une position\
+            des faits d'une forme ``(nom, arité)``.
+        """
+
+        return self.distinctValues.get(shape + (position,), 0)
+
+    def __len__(self):
+        return len(self.facts)
+
+    def __iter__(self):
+        return iter(self.facts)
@@ -0,0 +1,132 @@
+""" Termes immuables et partagés (hash-consing) pour le moteur d'inférence.
+
+    Une ``TermTable`` associe à chaque proposition distincte un unique objet\
+    ``Term``. Deux propositions structurellement égales sont représentées par\
+    le même terme : l'égalité de deux termes est un test d'identité et leur\
+    hash est calculé une seule fois, à la création.
+
+    Les termes ne portent pas de provenance : les urls restent sur les faits\
+    de la base de connaissances, indexés par leur terme.
+
+    Une proposition garde le terme qui lui a été attribué : elle n'est\
+    parcourue qu'à son premier internement. La table ne retient pas ses\
+    termes ; un terme disparaît avec les faits et les index qui le\
+    référencent, de sorte que la table ne croît pas avec les faits retirés.
+"""
+import functools
+import weakref
+
+from InferenceEngine.Predicate import Atom, Predicate
+
+
+class Term:
+    """ Un terme immuable, créé uniquement par une ``TermTable``. """
+
+    __slots__ = ('name', 'arguments', 'isVariable', 'hash', 'table', '__weakref__')
+
+    def __init__(self, name, arguments, isVariable, table):
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'arguments', arguments)
+        object.__setattr__(self, 'isVariable', isVariable)
+        object.__setattr__(self, 'hash', hash((name, arguments, isVariable)))
+        object.__setattr__(self, 'table', table)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Terme immuable: impossible de modifier '{}'.".format(key))
+
+    def getIsAtomic(self):
+        return self.arguments is None
+
+    def getIsVariable(self):
+        return self.isVariable
+
+    def toProposition(self):
+        """ Reconstruit la proposition (sans urls) représentée par le terme. """
+
+        if self.getIsAtomic():
+            return Atom(self.name, self.isVariable)
+        return Predicate([argument.toProposition() for argument in self.arguments], self.name)
+
+    def __len__(self):
+        return 1 if self.getIsAtomic() else len(self.arguments)
+
+    def __hash__(self):
+        return self.hash
+
+    def __str__(self):
+        if self.getIsAtomic():
+            return self.name
+        return '{}({})'.format(self.name, ','.join(str(argument) for argument in self.arguments))
+
+    def __repr__(self):
+        return str(self)
+
+
+class TermTable:
+    """ Table d'unicité des termes.
+
+        Les entrées sont des références faibles : l'entrée d'un terme est\
+        retirée lorsque le terme est détruit.
+    """
+
+    def __init__(self):
+        self.atoms = {}
+        self.predicates = {}
+
+    def discard(self, entries, key, reference):
+        # Une entrée plus récente du même terme peut avoir remplacé celle-ci.
+        if entries.get(key) is reference:
+            del entries[key]
+
+    def atom(self, name, isVariable=False):
+        """ Retourne le terme unique d'un atome. """
+
+        key = (name, isVariable)
+        reference = self.atoms.get(key)
+        term = None if reference is None else reference()
+        if term is None:
+            term = Term(name, None, isVariable, self)
+            self.atoms[key] = weakref.ref(term, functools.partial(self.discard, self.atoms, key))
+        return term
+
+    def predicate(self, name, arguments):
+        """ Retourne le terme unique d'un prédicat.
+
+            :param str name: le nom du prédicat.
+            :param tuple arguments: les termes des arguments.
+        """
+
+        key = (name, arguments)
+        reference = self.predicates.get(key)
+        term = None if reference is None else reference()
+        if term is None:
+            term = Term(name, arguments, False, self)
+            self.predicates[key] = weakref.ref(term, functools.partial(self.discard, self.predicates, key))
+        return term
+
+    def intern(self, proposition):
+        """ Retourne le terme unique d'une proposition.
+
+            :param proposition: une proposition pouvant contenir des variables.
+            :return: le ``Term`` partagé par toutes les propositions égales.
+        """
+
+        term = proposition.term
+        if term is not None and term.table is self:
+            return term
+
+        if isinstance(proposition, Predicate):
+            arguments = tuple([self.intern(argument) for argument in proposition.propositions])
+            term = self.predicate(proposition.name, arguments)
+        else:
+            term = self.atom(proposition.name, proposition.getIsVariable())
+        proposition.term = term
+        return term
+
+    def __len__(self):
+        return len(self.atoms) + len(self.predicates)
+
+
+# La table partagée par les bases de connaissances : un fait passé d'une base
+# à une autre garde son terme.
+table = TermTable()
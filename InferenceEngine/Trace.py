@@ -0,0 +1,94 @@
+import atexit
+import json
+import queue
+import threading
+
+
+class StreamTrace:
+    """ Une trace écrite au fil de l'eau dans un fichier JSONL.
+
+        Les événements sont transmis à un thread d'écriture : le chaînage ne\
+        fait que les mettre en file, et leur conversion en texte comme\
+        l'écriture se font en arrière-plan. Chaque ligne du fichier est un\
+        objet ``{"type": "fact" | "rule", "event": ...}``.
+
+        Comme une liste, la trace peut être parcourue ; le fichier est alors\
+        relu une fois tous les événements en attente écrits.
+
+        La file est bornée : un chaînage plus rapide que l'écriture attend\
+        que le thread d'écriture ait rattrapé son retard, au lieu d'accumuler\
+        les événements en mémoire. Les événements en attente sont écrits à la\
+        fermeture de la trace, au plus tard à la sortie du programme.
+    """
+
+    # Demande au thread d'écriture de vider le fichier.
+    __clear = object()
+
+    def __init__(self, path, size=1000):
+        """
+            :param str path: le fichier JSONL à écrire.
+            :param int size: le nombre maximal d'événements en attente.
+        """
+
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.queue = queue.Queue(maxsize=size)
+        self.count = 0
+        self.writer = threading.Thread(target=self.write, daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def write(self):
+        while True:
+            event = self.queue.get()
+            if event is None:
+                self.queue.task_done()
+                return
+
+            if event is StreamTrace.__clear:
+                self.file.seek(0)
+                self.file.truncate()
+            else:
+                kind = 'rule' if hasattr(event, 'conclusion') else 'fact'
+                self.file.write(json.dumps({'type': kind, 'event': str(event)}, ensure_ascii=False))
+                self.file.write('\n')
+            self.queue.task_done()
+
+    def append(self, event):
+        if self.file.closed:
+            raise Exception("Trace fermée: impossible d'écrire dans '{}'.".format(self.path))
+        self.count += 1
+        self.queue.put(event)
+
+    def clear(self):
+        if self.file.closed:
+            raise Exception("Trace fermée: impossible d'écrire dans '{}'.".format(self.path))
+        self.count = 0
+        self.queue.put(StreamTrace.__clear)
+
+    def flush(self):
+        """ Attend que tous les événements en attente soient écrits. """
+
+        self.queue.join()
+        if not self.file.closed:
+            self.file.flush()
+
+    def close(self):
+        """ Écrit les événements en attente et ferme le fichier. La trace\
+            reste lisible.
+        """
+
+        atexit.unregister(self.close)
+        if self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
+        self.file.close()
+
+    def __iter__(self):
+        self.flush()
+        with open(self.path, encoding='utf-8') as lines:
+            for line in lines:
+                yield json.loads(line)['event']
+
+    def __len__(self):
+        return self.count
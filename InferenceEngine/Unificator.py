@@ -1,4 +1,4 @@
-from InferenceEngine.Predicate import Predicate
+from InferenceEngine.Predicate import Atom, Predicate
 
 
 class Unificator:
@@ -17,19 +17,14 @@ class Unificator:
             :return: le pattern dont les variables ont été remplacées les\
             propositions qui leur sont associées dans l'environnement.
         """
-        if pattern.getIsAtomic():
+        if isinstance(pattern, Atom):
             if pattern in env:
                 return self.substitute(env[pattern], env)
             else:
                 return pattern
 
-        pattern_subst = Predicate([], pattern.name, set())
-
-        for sub_pattern in pattern.propositions:
-            sub_pattern_subst = self.substitute(sub_pattern, env)
-            pattern_subst.add(sub_pattern_subst)
-
-        return pattern_subst
+        return Predicate([self.substitute(sub_pattern, env) for sub_pattern in pattern.propositions],
+                         pattern.name)
 
     def unify(self, prop1, prop2):
         """ Effectue l'unification entre deux propositions.
@@ -71,23 +66,22 @@ class Unificator:
             # Dans les autres cas, l'unification est un échec.
             return Unificator.failure
 
-        # Aucune des propositions n'est atomique : on unifie récursivement.
-        prop1_head = prop1.head()
-        prop2_head = prop2.head()
-        prop1_tail = prop1.tail()
-        prop2_tail = prop2.tail()
-        head_env = self.unify(prop1_head, prop2_head)
-        if head_env == Unificator.failure:
-            return Unificator.failure
+        # Aucune des propositions n'est atomique : on unifie les arguments un
+        # à un, en appliquant aux suivants les substitutions déjà établies.
+        env = {}
+        for i in range(len(prop1)):
+            sub_prop1 = prop1.propositions[i]
+            sub_prop2 = prop2.propositions[i]
+            if len(env) > 0:
+                sub_prop1 = self.substitute(sub_prop1, env)
+                sub_prop2 = self.substitute(sub_prop2, env)
+
+            sub_env = self.unify(sub_prop1, sub_prop2)
+            if sub_env == Unificator.failure:
+                return Unificator.failure
+            env.update(sub_env)
 
-        prop1_tail = self.substitute(prop1_tail, head_env)
-        prop2_tail = self.substitute(prop2_tail, head_env)
-        reste_env = self.unify(prop1_tail, prop2_tail)
-        if reste_env == Unificator.failure:
-            return Unificator.failure
-        #print()
-        head_env.update(reste_env)
-        return head_env
+        return env
 
     def pattern_match(self, prop1, prop2, env=None):
         """ Effectue l'unification en tenant compte d'un environnement initial.
@@ -0,0 +1,92 @@
+from InferenceEngine.TermIndex import TermIndex
+from Scraping import WikiRules
+
+
+class EventBlocks:
+    """
+    Groups the facts of the scraped events by person before chaining.
+
+    The rules only join the events of a same person: a birth is compared with
+    the death of the same p1, a wedding with the birth of one of its members.
+    Each fact is put in the block of every person it mentions, so that a
+    two-person event such as an encounter or a wedding lands in the blocks of
+    both members. A fact is then only loaded into the knowledge base if, for
+    at least one rule, the blocks of its people hold an event of every kind
+    that the rule requires of them. The other facts cannot take part in any
+    conclusion and are dropped before the joins ever see them.
+    """
+
+    def __init__(self, knowledge, people=None):
+        """
+
+        :param knowledge: The KnowledgeBase whose rules and built-ins are used
+        :param people: The person variables of the rules, WikiRules.PEOPLE by default
+        """
+        if people is None:
+            people = WikiRules.PEOPLE
+        self.knowledge = knowledge
+        self.people = set(people)
+        self.blocks = {}
+        self.pending = []
+        self.uses = self.requirements()
+        self.positions = {shape: set(position for condition, needs in uses
+                                     for position, argument in enumerate(condition.propositions)
+                                     if argument in self.people)
+                          for shape, uses in self.uses.items()}
+
+    def requirements(self):
+        """
+        :return: A dictionary mapping each (name, arity) shape to the
+        (condition, needs) pairs of the conditions of that shape, where needs
+        maps each person variable of the rule to the event names it requires
+        """
+        builtins = self.knowledge.builtins
+        derived = set(TermIndex.shape(rule.conclusion) for rule in self.knowledge.rules)
+
+        uses = {}
+        for rule in self.knowledge.rules:
+            # Derived predicates have no block: they are never required.
+            conditions = [condition for condition in rule.conditions
+                          if not builtins.isBuiltin(condition) and TermIndex.shape(condition) not in derived]
+            needs = {}
+            for condition in conditions:
+                for argument in condition.propositions:
+                    if argument in self.people:
+                        needs.setdefault(argument, set()).add(condition.name)
+            for condition in conditions:
+                uses.setdefault(TermIndex.shape(condition), []).append((condition, needs))
+        return uses
+
+    def add(self, fact):
+        for position in self.positions.get(TermIndex.shape(fact), ()):
+            self.blocks.setdefault(fact.propositions[position], set()).add(fact.name)
+        self.pending.append(fact)
+
+    def addAll(self, facts):
+        for fact in facts:
+            self.add(fact)
+
+    def isUseful(self, fact):
+        for condition, needs in self.uses.get(TermIndex.shape(fact), ()):
+            useful = True
+            for variable, argument in zip(condition.propositions, fact.propositions):
+                if variable in needs and not needs[variable] <= self.blocks.get(argument, set()):
+                    useful = False
+                    break
+            if useful:
+                return True
+        return False
+
+    def flush(self):
+        """
+        Empties the blocks.
+
+        :return: The added facts that may take part in a conclusion
+        """
+        facts = [fact for fact in self.pending if self.isUseful(fact)]
+        self.blocks = {}
+        self.pending = []
+        return facts
+
+    def __len__(self):
+        return len(self.pending)
@@ -0,0 +1,306 @@
+from DataStructures.Datastructs import LifeEvent
+from InferenceEngine.Predicate import Predicate
+from Scraping import WikiRules
+from Scraping.WikiInference import BirthInferenceChecker, DivorceInferenceChecker, ElectionAftDeathInferenceChecker, \
+    ElectionBefBirthInferenceChecker, EncounterInferenceChecker, InferenceSuite, MariageAftDeathInferenceChecker, \
+    MariageBefBirthInferenceChecker, MultiBirthInferenceChecker, MultiDeathInferenceChecker
+
+# numpy is only needed by this module, so it is imported when a check runs
+# rather than when the bot starts.
+
+COLUMNS = ['person', 'other', 'date', 'ordinal', 'location', 'page']
+
+
+def join(left, right):
+    """
+    Sort-merge equi-join of two integer key columns.
+
+    :return: The (i, j) index arrays of every pair such that left[i] == right[j]
+    """
+    import numpy
+
+    order = numpy.argsort(right, kind='stable')
+    ordered = right[order]
+    low = numpy.searchsorted(ordered, left, 'left')
+    high = numpy.searchsorted(ordered, left, 'right')
+    counts = high - low
+
+    i = numpy.repeat(numpy.arange(len(left)), counts)
+    offsets = numpy.arange(len(i)) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+    return i, order[numpy.repeat(low, counts) + offsets]
+
+
+class EventColumns:
+    """
+    The events of the scraped pages, encoded as integer columns.
+
+    There is one table per predicate name. Each row is one event of one page:
+    the ids of its first person, of its second person (-1 for a life event),
+    of its date and location, of its page, and the ordinal of its day used
+    for the chronological comparisons. The ids index the people, dates,
+    locations and pages lists, and are given by atom name, as the terms of
+    the inference engine are.
+    """
+
+    def __init__(self, resData):
+        import numpy
+
+        self.people = []
+        self.dates = []
+        self.locations = []
+        self.pages = []
+        self.ids = {}
+
+        rows = {}
+        for page in resData.data:
+            pageId = self.id(self.pages, ('page', page.url), page.url)
+            for kind in InferenceSuite.EVENTS:
+                for event in getattr(page, kind):
+                    if event is None:
+                        continue
+                    people = [event.person] if isinstance(event, LifeEvent) else event.members()
+                    date = event.date
+                    rows.setdefault(event.predicateName, []).append((
+                        self.atomId(self.people, people[0]),
+                        self.atomId(self.people, people[1]) if len(people) > 1 else -1,
+                        self.atomId(self.dates, date),
+                        # Months and days are below 100, so this keeps the
+                        # (year, month, day) order of Date.isBefore.
+                        date.year * 10000 + date.month * 100 + date.day,
+                        self.atomId(self.locations, event.location),
+                        pageId))
+
+        self.tables = {}
+        for name, values in rows.items():
+            array = numpy.array(values, dtype=numpy.int64).reshape(-1, len(COLUMNS))
+            self.tables[name] = {column: array[:, position] for position, column in enumerate(COLUMNS)}
+
+    def id(self, lookup, key, value):
+        identifier = self.ids.get(key)
+        if identifier is None:
+            identifier = len(lookup)
+            self.ids[key] = identifier
+            lookup.append(value)
+        return identifier
+
+    def atomId(self, lookup, value):
+        return self.id(lookup, (id(lookup), value.toAtom().name), value)
+
+    def table(self, name):
+        import numpy
+
+        table = self.tables.get(name)
+        if table is None:
+            table = {column: numpy.zeros(0, dtype=numpy.int64) for column in COLUMNS}
+        return table
+
+
+class VectorisedChecker:
+    """
+    Runs the date consistency checks of the inference checkers as sorted
+    joins and broadcast comparisons over EventColumns, without building any
+    fact for the events themselves.
+
+    Each check yields the same conclusions, with the same urls, as the rules
+    of its checker in an InferenceSuite. A conclusion derived by the rules of
+    several checkers is a single Predicate shared by all of them.
+    """
+
+    CHECKS = {
+        BirthInferenceChecker: 'checkBirths',
+        MultiBirthInferenceChecker: 'checkMultiBirths',
+        MultiDeathInferenceChecker: 'checkMultiDeaths',
+        EncounterInferenceChecker: 'checkEncounters',
+        ElectionBefBirthInferenceChecker: 'checkElectionsBeforeBirth',
+        ElectionAftDeathInferenceChecker: 'checkElectionsAfterDeath',
+        MariageBefBirthInferenceChecker: 'checkMariagesBeforeBirth',
+        MariageAftDeathInferenceChecker: 'checkMariagesAfterDeath',
+        DivorceInferenceChecker: 'checkDivorces'
+    }
+
+    def __init__(self, resData):
+        self.columns = EventColumns(resData)
+
+    def checkIfErrors(self, checkers):
+        """
+
+        :param checkers: The checker classes to run, which must all be in CHECKS
+        :return: A dictionary mapping each checker class to the facts deduced by its rules
+        """
+        derivations = {}
+        for checker in checkers:
+            name, arguments, pages = getattr(self, VectorisedChecker.CHECKS[checker])()
+            derivations.setdefault(name, []).append((checker, arguments, pages))
+
+        results = {checker: [] for checker in checkers}
+        for name, group in derivations.items():
+            self.conclude(name, group, results)
+        return results
+
+    def conclude(self, name, derivations, results):
+        """
+        Builds the conclusions of one predicate name and merges their urls.
+
+        :param derivations: (checker, arguments, pages) triples, where arguments
+        is a list of (lookup, ids) columns and pages the page id column of
+        every antecedent
+        """
+        import numpy
+
+        keys = []
+        owners = []
+        sources = []
+        offset = 0
+        for n, (checker, arguments, pages) in enumerate(derivations):
+            count = len(pages[0])
+            keys.append(numpy.stack([ids for lookup, ids in arguments], axis=1).reshape(count, len(arguments)))
+            owners.append(numpy.full(count, n, dtype=numpy.int64))
+            rows = numpy.arange(offset, offset + count)
+            sources.extend(numpy.stack([rows, column], axis=1) for column in pages)
+            offset += count
+        if offset == 0:
+            return
+
+        unique, inverse = numpy.unique(numpy.concatenate(keys), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        lookups = [lookup for lookup, ids in derivations[0][1]]
+
+        urls = [set() for _ in range(len(unique))]
+        sources = numpy.concatenate(sources)
+        for group, page in numpy.unique(numpy.stack([inverse[sources[:, 0]], sources[:, 1]], axis=1),
+                                        axis=0).tolist():
+            urls[group].add(self.columns.pages[page])
+
+        facts = [Predicate([lookup[identifier].toAtom() for lookup, identifier in zip(lookups, row)], name, urls[group])
+                 for group, row in enumerate(unique.tolist())]
+
+        for n, group in numpy.unique(numpy.stack([numpy.concatenate(owners), inverse], axis=1), axis=0).tolist():
+            results[derivations[n][0]].append(facts[group])
+
+    def pairs(self, first, second, before):
+        """
+        Joins the events of two tables on their first person, keeping the
+        pairs where the event of ``before`` happened on an earlier day.
+
+        :param before: 0 if the first event must be earlier, 1 if the second one
+        :return: The (i, j) index arrays of the kept pairs
+        """
+        i, j = join(first['person'], second['person'])
+        if before == 0:
+            kept = first['ordinal'][i] < second['ordinal'][j]
+        else:
+            kept = second['ordinal'][j] < first['ordinal'][i]
+        return i[kept], j[kept]
+
+    def checkBirths(self):
+        births, deaths = self.columns.table(WikiRules.birth), self.columns.table(WikiRules.death)
+        i, j = self.pairs(births, deaths, 1)
+        return WikiRules.error_date, [(self.columns.people, births['person'][i]),
+                                      (self.columns.dates, births['date'][i]),
+                                      (self.columns.dates, deaths['date'][j])], \
+            [births['page'][i], deaths['page'][j]]
+
+    def checkMultiple(self, name, conclusion):
+        events = self.columns.table(name)
+        i, j = self.pairs(events, events, 0)
+        return conclusion, [(self.columns.people, events['person'][i]),
+                            (self.columns.dates, events['date'][i]),
+                            (self.columns.dates, events['date'][j])], \
+            [events['page'][i], events['page'][j]]
+
+    def checkMultiBirths(self):
+        return self.checkMultiple(WikiRules.birth, WikiRules.error_multi_birth)
+
+    def checkMultiDeaths(self):
+        return self.checkMultiple(WikiRules.death, WikiRules.error_multi_death)
+
+    def checkLife(self, name, conclusion, afterDeath):
+        """
+        Checks an event of a person against their birth and death: it must not
+        happen before the birth, or after the death if afterDeath is set.
+        """
+        births, deaths = self.columns.table(WikiRules.birth), self.columns.table(WikiRules.death)
+        events = self.columns.table(name)
+
+        if afterDeath:
+            j, k = self.pairs(deaths, events, 0)
+            a, i = join(deaths['person'][j], births['person'])
+            j, k = j[a], k[a]
+        else:
+            i, k = self.pairs(births, events, 1)
+            a, j = join(births['person'][i], deaths['person'])
+            i, k = i[a], k[a]
+
+        arguments = [(self.columns.dates, births['date'][i]), (self.columns.dates, deaths['date'][j]),
+                     (self.columns.dates, events['date'][k]), (self.columns.locations, births['location'][i]),
+                     (self.columns.locations, deaths['location'][j]), (self.columns.locations, events['location'][k]),
+                     (self.columns.people, births['person'][i])]
+        if name == WikiRules.mariage:
+            arguments.append((self.columns.people, events['other'][k]))
+        return conclusion, arguments, [births['page'][i], deaths['page'][j], events['page'][k]]
+
+    def checkElectionsBeforeBirth(self):
+        return self.checkLife(WikiRules.election, WikiRules.error_election, False)
+
+    def checkElectionsAfterDeath(self):
+        return self.checkLife(WikiRules.election, WikiRules.error_election, True)
+
+    def checkMariagesBeforeBirth(self):
+        return self.checkLife(WikiRules.mariage, WikiRules.error_mariage, False)
+
+    def checkMariagesAfterDeath(self):
+        return self.checkLife(WikiRules.mariage, WikiRules.error_mariage, True)
+
+    def checkDivorces(self):
+        mariages = self.columns.table(WikiRules.mariage)
+        i, j = self.pairs(mariages, mariages, 0)
+        return WikiRules.divorce, [(self.columns.dates, mariages['date'][i]),
+                                   (self.columns.dates, mariages['date'][j]),
+                                   (self.columns.locations, mariages['location'][i]),
+                                   (self.columns.locations, mariages['location'][j]),
+                                   (self.columns.people, mariages['person'][i]),
+                                   (self.columns.people, mariages['other'][i]),
+                                   (self.columns.people, mariages['other'][j])], \
+            [mariages['page'][i], mariages['page'][j]]
+
+    def checkEncounters(self):
+        import numpy
+
+        encounters, positions = self.columns.table(WikiRules.encounter), self.columns.table(WikiRules.position)
+        # An encounter is joined with the positions of either person on the same date.
+        dates = len(self.columns.dates)
+        matches = []
+        for member in ['person', 'other']:
+            i, j = join(encounters[member] * dates + encounters['date'], positions['person'] * dates + positions['date'])
+            far = encounters['location'][i] != positions['location'][j]
+            matches.append((i[far], j[far]))
+        i = numpy.concatenate([i for i, j in matches])
+        j = numpy.concatenate([j for i, j in matches])
+
+        return WikiRules.warning_encounter, [(self.columns.dates, encounters['date'][i]),
+                                             (self.columns.locations, encounters['location'][i]),
+                                             (self.columns.locations, positions['location'][j]),
+                                             (self.columns.people, encounters['person'][i]),
+                                             (self.columns.people, encounters['other'][i])], \
+            [encounters['page'][i], positions['page'][j]]
+
+
+def checkIfErrorsVectorised(resData, checkers=None):
+    """
+    Runs the checkers with numpy instead of the inference engine. Checkers
+    without a vectorised check run in an InferenceSuite.
+
+    :param resData: The scraped WikiData
+    :param checkers: The checker classes to run, all of them by default
+    :return: A dictionary mapping each checker class to the facts deduced by its rules
+    """
+    if checkers is None:
+        checkers = InferenceSuite.CHECKERS
+
+    vectorised = [checker for checker in checkers if checker in VectorisedChecker.CHECKS]
+    others = [checker for checker in checkers if checker not in VectorisedChecker.CHECKS]
+
+    results = VectorisedChecker(resData).checkIfErrors(vectorised)
+    if len(others) > 0:
+        results.update(InferenceSuite(others).checkIfErrors(resData))
+    return {checker: results[checker] for checker in checkers}
@@ -1,10 +1,21 @@
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 
+from DataStructures.Datastructs import Date, LifeEvent, Location, Person
+from InferenceEngine.BackwardChainingWithVariables import BackwardChainingWithVariables
+from InferenceEngine.Chaining import Chaining
+from InferenceEngine.CompiledMatcher import CompiledMatcher
 from InferenceEngine.ForwardChainingWithVariables import ForwardChainingWithVariables
+from InferenceEngine.IncrementalChaining import IncrementalChaining
+from InferenceEngine.JoinPlanner import JoinPlanner
 from InferenceEngine.Knowledge import KnowledgeBase
+from InferenceEngine.Predicate import Atom, Predicate
 from InferenceEngine.RuleWithVariable import RuleWithVariable
-from InferenceEngine.Unificator import Unificator
+from InferenceEngine.ShardedChaining import ShardedChaining
+from InferenceEngine.Snapshot import Snapshot, save
+from InferenceEngine.SqliteChaining import SqliteChaining
 from Scraping import WikiRules
+from Scraping.EventBlocking import EventBlocks
 from Scraping.WikiRules import B_RULES, BIRTH_MULTITIMES, DEATH_MULTITIMES, DEATH_BIRTH_RULES
 
 
@@ -16,15 +27,28 @@ class InferenceChecker(metaclass=ABCMeta):
 
         self.bc = KnowledgeBase(lambda descr: RuleWithVariable(descr[0], descr[1]))
         self.bc.addFacts(facts)
+        # Rules given as text are checked against the builtins.
+        self.bc.addBuiltins(WikiRules.BUILTINS)
         self.bc.addRules(rules)
-        unificator = Unificator()
-        self.moteur = ForwardChainingWithVariables(knowledge=self.bc, method=unificator)
+        matcher = CompiledMatcher()
+        for rule in self.bc.rules:
+            matcher.compileRule(rule)
+        self.moteur = ForwardChainingWithVariables(knowledge=self.bc, method=matcher, planner=JoinPlanner())
+        # Nobody reads the trace of a production run.
+        self.moteur.setTraceMode(Chaining.TRACE_OFF)
+        self.blocks = EventBlocks(self.bc)
 
     def addFact(self, fact):
-        self.bc.addFact(fact)
+        self.blocks.add(fact)
 
     def addFacts(self, facts):
-        self.bc.addFacts(facts)
+        self.blocks.addAll(facts)
+
+    def chain(self):
+        # Only the facts that the blocking kept are loaded before chaining.
+        self.bc.addFacts(self.blocks.flush())
+        print(len(self.bc.facts))
+        return self.moteur.chain()
 
     @abstractmethod
     def checkIfErrors(self, resData):
@@ -32,97 +56,75 @@ class InferenceChecker(metaclass=ABCMeta):
 
 
 class BirthInferenceChecker(InferenceChecker):
+    RULES = DEATH_BIRTH_RULES
+
     def __init__(self, facts=None):
-        super().__init__(DEATH_BIRTH_RULES, facts)
+        super().__init__(self.RULES, facts)
 
     def checkIfErrors(self, resData):
 
         birthsFacts = []
         deathFacts = []
 
-        births = []
-        deaths = []
-
         for page in resData.data:
 
             birthsWithoutNone = list(filter(lambda x: x is not None,page.births))
             deathsWithoutNone = list(filter(lambda x: x is not None,page.deaths))
 
             birthsFacts.extend(list(map(lambda x: x.toPredicate(page.url), birthsWithoutNone)))
-            births.extend(birthsWithoutNone)
             deathFacts.extend(list(map(lambda x: x.toPredicate(page.url), deathsWithoutNone)))
-            deaths.extend(deathsWithoutNone)
 
         self.addFacts(birthsFacts)
         self.addFacts(deathFacts)
 
-        births = list(set(births))
-        deaths = list(set(deaths))
-
-        for d in deaths:
-            for b in births:
-                self.addFact(d.date.isBeforePredicate(b.date))
-        print(len(self.bc.facts))
-        return self.moteur.chain()
+        return self.chain()
 
 class MultiBirthInferenceChecker(InferenceChecker):
+    RULES = BIRTH_MULTITIMES
+
     def __init__(self, facts=None):
-        super().__init__(BIRTH_MULTITIMES, facts)
+        super().__init__(self.RULES, facts)
 
     def checkIfErrors(self, resData):
 
         birthsFacts = []
 
-        births = []
-
         for page in resData.data:
 
             birthsWithoutNone = list(filter(lambda x: x is not None,page.births))
 
             birthsFacts.extend(list(map(lambda x: x.toPredicate(page.url), birthsWithoutNone)))
-            births.extend(birthsWithoutNone)
 
         self.addFacts(birthsFacts)
 
-        births = list(set(births))
-
-        for i in range(0, len(births)):
-            for j in range(i, len(births)):
-                self.addFact(births[i].date.isDifferentPredicate(births[j].date))
-        print(len(self.bc.facts))
-        return self.moteur.chain()
+        return self.chain()
 
 class MultiDeathInferenceChecker(InferenceChecker):
+    RULES = DEATH_MULTITIMES
+
     def __init__(self, facts=None):
-        super().__init__(DEATH_MULTITIMES, facts)
+        super().__init__(self.RULES, facts)
 
     def checkIfErrors(self, resData):
 
         deathFacts = []
 
-        deaths = []
-
         for page in resData.data:
 
             deathsWithoutNone = list(filter(lambda x: x is not None,page.deaths))
 
             deathFacts.extend(list(map(lambda x: x.toPredicate(page.url), deathsWithoutNone)))
-            deaths.extend(deathsWithoutNone)
 
         self.addFacts(deathFacts)
 
-        deaths = list(set(deaths))
-
-        for i in range(0, len(deaths)):
-            for j in range(i, len(deaths)):
-                self.addFact(deaths[i].date.isDifferentPredicate(deaths[j].date))
-        print(len(self.bc.facts))
-        return self.moteur.chain()
+        return self.chain()
 
 
 class EncounterInferenceChecker(InferenceChecker):
+    RULES = WikiRules.ENCOUNTER_RULES
+
     def __init__(self, facts=None):
-        super().__init__(WikiRules.ENCOUNTER_RULES, facts)
+        super().__init__(self.RULES, facts)
 
     def checkIfErrors(self, resData):
 
@@ -136,37 +138,25 @@ class EncounterInferenceChecker(InferenceChecker):
         encountersFacts = []
         positionsFacts = []
 
-        encounters = []
-        positions = []
-
         for page in resData.data:
 
             encountersWithoutNone = list(filter(lambda x: x is not None,page.encounters))
             positionsWithoutNone = list(filter(lambda x: x is not None,page.positions))
 
             encountersFacts.extend(list(map(lambda x: x.toPredicate(page.url), encountersWithoutNone)))
-            encounters.extend(encountersWithoutNone)
             positionsFacts.extend(list(map(lambda x: x.toPredicate(page.url), positionsWithoutNone)))
-            positions.extend(positionsWithoutNone)
 
         self.addFacts(encountersFacts)
         self.addFacts(positionsFacts)
 
-        for e in encounters:
-            for p in positions:
-                temp = e.location.isFarPredicate(p.location)
-                if temp is not None:
-                    if e.person1 == p.person:
-                        self.addFact(temp)
-                    if e.person2 == p.person:
-                        self.addFact(temp)
-        print(len(self.bc.facts))
-        return self.moteur.chain()
+        return self.chain()
 
 """
 class ElectionInferenceChecker(InferenceChecker):
+    RULES = WikiRules.ELECTION_RULES
+
     def __init__(self, facts=None):
-        super().__init__(WikiRules.ELECTION_RULES, facts)
+        super().__init__(self.RULES, facts)
 
     def checkIfErrors(self, resData):
 
@@ -209,71 +199,59 @@ class ElectionInferenceChecker(InferenceChecker):
 """
 
 class ElectionBefBirthInferenceChecker(InferenceChecker):
+    RULES = WikiRules.ELECTION_BEFORE_BIRTH
+
     def __init__(self, facts=None):
-        super().__init__(WikiRules.ELECTION_BEFORE_BIRTH, facts)
+        super().__init__(self.RULES, facts)
 
     def checkIfErrors(self, resData):
 
         electionsFacts = []
         birthsFacts = []
 
-        elections = []
-        births = []
-
         for page in resData.data:
 
             electionsWithoutNone = list(filter(lambda x: x is not None,page.elections))
             birthsWithoutNone = list(filter(lambda x: x is not None,page.births))
 
             electionsFacts.extend(list(map(lambda x: x.toPredicate(page.url), electionsWithoutNone)))
-            elections.extend(electionsWithoutNone)
             birthsFacts.extend(list(map(lambda x: x.toPredicate(page.url), birthsWithoutNone)))
-            births.extend(birthsWithoutNone)
 
         self.addFacts(electionsFacts)
         self.addFacts(birthsFacts)
 
-        for e in elections:
-            for b in births:
-                self.addFact(e.date.isBeforePredicate(b.date))
-        print(len(self.bc.facts))
-        return self.moteur.chain()
+        return self.chain()
 
 class ElectionAftDeathInferenceChecker(InferenceChecker):
+    RULES = WikiRules.ELECTION_AFTER_DEATH
+
     def __init__(self, facts=None):
-        super().__init__(WikiRules.ELECTION_AFTER_DEATH, facts)
+        super().__init__(self.RULES, facts)
 
     def checkIfErrors(self, resData):
 
         electionsFacts = []
         deathFacts = []
 
-        elections = []
-        deaths = []
-
         for page in resData.data:
 
             electionsWithoutNone = list(filter(lambda x: x is not None,page.elections))
             deathsWithoutNone = list(filter(lambda x: x is not None, page.deaths))
 
             electionsFacts.extend(list(map(lambda x: x.toPredicate(page.url), electionsWithoutNone)))
-            elections.extend(electionsWithoutNone)
             deathFacts.extend(list(map(lambda x: x.toPredicate(page.url), deathsWithoutNone)))
-            deaths.extend(deathsWithoutNone)
 
         self.addFacts(electionsFacts)
         self.addFacts(deathFacts)
 
-        for e in elections:
-            for d in deaths:
-                self.addFact(d.date.isBeforePredicate(e.date))
-        print(len(self.bc.facts))
-        return self.moteur.chain()
+        return self.chain()
 
 """
 class MariageInferenceChecker(InferenceChecker):
+    RULES = WikiRules.MARIAGE_RULES
+
     def __init__(self, facts=None):
-        super().__init__(WikiRules.MARIAGE_RULES, facts)
+        super().__init__(self.RULES, facts)
 
     def checkIfErrors(self, resData):
 
@@ -321,74 +299,58 @@ class MariageInferenceChecker(InferenceChecker):
 """
 
 class MariageBefBirthInferenceChecker(InferenceChecker):
+    RULES = WikiRules.MARIAGE_BEFORE_BIRTH
+
     def __init__(self, facts=None):
-        super().__init__(WikiRules.MARIAGE_BEFORE_BIRTH, facts)
+        super().__init__(self.RULES, facts)
 
     def checkIfErrors(self, resData):
 
         mariagesFacts = []
         birthsFacts = []
 
-        mariages = []
-        births = []
-
         for page in resData.data:
 
             weddingsWithoutNone = list(filter(lambda x: x is not None,page.weddings))
             birthsWithoutNone = list(filter(lambda x: x is not None,page.births))
 
             mariagesFacts.extend(list(map(lambda x: x.toPredicate(page.url), weddingsWithoutNone)))
-            mariages.extend(weddingsWithoutNone)
             birthsFacts.extend(list(map(lambda x: x.toPredicate(page.url), birthsWithoutNone)))
-            births.extend(birthsWithoutNone)
 
         self.addFacts(mariagesFacts)
         self.addFacts(birthsFacts)
 
-
-        for m in mariages:
-            for b in births:
-                if m.person1 == b.person or m.person2 == b.person :
-                    self.addFact(m.date.isBeforePredicate(b.date))
-
-        return self.moteur.chain()
+        return self.chain()
 
 class MariageAftDeathInferenceChecker(InferenceChecker):
+    RULES = WikiRules.MARIAGE_AFTER_DEATH
+
     def __init__(self, facts=None):
-        super().__init__(WikiRules.MARIAGE_AFTER_DEATH, facts)
+        super().__init__(self.RULES, facts)
 
     def checkIfErrors(self, resData):
 
         mariagesFacts = []
         deathFacts = []
 
-        mariages = []
-        deaths = []
-
         for page in resData.data:
 
             weddingsWithoutNone = list(filter(lambda x: x is not None,page.weddings))
             deathsWithoutNone = list(filter(lambda x: x is not None, page.deaths))
 
             mariagesFacts.extend(list(map(lambda x: x.toPredicate(page.url), weddingsWithoutNone)))
-            mariages.extend(weddingsWithoutNone)
             deathFacts.extend(list(map(lambda x: x.toPredicate(page.url), deathsWithoutNone)))
-            deaths.extend(deathsWithoutNone)
 
         self.addFacts(mariagesFacts)
         self.addFacts(deathFacts)
 
-
-        for m in mariages:
-            for d in deaths:
-                if m.person1 == d.person or m.person2 == d.person :
-                    self.addFact(d.date.isBeforePredicate(m.date))
-
-        return self.moteur.chain()
+        return self.chain()
 
 class DivorceInferenceChecker(InferenceChecker):
+    RULES = WikiRules.DIVORCE_RULES
+
     def __init__(self, facts=None):
-        super().__init__(WikiRules.DIVORCE_RULES, facts)
+        super().__init__(self.RULES, facts)
 
     def checkIfErrors(self, resData):
 
@@ -399,24 +361,382 @@ class DivorceInferenceChecker(InferenceChecker):
 
         mariagesFacts = []
 
-        mariages = []
-        
         for page in resData.data:
             weddingsWithoutNone = list(filter(lambda x: x is not None, page.weddings))
 
             mariagesFacts.extend(list(map(lambda x: x.toPredicate(page.url), weddingsWithoutNone)))
-            mariages.extend(weddingsWithoutNone)
 
         self.addFacts(mariagesFacts)
 
-        for i in range(len(mariages)):
-            for j in range(i + 1, len(mariages)):
-                m = mariages[i]
-                m2 = mariages[j]
-                if  m.person1 == m2.person1 and m.date != m2.date:
-                    self.addFact(m.date.isBeforePredicate(m2.date))
+        return self.chain()
+
+class RuleInferenceChecker(InferenceChecker):
+    """
+    A checker whose rules are written as text (see InferenceEngine.RuleParser).
+    It is given every scraped event, and the blocking keeps the ones its rules
+    can use.
+    """
+    RULES = ''
+
+    def __init__(self, facts=None):
+        super().__init__(self.RULES, facts)
+
+    def checkIfErrors(self, resData):
+        for page in resData.data:
+            for kind in InferenceSuite.EVENTS:
+                self.addFacts([event.toPredicate(page.url) for event in getattr(page, kind) if event is not None])
+
+        return self.chain()
+
+
+def ruleChecker(name, rules):
+    """
+    Creates a checker from the text of its rules, for instance
+    ruleChecker('BirthChecker', 'Naissance(d1,l1,p1), Mort(d2,l2,p1), avant(d2,d1) => "Erreur de date"(p1,d1,d2)')
+
+    :return: A checker class, which can also be run in an InferenceSuite or by
+    checkIfErrorsInParallel
+    """
+    return type(name, (RuleInferenceChecker,), {'RULES': rules})
+
+
+def portableChecker(checker):
+    """
+    A class created by ruleChecker cannot be pickled, so it is sent to the
+    worker processes as its (name, rules text) pair and rebuilt there.
+
+    :return: The checker class, or the pair that describes a text checker
+    """
+    if issubclass(checker, RuleInferenceChecker):
+        return checker.__name__, checker.RULES
+    return checker
+
+
+class InferenceSuite:
+    """
+    Runs several checkers in a single chaining pass.
+
+    The scraped events are converted once into a shared knowledge base that
+    holds the rules of every checker. The conclusions are then grouped by the
+    checker whose rules derived them.
+
+    An incremental suite keeps its facts and conclusions between calls to
+    update, so that re-scraped pages only add or retract what changed.
+    """
+
+    CHECKERS = [BirthInferenceChecker, MultiBirthInferenceChecker, MultiDeathInferenceChecker,
+                EncounterInferenceChecker, ElectionBefBirthInferenceChecker, ElectionAftDeathInferenceChecker,
+                MariageBefBirthInferenceChecker, MariageAftDeathInferenceChecker, DivorceInferenceChecker]
+
+    EVENTS = ['births', 'deaths', 'encounters', 'positions', 'elections', 'weddings']
+
+    def __init__(self, checkers=None, incremental=False, database=None, stats=None, shards=None, workers=None):
+        """
+
+        :param checkers: The checker classes to run, all of them by default
+        :param incremental: Whether the suite keeps its conclusions between updates
+        :param database: The SQLite file in which the joins are run instead,
+        ':memory:' for an in-memory database
+        :param stats: A Statistics object filled by the chaining, for a suite
+        that is neither incremental nor run in SQLite
+        :param shards: The number of partitions, by person, in which the facts
+        are chained in parallel
+        :param workers: The number of processes chaining the partitions
+        """
+        if checkers is None:
+            checkers = InferenceSuite.CHECKERS
+        self.checkers = checkers
+
+        self.bc = KnowledgeBase(lambda descr: RuleWithVariable(descr[0], descr[1]))
+        self.bc.addBuiltins(WikiRules.BUILTINS)
+        self.checkerOf = {}
+        for checker in checkers:
+            first = len(self.bc.rules)
+            self.bc.addRules(checker.RULES)
+            for rule in self.bc.rules[first:]:
+                self.checkerOf[rule] = checker
+
+        matcher = CompiledMatcher()
+        for rule in self.bc.rules:
+            matcher.compileRule(rule)
+        if database is not None:
+            self.moteur = SqliteChaining(knowledge=self.bc, path=database)
+        elif shards is not None:
+            self.moteur = ShardedChaining(knowledge=self.bc, people=WikiRules.PEOPLE, shards=shards, workers=workers)
+        elif incremental:
+            self.moteur = IncrementalChaining(knowledge=self.bc, method=matcher, planner=JoinPlanner())
+        else:
+            self.moteur = ForwardChainingWithVariables(knowledge=self.bc, method=matcher,
+                                                       mode=ForwardChainingWithVariables.SEMI_NAIVE,
+                                                       planner=JoinPlanner(), stats=stats)
+        self.moteur.setTraceMode(Chaining.TRACE_OFF)
+        self.pages = {}
+        self.blocks = EventBlocks(self.bc)
+
+    def addEvents(self, resData):
+        for page in resData.data:
+            for kind in InferenceSuite.EVENTS:
+                for event in getattr(page, kind):
+                    if event is not None:
+                        self.blocks.add(event.toPredicate(page.url))
+
+    def addSnapshot(self, snapshot):
+        for entry in snapshot:
+            self.blocks.add(restoreEvent(entry))
+
+    def saveFacts(self, path):
+        """
+        Writes the facts of the knowledge base to an on-disk snapshot, from
+        which another suite can be started without converting the events again.
+
+        An incremental suite writes the facts of its scraped pages, so that a
+        suite restarted from the snapshot can update and retract them.
+        """
+        if isinstance(self.moteur, IncrementalChaining):
+            facts = (self.moteur.facts[term] for term in self.moteur.asserted)
+            save(self.bc, path, encodeValue, facts)
+        else:
+            self.bc.addFacts(self.blocks.flush())
+            save(self.bc, path, encodeValue)
+
+    def loadFacts(self, path):
+        """
+        Adds the facts of a snapshot written by saveFacts. They are not
+        filtered by the event blocks, as they were when they were saved.
+
+        An incremental suite asserts them as the facts of the pages they come
+        from, and derives their conclusions.
+        """
+        with Snapshot(path, decodeValue) as snapshot:
+            if not isinstance(self.moteur, IncrementalChaining):
+                snapshot.load(self.bc)
+                return
+
+            facts = list(snapshot.facts())
+        for fact in facts:
+            for url in fact.getUrls():
+                self.pages.setdefault(url, []).append(Predicate(fact.propositions, fact.name, {url}))
+        self.moteur.add(facts)
+
+    def checkIfErrors(self, resData):
+        """
+
+        :param resData: The scraped WikiData
+        :return: A dictionary mapping each checker class to the facts deduced by its rules
+        """
+        self.addEvents(resData)
+        return self.run()
+
+    def run(self):
+        self.bc.addFacts(self.blocks.flush())
+        solutions = self.moteur.chain()
+
+        results = {checker: [] for checker in self.checkers}
+        for solution in solutions:
+            rules = self.moteur.origins.get(self.bc.terms.intern(solution), ())
+            for checker in set(self.checkerOf[rule] for rule in rules):
+                results[checker].append(solution)
+        return results
+
+    def stream(self, resData, ruleLimit=None, nameLimits=None):
+        """
+        Checks the scraped data like checkIfErrors, but yields the conclusions
+        as soon as they are derived, without the facts of the events. Only a
+        suite chaining in memory, and not incrementally, can stream.
+
+        :param resData: The scraped WikiData
+        :param ruleLimit: The maximal number of conclusions of each rule
+        :param nameLimits: A dictionary mapping predicate names to the maximal
+        number of distinct conclusions with that name
+        :return: A generator of (checker class, fact) pairs, one for each
+        checker whose rules derived the fact
+        """
+        if not isinstance(self.moteur, ForwardChainingWithVariables) or isinstance(self.moteur, IncrementalChaining):
+            raise Exception("The chaining engine of this suite cannot stream its conclusions.")
+
+        self.addEvents(resData)
+        self.bc.addFacts(self.blocks.flush())
+
+        seen = set()
+        for fact, rule in self.moteur.stream(ruleLimit, nameLimits):
+            key = (self.bc.terms.intern(fact), self.checkerOf[rule])
+            if key not in seen:
+                seen.add(key)
+                yield key[1], fact
+
+    def checkPeople(self, resData, people):
+        """
+        Checks only the given people, by backward chaining from the conclusions
+        of the rules in which they appear.
+
+        :param resData: The scraped WikiData
+        :param people: The Person objects to check
+        :return: A dictionary mapping each checker class to the facts deduced by its rules
+        """
+        self.addEvents(resData)
+        self.bc.addFacts(self.blocks.flush())
+        engine = BackwardChainingWithVariables(self.bc)
+
+        results = {checker: [] for checker in self.checkers}
+        for person in people:
+            atom = person.toAtom()
+            for rule in self.bc.rules:
+                for variable in WikiRules.PEOPLE:
+                    if variable not in rule.conclusion.propositions:
+                        continue
+                    goal = engine.method.substitute(rule.conclusion, {variable: atom})
+                    for answer in engine.query(goal):
+                        if rule in engine.origins.get(self.bc.terms.intern(answer), ()) \
+                                and answer not in results[self.checkerOf[rule]]:
+                            results[self.checkerOf[rule]].append(answer)
+        return results
+
+    def update(self, resData, urls=()):
+        """
+        Replaces the facts of the scraped pages in an incremental suite.
+
+        :param resData: The scraped WikiData
+        :param urls: Other scraped urls, whose pages have no event anymore
+        :return: The conclusions added and the conclusions retracted
+        """
+        terms = self.bc.terms
+        facts = {url: [] for url in urls}
+        for page in resData.data:
+            facts[page.url] = [event.toPredicate(page.url) for kind in InferenceSuite.EVENTS
+                               for event in getattr(page, kind) if event is not None]
+
+        added = []
+        retracted = []
+        for url, pageFacts in facts.items():
+            old = {terms.intern(fact): fact for fact in self.pages.get(url, [])}
+            new = {terms.intern(fact): fact for fact in pageFacts}
+            retracted.extend(fact for term, fact in old.items() if term not in new)
+            added.extend(fact for term, fact in new.items() if term not in old)
+            self.pages[url] = list(new.values())
+
+        removed = self.moteur.remove(retracted)
+        return self.moteur.add(added), removed
+
+    def results(self):
+        """
+        :return: The current conclusions of an incremental suite, grouped by checker
+        """
+        results = {checker: [] for checker in self.checkers}
+        for term, rules in self.moteur.origins.items():
+            for checker in set(self.checkerOf[rule] for rule in rules):
+                results[checker].append(self.moteur.facts[term])
+        return results
+
+
+def encodeValue(value):
+    """
+    Converts the value of an atom into JSON data for a facts snapshot
+
+    :return: A list starting with the type of the value, or None for another value
+    """
+    if isinstance(value, Date):
+        return ['Date', value.year, value.month, value.day, value.hour, value.minute, value.second]
+    if isinstance(value, Location):
+        return ['Location', value.name]
+    if isinstance(value, Person):
+        return ['Person', value.name, value.lastname, value.sex]
+    return None
+
+
+def decodeValue(data):
+    """
+    Rebuilds the value of an atom converted by encodeValue
+    """
+    kind, *fields = data
+    return {'Date': Date, 'Location': Location, 'Person': Person}[kind](*fields)
+
+
+def snapshotEvents(resData):
+    """
+    Serialises the events of the scraped data into plain tuples, which are much
+    cheaper to send to another process than the WikiPage objects.
+
+    :param resData: The scraped WikiData
+    :return: A list of (predicate name, url, date, location, people) tuples
+    """
+    snapshot = []
+    for page in resData.data:
+        for kind in InferenceSuite.EVENTS:
+            for event in getattr(page, kind):
+                if event is None:
+                    continue
+                date = event.date
+                people = [event.person] if isinstance(event, LifeEvent) else event.members()
+                snapshot.append((event.predicateName, page.url,
+                                 (date.year, date.month, date.day, date.hour, date.minute, date.second),
+                                 event.location.name,
+                                 tuple((person.name, person.lastname) for person in people)))
+    return snapshot
+
+
+def restoreEvent(entry):
+    """
+    Rebuilds the fact of an event serialised by snapshotEvents
+    """
+    name, url, date, location, people = entry
+    arguments = [Date(*date).toAtom(), Location(location).toAtom()]
+    arguments.extend(Person(*person).toAtom() for person in people)
+    return Predicate(arguments, name, {url})
+
+
+def runCheckers(checkers, snapshot):
+    """
+    Runs an InferenceSuite on an event snapshot. This is the task executed by the
+    worker processes.
+
+    :param checkers: The checker classes, or the pairs given by portableChecker
+    :return: The conclusions of each checker, in the same order, as
+    (predicate name, argument names, urls) tuples. The page ids of a process
+    are meaningless in another one, so the urls are sent in clear.
+    """
+    checkers = [ruleChecker(*checker) if isinstance(checker, tuple) else checker for checker in checkers]
+    suite = InferenceSuite(checkers)
+    suite.addSnapshot(snapshot)
+    results = suite.run()
+
+    return [[(fact.name, tuple(argument.name for argument in fact.propositions), tuple(fact.getUrls()))
+             for fact in results[checker]]
+            for checker in checkers]
+
+
+def checkIfErrorsInParallel(resData, checkers=None, workers=None):
+    """
+    Runs every checker in its own process.
+
+    The conclusions are merged afterwards: a fact found by several checkers is
+    returned as a single object whose urls are the union of their urls.
+
+    :param resData: The scraped WikiData
+    :param checkers: The checker classes to run, all of them by default
+    :param workers: The number of processes, one per processor by default
+    :return: A dictionary mapping each checker class to the facts deduced by its rules
+    """
+    if checkers is None:
+        checkers = InferenceSuite.CHECKERS
+
+    snapshot = snapshotEvents(resData)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(runCheckers, [portableChecker(checker)], snapshot) for checker in checkers]
+        parts = [future.result() for future in futures]
+
+    facts = {}
+    results = {checker: [] for checker in checkers}
+    for checker, part in zip(checkers, parts):
+        for conclusions in part:
+            for name, arguments, urls in conclusions:
+                fact = facts.get((name, arguments))
+                if fact is None:
+                    fact = Predicate([Atom(argument, False) for argument in arguments], name)
+                    facts[(name, arguments)] = fact
+                fact.addUrls(urls)
+                results[checker].append(fact)
+    return results
 
-        return self.moteur.chain()
 
 if __name__ == '__main__':
     pass
@@ -1,3 +1,4 @@
+from DataStructures.Datastructs import Date, Location
 from InferenceEngine.Predicate import Atom, Predicate
 
 # Date Variables
@@ -21,6 +22,8 @@ p1 = Atom('p1', True)
 p2 = Atom('p2', True)
 p3 = Atom('p3', True)
 
+PEOPLE = [p1, p2, p3]
+
 # Name of Predicate
 before = WikiStrings.BEFORE
 different = WikiStrings.DIFFERENT
@@ -46,10 +49,55 @@ son = WikiStrings.SON
 
 error_election = WikiStrings.ERROR_ELECTION
 error_mariage = WikiStrings.ERROR_MARIAGE
+
+
+# Built-in predicates
+# The comparisons are evaluated on demand by the inference engine instead of
+# being precomputed as facts for every pair of events.
+
+def dateOf(atom):
+    if atom.value is not None:
+        return atom.value
+    return Date.fromString(atom.name)
+
+
+def locationOf(atom):
+    if atom.value is not None:
+        return atom.value
+    return Location(atom.name)
+
+
+def isBefore(first, second):
+    first, second = dateOf(first), dateOf(second)
+    return first is not None and second is not None and first.isBefore(second)
+
+
+def isDifferent(first, second):
+    first, second = dateOf(first), dateOf(second)
+    return first is not None and second is not None and first.isDifferent(second)
+
+
+def isSame(first, second):
+    first, second = dateOf(first), dateOf(second)
+    return first is not None and second is not None and not first.isDifferent(second)
+
+
+def isFar(first, second):
+    return locationOf(first).isFar(locationOf(second))
+
+
+BUILTINS = {
+    before: isBefore,
+    different: isDifferent,
+    WikiStrings.SAME: isSame,
+    far: isFar
+}
 # Rules
 
-BIRTH_MULTITIMES = [[[Predicate([d1, l1, p1], birth), Predicate([d2, l2, p1], birth), Predicate([d1, d2], different)], Predicate([p1, d1, d2], error_multi_birth)]]
-DEATH_MULTITIMES = [[[Predicate([d1, l1, p1], death), Predicate([d2, l2, p1], death), Predicate([d1, d2], different)], Predicate([p1, d1, d2], error_multi_death)]]
+# The dates are taken in chronological order, so that each pair of dates yields
+# a single conclusion.
+BIRTH_MULTITIMES = [[[Predicate([d1, l1, p1], birth), Predicate([d2, l2, p1], birth), Predicate([d1, d2], before)], Predicate([p1, d1, d2], error_multi_birth)]]
+DEATH_MULTITIMES = [[[Predicate([d1, l1, p1], death), Predicate([d2, l2, p1], death), Predicate([d1, d2], before)], Predicate([p1, d1, d2], error_multi_death)]]
 
 DEATH_BIRTH_RULES = [[[Predicate([d1, l1, p1], birth), Predicate([d2, l2, p1], death), Predicate([d2, d1], before)],
      Predicate([p1, d1, d2], error_date)]]
@@ -115,6 +115,11 @@ class TestDate(unittest.TestCase):
         self.assertEqual(Date.extractDate("01.02"), Date(1, 2))
         self.assertEqual(Date.extractDate("01"), Date(1))
 
+    def test_fromString(self):
+        self.assertEqual(Date.fromString(str(self.d1)), self.d1)
+        self.assertEqual(Date.fromString(str(Date(-44, 3, 15))), Date(-44, 3, 15))
+        self.assertIsNone(Date.fromString("Rome"))
+
 
 if __name__ == '__main__':
     unittest.main()
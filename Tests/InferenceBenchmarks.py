@@ -0,0 +1,260 @@
+"""
+Scaling benchmarks for the inference engine.
+
+Synthetic people are generated with births, deaths, elections, weddings,
+encounters and filiations, and every rule set of WikiRules is run against
+them. For each population size and rule set, the results report the time
+spent in KnowledgeBase.addFacts, in pattern matching, in
+RuleWithVariable.satisfiedBy and in ForwardChainingWithVariables.chain, the
+peak memory of loading and chaining, and the number of derived facts. The
+three measures use the same matcher, the compiled one of InferenceSuite by
+default.
+
+The rule sets are found in WikiRules itself, so a new rule set is benchmarked
+as soon as it is defined there.
+
+The facts are generated from a fixed seed, so the results of two commits
+can be compared directly. Run from the repository root:
+
+    python -m Tests.InferenceBenchmarks --sizes 1000 10000 --output bench.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from DataStructures.Datastructs import Birth, Date, Death, Election, Encounter, Location, Person, Position, Wedding
+from InferenceEngine.CompiledMatcher import CompiledMatcher
+from InferenceEngine.Filter import Filter
+from InferenceEngine.ForwardChainingWithVariables import ForwardChainingWithVariables
+from InferenceEngine.JoinPlanner import JoinPlanner
+from InferenceEngine.Knowledge import KnowledgeBase
+from InferenceEngine.Predicate import Predicate
+from InferenceEngine.RuleWithVariable import RuleWithVariable
+from InferenceEngine.TermIndex import TermIndex
+from InferenceEngine.Unificator import Unificator
+from Scraping import WikiRules
+
+SIZES = [1000, 10000, 100000]
+
+
+def isRule(description):
+    return isinstance(description, (list, tuple)) and len(description) == 2 \
+        and isinstance(description[0], list) and len(description[0]) > 0 \
+        and all(isinstance(condition, Predicate) for condition in description[0]) \
+        and isinstance(description[1], Predicate)
+
+
+def findRuleSets(module):
+    """
+    :return: The upper-case attributes of a module that are lists of rule
+    descriptions, by name. Lists of rule sets, such as B_RULES, are left out.
+    """
+    return {name: value for name, value in vars(module).items()
+            if name.isupper() and isinstance(value, list) and len(value) > 0 and all(map(isRule, value))}
+
+
+RULE_SETS = findRuleSets(WikiRules)
+
+MATCHERS = {
+    'compiled': CompiledMatcher,
+    'filter': Filter,
+    'unificator': Unificator
+}
+
+LOCATIONS = ['Lausanne', 'Geneve', 'Rome', 'Paris', 'Berne', 'Milan', 'Lyon', 'Zurich']
+
+# The number of trigger facts tried against satisfiedBy for each rule. Every
+# call is independent, so a sample is enough to follow its cost.
+SATISFIED_BY_SAMPLE = 200
+
+
+def generateFacts(size, seed=0):
+    """
+    Generates the facts of a synthetic population.
+
+    Most people have one birth and one death. Some have a second birth or
+    death, a death before their birth, or several weddings. About half of
+    them have an election, an encounter and a parent.
+
+    :param size: The number of people
+    :param seed: The seed of the generator
+    :return: A list of facts, with one url per person
+    """
+    rand = random.Random(seed)
+    people = [Person('P{}'.format(i), 'Synthetic') for i in range(size)]
+    locations = [Location(name) for name in LOCATIONS]
+
+    def date(low, high):
+        return Date(rand.randint(low, high), rand.randint(1, 12), rand.randint(1, 28))
+
+    facts = []
+    for i, person in enumerate(people):
+        url = 'http://bench/{}'.format(i)
+        born = rand.randint(1700, 1900)
+        events = [Birth(date(born, born), rand.choice(locations), person)]
+        if rand.random() < 0.05:
+            events.append(Birth(date(born - 5, born + 5), rand.choice(locations), person))
+        if rand.random() < 0.8:
+            events.append(Death(date(born - 10, born + 90), rand.choice(locations), person))
+        if rand.random() < 0.05:
+            events.append(Death(date(born, born + 90), rand.choice(locations), person))
+        if rand.random() < 0.5:
+            events.append(Election(date(born - 5, born + 95), rand.choice(locations), person))
+        for _ in range(rand.choice([0, 0, 1, 1, 1, 2])):
+            events.append(Wedding(date(born - 5, born + 60), rand.choice(locations), person, rand.choice(people)))
+        if rand.random() < 0.5:
+            when = date(born, born + 70)
+            other = rand.choice(people)
+            events.append(Encounter(when, rand.choice(locations), person, other))
+            events.append(Position(when, rand.choice(locations), other))
+
+        facts.extend(event.toPredicate(url) for event in events)
+        if i > 0 and rand.random() < 0.5:
+            parent = people[rand.randrange(i)]
+            facts.append(Predicate([person.toAtom(), parent.toAtom()], WikiRules.son, {url}))
+    return facts
+
+
+def knowledgeBase(rules, facts):
+    bc = KnowledgeBase(lambda descr: RuleWithVariable(descr[0], descr[1]))
+    bc.addBuiltins(WikiRules.BUILTINS)
+    bc.addRules(rules)
+    bc.addFacts(facts)
+    return bc
+
+
+def matcherOf(bc, matcher):
+    """
+    :return: A new matcher of the given name, compiled for the rules of bc
+    """
+    method = MATCHERS[matcher]()
+    if isinstance(method, CompiledMatcher):
+        for rule in bc.rules:
+            method.compileRule(rule)
+    return method
+
+
+def chain(rules, facts, mode, matcher):
+    """
+    :return: The number of derived facts and the time spent in chain
+    """
+    bc = knowledgeBase(rules, facts)
+    engine = ForwardChainingWithVariables(bc, method=matcherOf(bc, matcher), mode=mode, planner=JoinPlanner())
+    start = time.perf_counter()
+    solutions = engine.chain()
+    return len(solutions) - len(bc.facts), time.perf_counter() - start
+
+
+def benchmark(rules, facts, mode, matcher, memory=True):
+    """
+    Runs one rule set on one population.
+
+    :return: A dictionary of timings in seconds, peak memory in bytes and counts
+    """
+    result = {}
+
+    start = time.perf_counter()
+    bc = knowledgeBase(rules, facts)
+    result['addFacts'] = time.perf_counter() - start
+
+    method = matcherOf(bc, matcher)
+    builtins = bc.builtins
+    start = time.perf_counter()
+    matches = 0
+    for rule in bc.rules:
+        for condition in rule.conditions:
+            if builtins.isBuiltin(condition):
+                continue
+            for fact in bc.facts:
+                if method.pattern_match(fact, condition, {}) != method.failure:
+                    matches += 1
+    result['patternMatch'] = time.perf_counter() - start
+    result['matches'] = matches
+
+    index = TermIndex(bc.facts)
+    start = time.perf_counter()
+    for rule in bc.rules:
+        condition = rule.conditions[0]
+        tried = 0
+        for fact in index.candidates(condition):
+            if tried == SATISFIED_BY_SAMPLE:
+                break
+            env = method.pattern_match(fact, condition, {})
+            if env != method.failure:
+                rule.satisfiedBy(index, condition, env, method, builtins=builtins)
+                tried += 1
+    result['satisfiedBy'] = time.perf_counter() - start
+
+    result['derived'], result['chain'] = chain(rules, facts, mode, matcher)
+
+    if memory:
+        tracemalloc.start()
+        chain(rules, facts, mode, matcher)
+        result['peakMemory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result
+
+
+def revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, ruleSets, mode, matcher='compiled', memory=True, seed=0):
+    """
+    :return: The results of every rule set on every size, with the revision
+    and the interpreter they were measured with
+    """
+    results = {
+        'revision': revision(),
+        'python': platform.python_version(),
+        'mode': mode,
+        'matcher': matcher,
+        'seed': seed,
+        'sizes': {}
+    }
+    for size in sizes:
+        facts = generateFacts(size, seed)
+        results['sizes'][str(size)] = {'facts': len(facts), 'ruleSets': {}}
+        for name in ruleSets:
+            print('{} people, {}'.format(size, name), file=sys.stderr)
+            results['sizes'][str(size)]['ruleSets'][name] = benchmark(RULE_SETS[name], facts, mode, matcher,
+                                                                                 memory)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scaling benchmarks for the inference engine')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='the numbers of people')
+    parser.add_argument('--rules', nargs='+', default=list(RULE_SETS), choices=list(RULE_SETS),
+                        help='the rule sets of WikiRules to run')
+    parser.add_argument('--mode', default=ForwardChainingWithVariables.SEMI_NAIVE,
+                        choices=[ForwardChainingWithVariables.NAIVE, ForwardChainingWithVariables.SEMI_NAIVE])
+    parser.add_argument('--matcher', default='compiled', choices=list(MATCHERS),
+                        help='the pattern matcher of the engine')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help='skip the traced run that measures peak memory')
+    parser.add_argument('--output', help='the JSON file to write, stdout by default')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.rules, args.mode, args.matcher, not args.no_memory, args.seed)
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,827 @@
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+
+from DataStructures.Datastructs import Birth, Date, Death, Election, Encounter, Location, Person, Position, WikiData, \
+    WikiPage, Wedding
+from InferenceEngine.BackwardChainingWithVariables import BackwardChainingWithVariables
+from InferenceEngine.CompiledMatcher import CompiledMatcher
+from InferenceEngine.Filter import Filter
+from InferenceEngine.ForwardChainingWithVariables import ForwardChainingWithVariables
+from InferenceEngine.IncrementalChaining import IncrementalChaining
+from InferenceEngine.JoinPlanner import JoinPlanner
+from InferenceEngine.Knowledge import KnowledgeBase
+from InferenceEngine.Predicate import Atom, Predicate
+from InferenceEngine.Provenance import Provenance
+from InferenceEngine.ReteChaining import ReteChaining, ReteNetwork
+from InferenceEngine.RuleParser import parseRules
+from InferenceEngine.RuleWithVariable import RuleWithVariable
+from InferenceEngine.ShardedChaining import ShardedChaining
+from InferenceEngine.Snapshot import Snapshot, save
+from InferenceEngine.SqliteChaining import SqliteChaining
+from InferenceEngine.Statistics import Statistics
+from InferenceEngine.TermIndex import TermIndex
+from InferenceEngine.TermTable import TermTable
+from InferenceEngine.Unificator import Unificator
+from Scraping import WikiRules
+from Scraping.VectorisedInference import checkIfErrorsVectorised
+from Scraping.WikiInference import BirthInferenceChecker, ElectionAftDeathInferenceChecker, InferenceSuite, \
+    MultiBirthInferenceChecker, checkIfErrorsInParallel, restoreEvent, ruleChecker, snapshotEvents
+
+
+def knowledgeBase(rules, facts):
+    bc = KnowledgeBase(lambda descr: RuleWithVariable(descr[0], descr[1]))
+    bc.addFacts(facts)
+    bc.addRules(rules)
+    return bc
+
+
+def fact(name, *args, url=None):
+    urls = set() if url is None else {url}
+    return Predicate([Atom(arg, False) for arg in args], name, urls)
+
+
+def electionFacts():
+    return [fact('Naissance', '1900', 'Rome', 'A', url='A'),
+            fact('Mort', '1950', 'Rome', 'A', url='A'),
+            fact('Election', '1890', 'Rome', 'A', url='A'),
+            fact('Naissance', '1800', 'Rome', 'B', url='B'),
+            fact('Mort', '1850', 'Rome', 'B', url='B'),
+            fact('Election', '1820', 'Rome', 'B', url='B'),
+            fact('avant', '1890', '1900'),
+            fact('avant', '1900', '1950'),
+            fact('avant', '1820', '1850')]
+
+
+def conclusions(solutions, name):
+    return {str(solution): solution.getUrls() for solution in solutions if solution.name == name}
+
+
+class TestUnificator(unittest.TestCase):
+    def test_repeated_variable(self):
+        unificator = Unificator()
+        pattern = Predicate([WikiRules.d1, WikiRules.d1], WikiRules.before)
+
+        self.assertEqual(unificator.pattern_match(fact('avant', '1900', '1900'), pattern, {}),
+                         {WikiRules.d1: Atom('1900', False)})
+        self.assertEqual(unificator.pattern_match(fact('avant', '1890', '1900'), pattern, {}), unificator.failure)
+
+    def test_substitute(self):
+        unificator = Unificator()
+        pattern = Predicate([WikiRules.p1, WikiRules.d1], WikiRules.error_date)
+
+        self.assertEqual(unificator.substitute(pattern, {WikiRules.p1: Atom('A', False)}),
+                         Predicate([Atom('A', False), WikiRules.d1], WikiRules.error_date))
+
+
+class TestFilter(unittest.TestCase):
+    def test_same_environments_as_unificator(self):
+        unificator, matcher = Unificator(), Filter()
+        x, y = Atom('x', True), Atom('y', True)
+        cases = [(fact('avant', '1900', '1900'), Predicate([WikiRules.d1, WikiRules.d1], WikiRules.before), {}),
+                 (fact('avant', '1890', '1900'), Predicate([WikiRules.d1, WikiRules.d1], WikiRules.before), {}),
+                 (fact('avant', '1890', '1900'), Predicate([WikiRules.d1, WikiRules.d2], WikiRules.before),
+                  {WikiRules.d1: Atom('1890', False)}),
+                 (fact('avant', '1890', '1900'), Predicate([Atom('1890', False), WikiRules.d2], WikiRules.before), {}),
+                 (fact('Mort', '1950', 'Rome', 'A'), Predicate([WikiRules.d1, WikiRules.l1], WikiRules.before), {}),
+                 (Predicate([fact('f', 'a'), Atom('b', False)], 'g'), Predicate([Predicate([x], 'f'), y], 'g'), {}),
+                 (Predicate([x, Atom('b', False)], 'g'), Predicate([Atom('a', False), y], 'g'), {})]
+
+        for prop1, prop2, env in cases:
+            self.assertEqual(matcher.pattern_match(prop1, prop2, env), unificator.pattern_match(prop1, prop2, env))
+
+    def test_default_method(self):
+        rules = WikiRules.ELECTION_RULES + WikiRules.GRANDFATHER_RULES
+        facts = electionFacts() + [fact('fils', 'B', 'A', url='B'), fact('fils', 'C', 'B', url='C')]
+        engine = ForwardChainingWithVariables(knowledgeBase(rules, facts))
+        unified = ForwardChainingWithVariables(knowledgeBase(rules, facts), method=Unificator()).chain()
+
+        self.assertIsInstance(engine.method, Filter)
+        self.assertEqual({str(f): f.getUrls() for f in engine.chain()}, {str(f): f.getUrls() for f in unified})
+
+
+class TestKnowledgeBase(unittest.TestCase):
+    def test_add_facts_merges_urls(self):
+        bc = knowledgeBase([], [fact('Naissance', '1900', 'Rome', 'A', url='A'),
+                                fact('Mort', '1950', 'Rome', 'A', url='A'),
+                                fact('Naissance', '1900', 'Rome', 'A', url='B')])
+        bc.addFacts([fact('Naissance', '1900', 'Rome', 'A', url='C')])
+
+        self.assertEqual(len(bc.facts), 2)
+        self.assertEqual(bc.facts[0].getUrls(), {'A', 'B', 'C'})
+        self.assertEqual(bc.facts[1].getUrls(), {'A'})
+
+
+class TestProvenance(unittest.TestCase):
+    def test_encode_decode(self):
+        registry = Provenance()
+        pages = registry.encode(['A', 'B'])
+
+        self.assertEqual(registry.encode(['B']) | registry.encode(['A']), pages)
+        self.assertEqual(registry.decode(pages), {'A', 'B'})
+        self.assertEqual(registry.decode(registry.encode([])), set())
+        self.assertEqual(len(registry), 2)
+
+    def test_sparse_pages(self):
+        registry = Provenance()
+        for i in range(1000):
+            registry.id(str(i))
+        single = registry.encode(['999'])
+
+        self.assertEqual(single.ids, (999,))
+        self.assertIs(registry.encode(['999']), single)
+        self.assertIs(single | registry.encode(['999']), single)
+        self.assertEqual((registry.encode(['999', '3']) - single).ids, (3,))
+        self.assertFalse(single & registry.encode(['3']))
+
+    def test_default_urls_not_shared(self):
+        first = fact('Naissance', '1900', 'Rome', 'A')
+        first.addUrls(['A'])
+
+        self.assertEqual(fact('Naissance', '1900', 'Rome', 'B').getUrls(), set())
+
+
+class TestTermTable(unittest.TestCase):
+    def test_intern(self):
+        terms = TermTable()
+        birth = terms.intern(fact('Naissance', '1900', 'Rome', 'A', url='A'))
+
+        self.assertIs(birth, terms.intern(fact('Naissance', '1900', 'Rome', 'A', url='B')))
+        self.assertIsNot(birth, terms.intern(fact('Mort', '1900', 'Rome', 'A')))
+        self.assertIsNot(birth, terms.intern(fact('Naissance', 'Rome', '1900', 'A')))
+        self.assertEqual(str(birth.toProposition()), 'Naissance(1900,Rome,A)')
+
+    def test_release(self):
+        terms = TermTable()
+        birth = fact('Naissance', '1900', 'Rome', 'A')
+        term = terms.intern(birth)
+
+        self.assertIs(birth.term, term)
+        self.assertEqual(len(terms), 4)
+        del birth, term
+        self.assertEqual(len(terms), 0)
+
+    def test_predicate_hash(self):
+        self.assertNotEqual(hash(fact('Naissance', '1900', 'Rome', 'A')), hash(fact('Mort', '1900', 'Rome', 'A')))
+
+
+class TestCompiledMatcher(unittest.TestCase):
+    def test_same_environments_as_unificator(self):
+        unificator = Unificator()
+        matcher = CompiledMatcher()
+        patterns = [Predicate([WikiRules.d2, WikiRules.l2, WikiRules.p1], WikiRules.death),
+                    Predicate([WikiRules.d1, WikiRules.d1], WikiRules.before),
+                    Predicate([WikiRules.d1, Atom('1900', False)], WikiRules.before)]
+        envs = [{}, {WikiRules.p1: Atom('B', False)}, {WikiRules.d1: Atom('1890', False)}]
+
+        for fact1 in electionFacts() + [fact('avant', '1900', '1900')]:
+            for pattern in patterns:
+                for env in envs:
+                    self.assertEqual(matcher.pattern_match(fact1, pattern, env),
+                                     unificator.pattern_match(fact1, pattern, env))
+
+    def test_repeated_variable(self):
+        matcher = CompiledMatcher()
+        pattern = Predicate([WikiRules.d1, WikiRules.d1], WikiRules.before)
+
+        self.assertEqual(matcher.pattern_match(fact('avant', '1900', '1900'), pattern, {}),
+                         {WikiRules.d1: Atom('1900', False)})
+        self.assertEqual(matcher.pattern_match(fact('avant', '1890', '1900'), pattern, {}), matcher.failure)
+
+    def test_chaining(self):
+        rules = WikiRules.ELECTION_RULES
+        forward = ForwardChainingWithVariables(knowledgeBase(rules, electionFacts())).chain()
+        compiled = ForwardChainingWithVariables(knowledgeBase(rules, electionFacts()), method=CompiledMatcher()).chain()
+
+        self.assertEqual(list(map(str, forward)), list(map(str, compiled)))
+
+
+class TestJoinPlanner(unittest.TestCase):
+    def test_plan(self):
+        bc = knowledgeBase(WikiRules.ELECTION_BEFORE_BIRTH, electionFacts())
+        planner = JoinPlanner()
+        rule = bc.rules[0]
+
+        # Déclenchée par ``avant``, la règle ne commence pas par les morts,
+        # dont aucune variable n'est liée.
+        plan = planner.plan(rule, 3, bc)
+        self.assertEqual(plan[0], 3)
+        self.assertNotEqual(plan[1], 1)
+        self.assertEqual(sorted(plan), [0, 1, 2, 3])
+        self.assertIs(planner.plan(rule, 3, bc), plan)
+
+    def test_chaining(self):
+        rules = WikiRules.ELECTION_RULES + WikiRules.ELECTION_BEFORE_BIRTH
+        for mode in [ForwardChainingWithVariables.NAIVE, ForwardChainingWithVariables.SEMI_NAIVE]:
+            planned = ForwardChainingWithVariables(knowledgeBase(rules, electionFacts()), mode=mode,
+                                                   planner=JoinPlanner()).chain()
+            self.assertEqual(conclusions(planned, WikiRules.error_election),
+                             {'Erreur d\'election(1900,1950,1890,Rome,Rome,Rome,A)': {'A'}})
+
+
+class TestReteChaining(unittest.TestCase):
+    def test_same_conclusions_as_forward_chaining(self):
+        rules = WikiRules.ELECTION_RULES + WikiRules.ELECTION_BEFORE_BIRTH
+        forward = ForwardChainingWithVariables(knowledgeBase(rules, electionFacts())).chain()
+        rete = ReteChaining(knowledgeBase(rules, electionFacts())).chain()
+
+        self.assertEqual(set(map(str, forward)), set(map(str, rete)))
+        self.assertEqual(conclusions(rete, WikiRules.error_election),
+                         {'Erreur d\'election(1900,1950,1890,Rome,Rome,Rome,A)': {'A'}})
+
+    def test_shared_prefix(self):
+        bc = knowledgeBase(WikiRules.ELECTION_RULES, [])
+        network = ReteNetwork(bc.rules, Unificator())
+
+        # Les trois règles partagent les trois premières conditions.
+        self.assertEqual(len(network.root.children), 1)
+        self.assertEqual(len(network.alphas), 7)
+
+    def test_recursive_rules(self):
+        facts = [fact('fils', 'B', 'A'), fact('fils', 'C', 'B')]
+        rete = ReteChaining(knowledgeBase(WikiRules.GRANDFATHER_RULES, facts)).chain()
+
+        self.assertIn('grand-père(A,C)', map(str, rete))
+
+
+class TestSqliteChaining(unittest.TestCase):
+    def test_same_conclusions_as_forward_chaining(self):
+        rules = WikiRules.ELECTION_RULES + WikiRules.GRANDFATHER_RULES
+        facts = electionFacts() + [fact('fils', 'B', 'A', url='B'), fact('fils', 'C', 'B', url='C')]
+        forward = ForwardChainingWithVariables(knowledgeBase(rules, facts)).chain()
+        sqlite = SqliteChaining(knowledgeBase(rules, facts)).chain()
+
+        self.assertEqual({str(f): f.getUrls() for f in sqlite}, {str(f): f.getUrls() for f in forward})
+        self.assertEqual(conclusions(sqlite, WikiRules.grandfather), {'grand-père(A,C)': {'B', 'C'}})
+
+    def test_input_facts(self):
+        known = fact('grand-père', 'A', 'C', url='X')
+        bc = knowledgeBase(WikiRules.GRANDFATHER_RULES, [known, fact('fils', 'B', 'A', url='B'),
+                                                         fact('fils', 'C', 'B', url='C')])
+        engine = SqliteChaining(bc)
+        solutions = engine.chain()
+
+        self.assertEqual(known.getUrls(), {'X'})
+        self.assertEqual(conclusions(solutions, WikiRules.grandfather), {'grand-père(A,C)': {'X'}})
+        self.assertIn(bc.terms.intern(known), engine.origins)
+        engine.close()
+
+    def test_builtins_and_origins(self):
+        rules = WikiRules.ELECTION_RULES + WikiRules.ELECTION_BEFORE_BIRTH
+        forward = ForwardChainingWithVariables(TestBuiltins.builtinKnowledgeBase(rules))
+        forward.chain()
+        engine = SqliteChaining(TestBuiltins.builtinKnowledgeBase(rules))
+        solutions = engine.chain()
+
+        self.assertEqual(conclusions(solutions, WikiRules.error_election),
+                         {'Erreur d\'election(1900,1950,1890,Rome,Rome,Rome,A)': {'A'}})
+        self.assertEqual({str(term.toProposition()): len(rules) for term, rules in engine.origins.items()},
+                         {str(term.toProposition()): len(rules) for term, rules in forward.origins.items()})
+        engine.close()
+
+
+class TestShardedChaining(unittest.TestCase):
+    def test_same_conclusions_as_forward_chaining(self):
+        rules = WikiRules.ELECTION_RULES + WikiRules.GRANDFATHER_RULES
+        facts = electionFacts() + [fact('fils', 'B', 'A', url='B'), fact('fils', 'C', 'B', url='C')]
+        forward = ForwardChainingWithVariables(knowledgeBase(rules, facts)).chain()
+        engine = ShardedChaining(knowledgeBase(rules, facts), WikiRules.PEOPLE, shards=3, workers=1)
+        sharded = engine.chain()
+
+        self.assertEqual({str(f): f.getUrls() for f in sharded}, {str(f): f.getUrls() for f in forward})
+        self.assertEqual(conclusions(sharded, WikiRules.grandfather), {'grand-père(A,C)': {'B', 'C'}})
+
+    def test_cross_partition_rules(self):
+        rules = WikiRules.DIVORCE_RULES + WikiRules.ENCOUNTER_RULES + WikiRules.GRANDFATHER_RULES
+        engine = ShardedChaining(knowledgeBase(rules, []), WikiRules.PEOPLE)
+
+        self.assertEqual([str(engine.key(rule)) for rule in engine.knowledge.rules],
+                         ['p1', 'p1', 'p2', 'p1', 'None'])
+
+
+class TestSemiNaiveChaining(unittest.TestCase):
+    def test_same_solutions_as_naive(self):
+        rules = WikiRules.ELECTION_RULES + WikiRules.GRANDFATHER_RULES
+        facts = electionFacts() + [fact('fils', 'B', 'A', url='B'), fact('fils', 'C', 'B', url='C'),
+                                 fact('fils', 'D', 'C', url='D')]
+        naive = ForwardChainingWithVariables(knowledgeBase(rules, facts)).chain()
+        seminaive = ForwardChainingWithVariables(knowledgeBase(rules, facts),
+                                                 mode=ForwardChainingWithVariables.SEMI_NAIVE).chain()
+
+        self.assertEqual(set(map(str, naive)), set(map(str, seminaive)))
+        self.assertEqual(len(seminaive), len(set(map(str, seminaive))))
+        self.assertEqual(conclusions(seminaive, WikiRules.error_election),
+                         conclusions(naive, WikiRules.error_election))
+
+
+class TestStream(unittest.TestCase):
+    RULES = WikiRules.ELECTION_RULES + WikiRules.GRANDFATHER_RULES
+
+    @staticmethod
+    def facts():
+        return electionFacts() + [fact('fils', 'B', 'A', url='B'), fact('fils', 'C', 'B', url='C'),
+                                  fact('fils', 'D', 'C', url='D')]
+
+    def test_same_conclusions_as_chain(self):
+        engine = ForwardChainingWithVariables(knowledgeBase(TestStream.RULES, TestStream.facts()))
+        solutions = engine.chain()
+        derived = solutions[len(engine.knowledge.facts):]
+        origins = {term: set(rules) for term, rules in engine.origins.items()}
+
+        streamed = list(engine.stream())
+        self.assertEqual(len(engine.solutions), 0)
+        self.assertEqual({str(f): f.getUrls() for f, rule in streamed}, {str(f): f.getUrls() for f in derived})
+        self.assertEqual(len(streamed), sum(len(rules) for rules in origins.values()))
+        self.assertEqual(engine.origins, origins)
+
+    def test_limits(self):
+        engine = ForwardChainingWithVariables(knowledgeBase(TestStream.RULES, TestStream.facts()))
+        streamed = list(engine.stream(ruleLimit=1))
+        self.assertEqual(len(streamed), len(set(rule for f, rule in streamed)))
+
+        streamed = list(engine.stream(nameLimits={WikiRules.father: 1}))
+        self.assertEqual(len([f for f, rule in streamed if f.name == WikiRules.father]), 1)
+        # Un seul fait père ne permet de déduire aucun grand-père.
+        self.assertEqual(len([f for f, rule in streamed if f.name == WikiRules.grandfather]), 0)
+
+        generator = engine.stream()
+        next(generator)
+        generator.close()
+
+    def test_input_facts(self):
+        facts = TestStream.facts() + [fact('père', 'A', 'B', url='A')]
+        engine = ForwardChainingWithVariables(knowledgeBase(TestStream.RULES, facts))
+        streamed = list(engine.stream(nameLimits={WikiRules.father: 2}))
+
+        # père(A,B), conclu de fils(B,A), est un fait de départ : il n'est pas
+        # produit et ne compte pas dans la limite.
+        self.assertEqual(sorted(str(f) for f, rule in streamed if f.name == WikiRules.father),
+                         ['père(B,C)', 'père(C,D)'])
+        self.assertEqual(len(engine.origins[engine.knowledge.terms.intern(facts[-1])]), 1)
+
+
+class TestStatistics(unittest.TestCase):
+    def test_counters(self):
+        rules = WikiRules.ELECTION_BEFORE_BIRTH
+        for mode in [ForwardChainingWithVariables.NAIVE, ForwardChainingWithVariables.SEMI_NAIVE]:
+            stats = Statistics()
+            engine = ForwardChainingWithVariables(knowledgeBase(rules, electionFacts()), mode=mode, stats=stats)
+            engine.chain()
+
+            counters = stats.of(engine.knowledge.rules[0])
+            self.assertEqual(counters.conclusions - counters.duplicates, 1)
+            self.assertEqual(counters.joins, len(electionFacts()))
+            self.assertEqual([c.successes > 0 for c in counters.conditions], [True] * 4)
+            self.assertEqual(counters.dependsOfCalls, len(engine.solutions))
+            self.assertGreaterEqual(counters.time, 0)
+            self.assertIn('Total', stats.report())
+
+    def test_reset(self):
+        stats = Statistics()
+        engine = ForwardChainingWithVariables(knowledgeBase(WikiRules.ELECTION_BEFORE_BIRTH, electionFacts()), stats=stats)
+        engine.chain()
+        first = stats.of(engine.knowledge.rules[0]).dependsOfCalls
+        engine.chain()
+
+        self.assertEqual(first, len(engine.solutions))
+        self.assertEqual(stats.of(engine.knowledge.rules[0]).dependsOfCalls, first)
+
+
+class TestTrace(unittest.TestCase):
+    def engine(self):
+        return ForwardChainingWithVariables(knowledgeBase(WikiRules.ELECTION_BEFORE_BIRTH, electionFacts()))
+
+    def test_modes(self):
+        full = self.engine()
+        full.chain()
+
+        ring = self.engine()
+        ring.setTraceMode(ForwardChainingWithVariables.TRACE_RING, size=3)
+        ring.chain()
+        self.assertEqual(list(map(str, ring.trace)), list(map(str, full.trace[-3:])))
+
+        off = self.engine()
+        off.setTraceMode(ForwardChainingWithVariables.TRACE_OFF)
+        self.assertEqual(off.chain(), full.solutions)
+        self.assertEqual(len(off.trace), 0)
+
+    def test_stream(self):
+        full = self.engine()
+        full.chain()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.jsonl')
+            engine = self.engine()
+            engine.setTraceMode(ForwardChainingWithVariables.TRACE_STREAM, path=path)
+            engine.chain()
+            engine.chain()
+
+            self.assertEqual(list(engine.trace), list(map(str, full.trace)))
+            self.assertEqual(len(engine.trace), len(full.trace))
+            engine.setTraceMode(ForwardChainingWithVariables.TRACE_FULL)
+            with open(path, encoding='utf-8') as lines:
+                kinds = [json.loads(line)['type'] for line in lines]
+            self.assertEqual(kinds.count('rule'), len([e for e in full.trace if isinstance(e, RuleWithVariable)]))
+
+    def test_close_stream(self):
+        full = self.engine()
+        full.chain()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.jsonl')
+            with self.engine() as engine:
+                engine.setTraceMode(ForwardChainingWithVariables.TRACE_STREAM, size=2, path=path)
+                self.assertEqual(engine.trace.queue.maxsize, 2)
+                engine.chain()
+
+            self.assertTrue(engine.trace.file.closed)
+            with open(path, encoding='utf-8') as lines:
+                self.assertEqual(len(lines.readlines()), len(full.trace))
+            self.assertRaises(Exception, engine.chain)
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_round_trip(self):
+        facts = electionFacts() + [fact('fils', 'B', 'A', url='B'), fact('fils', 'C', 'B', url='C')]
+        facts[0].addUrls({'A2'})
+        bc = knowledgeBase(WikiRules.ELECTION_RULES, facts)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'facts.snapshot')
+            save(bc, path)
+            with Snapshot(path) as snapshot:
+                self.assertEqual(len(snapshot), len(facts))
+                self.assertEqual(list(map(str, snapshot.facts(9, 11))), ['fils(B,A)', 'fils(C,B)'])
+                loaded = snapshot.load(knowledgeBase(WikiRules.ELECTION_RULES, []))
+
+        self.assertEqual([(str(f), f.getUrls()) for f in loaded.facts], [(str(f), f.getUrls()) for f in facts])
+        self.assertEqual(list(map(str, loaded.candidates(Predicate([Atom('p1', True), Atom('B', False)], 'fils')))),
+                         ['fils(C,B)'])
+        self.assertEqual(set(map(str, ForwardChainingWithVariables(loaded).chain())),
+                         set(map(str, ForwardChainingWithVariables(bc).chain())))
+
+    def test_load_into_filled_base(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'facts.snapshot')
+            save(knowledgeBase([], electionFacts()), path)
+            with Snapshot(path) as snapshot:
+                bc = snapshot.load(knowledgeBase([], [fact('Naissance', '1900', 'Rome', 'A', url='C')]))
+
+        self.assertEqual(len(bc.facts), len(electionFacts()))
+        self.assertEqual(bc.facts[0].getUrls(), {'A', 'C'})
+
+
+class TestRuleParser(unittest.TestCase):
+    RULES = '''
+        # Le format de WikiRules.ELECTION_BEFORE_BIRTH et GRANDFATHER_RULES
+        Naissance(d1,l1,p1), Mort(d2,l2,p1), Election(d3,l3,p1), avant(d3,d1)
+            => "Erreur d'election"(d1,d2,d3,l1,l2,l3,p1)
+        fils(p1,p2) => père(p2,p1);
+        père(p1,p2), père(p2,p3) => grand-père(p1,p3)
+    '''
+
+    def test_parse(self):
+        expected = WikiRules.ELECTION_BEFORE_BIRTH + WikiRules.GRANDFATHER_RULES
+        descriptions = parseRules(TestRuleParser.RULES)
+
+        self.assertEqual([(list(map(str, conditions)), str(conclusion)) for conditions, conclusion in descriptions],
+                         [(list(map(str, conditions)), str(conclusion)) for conditions, conclusion in expected])
+        self.assertEqual(parseRules('Election(d1,"Rome",1890) => élu(d1)')[0][0][0].propositions,
+                         (Atom('d1', True), Atom('Rome', False), Atom('1890', False)))
+
+        bc = knowledgeBase([], electionFacts())
+        bc.addRules(TestRuleParser.RULES)
+        self.assertEqual(set(map(str, ForwardChainingWithVariables(bc).chain())),
+                         set(map(str, ForwardChainingWithVariables(knowledgeBase(expected, electionFacts())).chain())))
+
+    def test_safety(self):
+        builtins = TestBuiltins.builtinKnowledgeBase([]).builtins
+        for text in ['Naissance(d1,l1,p1) => Mort(d2,l1,p1)', 'Naissance(d1,l1,p1), avant(d1,d2) => vivant(p1)',
+                     'avant(d1,d2) => avant(d2,d1)', 'Naissance(d1,l1,p1) =>', 'Naissance(d1,l1 => vivant(p1)']:
+            with self.assertRaises(Exception):
+                parseRules(text, builtins)
+
+
+class TestBuiltins(unittest.TestCase):
+    @staticmethod
+    def builtinKnowledgeBase(rules):
+        facts = [f for f in electionFacts() if f.name != WikiRules.before]
+        bc = knowledgeBase(rules, facts)
+        bc.addBuiltin(WikiRules.before, lambda first, second: int(first.name) < int(second.name))
+        return bc
+
+    def test_schedule(self):
+        bc = self.builtinKnowledgeBase(WikiRules.ELECTION_BEFORE_BIRTH)
+        rule = bc.rules[0]
+
+        # La garde ``avant(d3, d1)`` suit immédiatement l'élection, qui lie d3.
+        self.assertEqual(rule.schedule([0, 1, 2, 3], bc.builtins), [0, 1, 2, 3])
+        self.assertEqual(rule.schedule([2, 1, 0, 3], bc.builtins), [2, 1, 0, 3])
+        self.assertEqual(rule.schedule([0, 2, 1, 3], bc.builtins), [0, 2, 3, 1])
+        self.assertEqual(rule.schedule([1, 3, 0, 2], bc.builtins, {WikiRules.d1, WikiRules.d3}), [3, 1, 0, 2])
+
+    def test_guards_replace_facts(self):
+        rules = WikiRules.ELECTION_RULES + WikiRules.ELECTION_BEFORE_BIRTH
+        expected = {'Erreur d\'election(1900,1950,1890,Rome,Rome,Rome,A)': {'A'}}
+
+        for mode in [ForwardChainingWithVariables.NAIVE, ForwardChainingWithVariables.SEMI_NAIVE]:
+            solutions = ForwardChainingWithVariables(self.builtinKnowledgeBase(rules), mode=mode,
+                                                     planner=JoinPlanner()).chain()
+            self.assertEqual(conclusions(solutions, WikiRules.error_election), expected)
+
+        rete = ReteChaining(self.builtinKnowledgeBase(rules)).chain()
+        self.assertEqual(conclusions(rete, WikiRules.error_election), expected)
+        self.assertEqual(conclusions(rete, WikiRules.before), {})
+
+    def test_date_comparisons(self):
+        first, second = Date(1900).toAtom(), Date(1905).toAtom()
+
+        self.assertTrue(WikiRules.isDifferent(first, second))
+        self.assertTrue(WikiRules.isDifferent(second, first))
+        self.assertFalse(WikiRules.isDifferent(first, Date(1900).toAtom()))
+        self.assertTrue(WikiRules.isBefore(first, second))
+        self.assertFalse(WikiRules.isBefore(second, first))
+
+
+class TestTermIndex(unittest.TestCase):
+    def test_candidates(self):
+        index = TermIndex(electionFacts())
+        death = Predicate([WikiRules.d2, WikiRules.l2, WikiRules.p1], WikiRules.death)
+
+        self.assertEqual(len(index.candidates(death)), 2)
+        self.assertEqual(index.candidates(death, {WikiRules.p1: Atom('B', False)}),
+                         [fact('Mort', '1850', 'Rome', 'B')])
+        self.assertEqual(index.candidates(death, {WikiRules.p1: Atom('C', False)}), [])
+
+    def test_knowledge_base_candidates(self):
+        bc = knowledgeBase([], electionFacts())
+        before = Predicate([WikiRules.d3, WikiRules.d1], WikiRules.before)
+
+        self.assertEqual(bc.candidates(before, {WikiRules.d1: Atom('1900', False)}),
+                         [fact('avant', '1890', '1900')])
+
+
+class TestBackwardChaining(unittest.TestCase):
+    def test_same_solutions_as_forward_chaining(self):
+        rules = WikiRules.ELECTION_RULES + WikiRules.GRANDFATHER_RULES
+        facts = electionFacts() + [fact('fils', 'B', 'A', url='B'), fact('fils', 'C', 'B', url='C')]
+        forward = ForwardChainingWithVariables(knowledgeBase(rules, facts)).chain()
+        backward = BackwardChainingWithVariables(knowledgeBase(rules, facts)).chain()
+
+        self.assertEqual(set(map(str, backward)), set(map(str, forward)))
+        self.assertEqual(conclusions(backward, WikiRules.error_election),
+                         conclusions(forward, WikiRules.error_election))
+
+    def test_query(self):
+        rules = WikiRules.ELECTION_RULES + WikiRules.ELECTION_BEFORE_BIRTH
+        engine = BackwardChainingWithVariables(knowledgeBase(rules, electionFacts()))
+        goal = Predicate([WikiRules.d1, WikiRules.d2, WikiRules.d3, WikiRules.l1, WikiRules.l2, WikiRules.l3,
+                          Atom('B', False)], WikiRules.error_election)
+
+        self.assertEqual(engine.query(goal), [])
+        self.assertEqual(len(engine.query(Predicate(goal.propositions[:-1] + (WikiRules.p2,), goal.name))), 1)
+
+    def test_recursive_rules(self):
+        x, y, z = Atom('x', True), Atom('y', True), Atom('z', True)
+        rules = [[[Predicate([x, y], 'père')], Predicate([x, y], 'ancêtre')],
+                 [[Predicate([x, y], 'père'), Predicate([y, z], 'ancêtre')], Predicate([x, z], 'ancêtre')]]
+        facts = [fact('père', 'A', 'B'), fact('père', 'B', 'C'), fact('père', 'C', 'A')]
+        engine = BackwardChainingWithVariables(knowledgeBase(rules, facts))
+
+        answers = engine.query(Predicate([Atom('A', False), z], 'ancêtre'))
+        self.assertEqual(set(map(str, answers)), {'ancêtre(A,A)', 'ancêtre(A,B)', 'ancêtre(A,C)'})
+
+
+class TestIncrementalChaining(unittest.TestCase):
+    def test_same_solutions_as_chain(self):
+        rules = WikiRules.ELECTION_RULES + WikiRules.GRANDFATHER_RULES
+        facts = electionFacts() + [fact('fils', 'B', 'A', url='B'), fact('fils', 'C', 'B', url='C')]
+        forward = ForwardChainingWithVariables(knowledgeBase(rules, facts)).chain()
+
+        engine = IncrementalChaining(knowledgeBase(rules, []))
+        engine.add(facts[:4])
+        engine.add(facts[4:])
+        self.assertEqual(set(map(str, engine.facts.values())), set(map(str, forward)))
+
+    def test_retraction(self):
+        rules = WikiRules.ELECTION_BEFORE_BIRTH + WikiRules.GRANDFATHER_RULES
+        engine = IncrementalChaining(knowledgeBase(rules, []))
+        engine.add(electionFacts() + [fact('fils', 'B', 'A', url='B'), fact('fils', 'C', 'B', url='C')])
+
+        removed = engine.remove([fact('fils', 'C', 'B', url='C')])
+        self.assertEqual(set(map(str, removed)), {'père(B,C)', 'grand-père(A,C)'})
+
+        # L'élection de A reste affirmée par la page E : la conclusion est
+        # conservée, mais ne cite plus la page A.
+        engine.add([fact('Election', '1890', 'Rome', 'A', url='E')])
+        self.assertEqual(engine.remove([fact('Election', '1890', 'Rome', 'A', url='A')]), [])
+        self.assertEqual(conclusions(engine.facts.values(), WikiRules.error_election),
+                         {'Erreur d\'election(1900,1950,1890,Rome,Rome,Rome,A)': {'A', 'E'}})
+
+        removed = engine.remove([fact('avant', '1890', '1900')])
+        self.assertEqual(list(map(str, removed)), ['Erreur d\'election(1900,1950,1890,Rome,Rome,Rome,A)'])
+        self.assertNotIn(WikiRules.error_election, [f.name for f in engine.facts.values()])
+
+
+class TestInferenceSuite(unittest.TestCase):
+    @staticmethod
+    def wikiData():
+        page = WikiPage('http://wiki/A')
+        person = Person('A', 'a')
+        rome = Location('Rome')
+        page.births.add(Birth(Date(1900), rome, person))
+        page.births.add(Birth(Date(1905), rome, person))
+        page.deaths.add(Death(Date(1890), rome, person))
+        page.elections.add(Election(Date(1895), rome, person))
+
+        data = WikiData()
+        data.add(page)
+        return data
+
+    def test_conclusions_by_checker(self):
+        suite = InferenceSuite()
+        results = suite.checkIfErrors(self.wikiData())
+
+        self.assertEqual(set(results), set(InferenceSuite.CHECKERS))
+        self.assertEqual(len(results[BirthInferenceChecker]), 2)
+        self.assertEqual(list(map(str, results[MultiBirthInferenceChecker])),
+                         ['Plusieurs naissances(A a,1900.0.0 - 0:0:0,1905.0.0 - 0:0:0)'])
+        self.assertEqual(len(results[ElectionAftDeathInferenceChecker]), 2)
+        for facts in results.values():
+            for solution in facts:
+                self.assertEqual(solution.getUrls(), {'http://wiki/A'})
+
+    def test_sqlite(self):
+        expected = InferenceSuite().checkIfErrors(self.wikiData())
+        results = InferenceSuite(database=':memory:').checkIfErrors(self.wikiData())
+
+        for checker, facts in expected.items():
+            self.assertEqual({str(f): f.getUrls() for f in results[checker]}, {str(f): f.getUrls() for f in facts})
+
+    def test_save_and_load_facts(self):
+        expected = InferenceSuite().checkIfErrors(self.wikiData())
+        suite = InferenceSuite()
+        suite.addEvents(self.wikiData())
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'facts.snapshot')
+            suite.saveFacts(path)
+            restarted = InferenceSuite()
+            restarted.loadFacts(path)
+
+        self.assertEqual(len(restarted.bc.facts), len(suite.bc.facts))
+        results = restarted.run()
+        for checker, facts in expected.items():
+            self.assertEqual({str(f): f.getUrls() for f in results[checker]}, {str(f): f.getUrls() for f in facts})
+
+    def test_rule_checker(self):
+        checker = ruleChecker('TextBirthChecker',
+                              'Naissance(d1,l1,p1), Mort(d2,l2,p1), avant(d2,d1) => "Erreur de date"(p1,d1,d2)')
+        expected = InferenceSuite([BirthInferenceChecker]).checkIfErrors(self.wikiData())[BirthInferenceChecker]
+        results = InferenceSuite([checker]).checkIfErrors(self.wikiData())[checker]
+
+        self.assertEqual({str(f): f.getUrls() for f in results}, {str(f): f.getUrls() for f in expected})
+        self.assertEqual(set(map(str, checker().checkIfErrors(self.wikiData()))) & set(map(str, results)),
+                         set(map(str, results)))
+
+    def test_stream(self):
+        expected = InferenceSuite().checkIfErrors(self.wikiData())
+        results = {checker: [] for checker in expected}
+        for checker, fact in InferenceSuite().stream(self.wikiData()):
+            results[checker].append(fact)
+
+        for checker, facts in expected.items():
+            self.assertEqual(sorted(map(str, results[checker])), sorted(map(str, facts)))
+        with self.assertRaises(Exception):
+            next(InferenceSuite(database=':memory:').stream(self.wikiData()))
+
+    def test_sharded(self):
+        expected = InferenceSuite().checkIfErrors(self.wikiData())
+        results = InferenceSuite(shards=2, workers=2).checkIfErrors(self.wikiData())
+
+        for checker, facts in expected.items():
+            self.assertEqual({str(f): f.getUrls() for f in results[checker]}, {str(f): f.getUrls() for f in facts})
+
+    @unittest.skipUnless(importlib.util.find_spec('numpy'), 'numpy is not installed')
+    def test_vectorised(self):
+        data = self.wikiData()
+        page = WikiPage('http://wiki/B')
+        a, b = Person('A', 'a'), Person('B', 'b')
+        page.births.add(Birth(Date(1880), Location('Rome'), b))
+        page.deaths.add(Death(Date(1870), Location('Paris'), b))
+        page.weddings.add(Wedding(Date(1860), Location('Rome'), b, a))
+        page.weddings.add(Wedding(Date(1865), Location('Paris'), b, Person('C', 'c')))
+        page.encounters.add(Encounter(Date(1895), Location('Paris'), b, a))
+        page.positions.add(Position(Date(1895), Location('Rome'), a))
+        data.add(page)
+
+        expected = InferenceSuite().checkIfErrors(data)
+        results = checkIfErrorsVectorised(data)
+
+        self.assertEqual(list(results), list(expected))
+        for checker, facts in expected.items():
+            self.assertEqual({str(f): f.getUrls() for f in results[checker]}, {str(f): f.getUrls() for f in facts})
+
+    def test_same_conclusions_as_checkers(self):
+        results = InferenceSuite([BirthInferenceChecker, MultiBirthInferenceChecker]).checkIfErrors(self.wikiData())
+
+        for checker in [BirthInferenceChecker, MultiBirthInferenceChecker]:
+            solutions = checker().checkIfErrors(self.wikiData())
+            expected = [solution for solution in solutions if solution.name == checker.RULES[0][1].name]
+            self.assertEqual(set(map(str, results[checker])), set(map(str, expected)))
+
+    def test_blocking(self):
+        data = self.wikiData()
+        other = WikiPage('http://wiki/B')
+        # B n'a ni mort ni naissance : son élection ne peut rien conclure.
+        other.elections.add(Election(Date(1800), Location('Rome'), Person('B', 'b')))
+        other.births.add(Birth(Date(1700), Location('Rome'), Person('C', 'c')))
+        data.add(other)
+
+        suite = InferenceSuite([ElectionAftDeathInferenceChecker])
+        suite.addEvents(data)
+        self.assertEqual(len(suite.blocks), 6)
+
+        kept = suite.blocks.flush()
+        self.assertEqual(len(kept), 4)
+        self.assertEqual(set(f.propositions[2].name for f in kept), {'A a'})
+        self.assertEqual(len(suite.blocks), 0)
+
+    def test_update(self):
+        suite = InferenceSuite(incremental=True)
+        data = self.wikiData()
+        added, removed = suite.update(data)
+        self.assertEqual(set(map(str, added)), set(map(str, sum(InferenceSuite().checkIfErrors(data).values(), []))))
+        self.assertEqual(removed, [])
+
+        # La page ne contient plus la seconde naissance.
+        page = next(iter(data.data))
+        page.births = {birth for birth in page.births if birth.date == Date(1900)}
+        added, removed = suite.update(data)
+        self.assertEqual(added, [])
+        self.assertEqual(len(removed), 3)
+        self.assertEqual(suite.results()[MultiBirthInferenceChecker], [])
+        self.assertEqual(len(suite.results()[BirthInferenceChecker]), 1)
+
+        added, removed = suite.update(WikiData(), ['http://wiki/A'])
+        self.assertEqual(sum(suite.results().values(), []), [])
+
+    def test_update_after_restart(self):
+        suite = InferenceSuite(incremental=True)
+        suite.update(self.wikiData())
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'facts.snapshot')
+            suite.saveFacts(path)
+            restarted = InferenceSuite(incremental=True)
+            restarted.loadFacts(path)
+
+        self.assertEqual({checker: set(map(str, facts)) for checker, facts in restarted.results().items()},
+                         {checker: set(map(str, facts)) for checker, facts in suite.results().items()})
+        self.assertEqual(len(restarted.pages['http://wiki/A']), 4)
+        birth = next(f for f in restarted.moteur.facts.values() if f.name == 'Naissance')
+        self.assertIsInstance(birth.propositions[0].value, Date)
+        self.assertEqual(birth.propositions[2].value, Person('A', 'a'))
+
+        added, removed = restarted.update(self.wikiData())
+        self.assertEqual((added, removed), ([], []))
+        restarted.update(WikiData(), ['http://wiki/A'])
+        self.assertEqual(sum(restarted.results().values(), []), [])
+
+    def test_check_people(self):
+        results = InferenceSuite().checkPeople(self.wikiData(), [Person('A', 'a')])
+        expected = InferenceSuite().checkIfErrors(self.wikiData())
+
+        for checker in InferenceSuite.CHECKERS:
+            self.assertEqual(set(map(str, results[checker])), set(map(str, expected[checker])))
+        self.assertEqual(sum(InferenceSuite().checkPeople(self.wikiData(), [Person('B', 'b')]).values(), []), [])
+
+    def test_snapshot(self):
+        data = self.wikiData()
+        facts = [event.toPredicate(page.url) for page in data.data for event in page.births | page.deaths]
+
+        self.assertEqual(set(map(str, map(restoreEvent, snapshotEvents(data)))),
+                         set(map(str, facts + [fact('Election', '1895.0.0 - 0:0:0', 'Rome', 'A a')])))
+
+    def test_parallel(self):
+        sequential = InferenceSuite().checkIfErrors(self.wikiData())
+        parallel = checkIfErrorsInParallel(self.wikiData(), workers=2)
+
+        self.assertEqual(list(parallel), list(sequential))
+        for checker, facts in sequential.items():
+            self.assertEqual({str(f): f.getUrls() for f in parallel[checker]}, {str(f): f.getUrls() for f in facts})
+
+    def test_parallel_rule_checker(self):
+        checker = ruleChecker('TextBirthChecker',
+                              'Naissance(d1,l1,p1), Mort(d2,l2,p1), avant(d2,d1) => "Erreur de date"(p1,d1,d2)')
+        expected = InferenceSuite([BirthInferenceChecker]).checkIfErrors(self.wikiData())[BirthInferenceChecker]
+        results = checkIfErrorsInParallel(self.wikiData(), [checker, MultiBirthInferenceChecker], workers=2)
+
+        self.assertEqual(list(results), [checker, MultiBirthInferenceChecker])
+        self.assertEqual({str(f): f.getUrls() for f in results[checker]}, {str(f): f.getUrls() for f in expected})
+
+
+if __name__ == '__main__':
+    unittest.main()
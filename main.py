@@ -1,11 +1,14 @@
+import os
 import sys
 import threading
 import time
 from datetime import date, timedelta
 
-from Editing.InferenceWriter import write_inferences
+from Editing.InferenceWriter import write_inferences, write_incremental_inferences
+from InferenceEngine.Statistics import Statistics
 from InputValidation import *
 from Scraping.ScrapingEngine import ScrapingEngine
+from Scraping.WikiInference import InferenceSuite
 
 
 def setupScrapeBeginDate(*args):
@@ -82,6 +85,21 @@ def clean(*args):
 
 
 def loopTask(stopEvent, *args):
+    global scrapeBeginDate
+    global inferenceSuite
+
+    # The conclusions are kept between cycles, and between runs of the daemon:
+    # each cycle only scrapes the pages modified since the previous one and
+    # updates their facts. A fresh suite resumes from the facts saved by the
+    # last cycle, or knows no page and scrapes the whole window.
+    if inferenceSuite is None:
+        inferenceSuite = InferenceSuite(incremental=True)
+        if os.path.exists(INFERENCE_SNAPSHOT):
+            inferenceSuite.loadFacts(INFERENCE_SNAPSHOT)
+            # The day before, in case the last cycle ran over midnight.
+            scrapeBeginDate = date.fromtimestamp(os.path.getmtime(INFERENCE_SNAPSHOT)) - timedelta(1)
+        else:
+            scrapeBeginDate = date.today() - timedelta(SCRAPE_WINDOW)
 
     print("Starting up the daemon")
     while not stopEvent.wait(1):
@@ -91,6 +109,7 @@ def loopTask(stopEvent, *args):
         if stopEvent.wait(3):
             break
 
+        cycleBeginDate = date.today()
         if not scrape(*args):
             break
 
@@ -99,7 +118,16 @@ def loopTask(stopEvent, *args):
         if stopEvent.wait(3):
             break
 
-        infer(*args)
+        if se.isReady():
+            try:
+                write_incremental_inferences(inferenceSuite, se.getResultSet(), se.linksDB)
+                inferenceSuite.saveFacts(INFERENCE_SNAPSHOT)
+            except BaseException:
+                # A partial update leaves the suite out of step with the wiki:
+                # the next run starts again from the last saved facts.
+                inferenceSuite = None
+                raise
+        scrapeBeginDate = cycleBeginDate
 
         print("Going for a coffee break, see you in 1 hour. (^_^)o自")
 
@@ -125,7 +153,17 @@ def infer(*args):
         print("Please run wiki scraping first")
         return
 
-    write_inferences(se.getResultSet(), se.linksDB)
+    write_inferences(se.getResultSet(), se.linksDB, "--parallel" in args, "--vectorised" in args)
+
+
+def stats(*args):
+    if not se.isReady():
+        print("Please run wiki scraping first")
+        return
+
+    statistics = Statistics()
+    InferenceSuite(stats=statistics).checkIfErrors(se.getResultSet())
+    print(statistics)
 
 
 def shutdown(*args):
@@ -151,7 +189,8 @@ def die(*args):
 def help(*args):
     print("Commands available :")
     print("scrape")
-    print("infer")
+    print("infer [--parallel] [--vectorised]")
+    print("stats")
     print("clean")
     print("autorun")
     print("stop")
@@ -163,10 +202,13 @@ PROMPT = 'InferenceBot > '
 TIME_BEGIN = "2000-01-01T00:00:00Z"
 TIME_FORMAT = "%Y-%m-%dT00:00:00Z"
 yesterday = date.today() - timedelta(1)
-scrapeBeginDate = date.today() - timedelta(100)
+SCRAPE_WINDOW = 100
+INFERENCE_SNAPSHOT = 'inference.snapshot'
+scrapeBeginDate = date.today() - timedelta(SCRAPE_WINDOW)
+inferenceSuite = None
 currentTask = None
 killPill = threading.Event()
-command_list = [hello, hi, thanks, scrape, infer, autorun, stop, shutdown, die, help, clean]
+command_list = [hello, hi, thanks, scrape, infer, stats, autorun, stop, shutdown, die, help, clean]
 commands = {f.__name__: f for f in command_list}
 
 se = ScrapingEngine()